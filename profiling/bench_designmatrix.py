@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""Time the design matrix of a model with many delay parameters.
+
+TimingModel.designmatrix computes the total delay and the derivative of
+phase with respect to delay once and shares them between all parameter
+derivatives. This compares it with computing the columns one at a time.
+"""
+import time
+
+import astropy.units as u
+
+import pint.models
+import pint.toa
+
+ntoas = 5000
+nrepeat = 3
+
+model = pint.models.get_model("J0740+6620.par")
+toas = pint.toa.make_fake_toas(56650, 58450, ntoas, model, freq=1400 * u.MHz, obs="GBT")
+params = model.free_params
+
+# Each column on its own recomputes the phase-delay derivative
+t0 = time.time()
+for i in range(nrepeat):
+    delay = model.delay(toas)
+    for p in params:
+        model.d_phase_d_param(toas, delay, p)
+t_separate = (time.time() - t0) / nrepeat
+
+t0 = time.time()
+for i in range(nrepeat):
+    model.designmatrix(toas)
+t_shared = (time.time() - t0) / nrepeat
+
+print()
+print("Number of TOAs: " + str(toas.ntoas))
+print("Number of free parameters: " + str(len(params)))
+print("Columns computed separately: {:.3f} s".format(t_separate))
+print("designmatrix: {:.3f} s".format(t_shared))
+print("Speedup: {:.2f}".format(t_separate / t_shared))
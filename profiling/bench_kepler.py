@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""Time the solution of Kepler's equation for binary-model-sized arrays.
+
+Compares a Newton iteration over the whole array started from the mean
+anomaly, as the binary models used to do, with pint.orbital.kepler.solve_kepler
+started cold and warm (from the solution for a slightly different orbital
+period, as in fitting or MCMC).
+"""
+import time
+
+import numpy as np
+
+from pint.orbital.kepler import solve_kepler
+
+ntoas = 100000
+nrepeat = 5
+
+
+def whole_array_newton(e, ma, maxiter=100):
+    # Newton's method from E = M does not converge everywhere for e close to 1
+    E = ma
+    for i in range(maxiter):
+        f = E - e * np.sin(E) - ma
+        if np.max(np.abs(f)) <= 5e-15:
+            return True
+        E = E - f / (1 - e * np.cos(E))
+    return False
+
+
+def timeit(f):
+    t0 = time.time()
+    for i in range(nrepeat):
+        f()
+    return (time.time() - t0) / nrepeat
+
+
+t = np.linspace(0, 1000, ntoas, dtype=np.longdouble)
+print("Number of mean anomalies: " + str(ntoas))
+print("{:>6} {:>16} {:>12} {:>12}".format("e", "old (s)", "cold (s)", "warm (s)"))
+for e in [0.01, 0.3, 0.6, 0.9, 0.99, 0.999]:
+    e = np.longdouble(e)
+    pb = np.longdouble(3.7)
+    ma = 2 * np.pi * (t / pb % 1)
+    ma_new = 2 * np.pi * (t / (pb * (1 + 1e-9)) % 1)
+    E = solve_kepler(e, ma)
+    if whole_array_newton(e, ma_new):
+        t_old = "{:16.4f}".format(timeit(lambda: whole_array_newton(e, ma_new)))
+    else:
+        t_old = "{:>16}".format("no convergence")
+    t_cold = timeit(lambda: solve_kepler(e, ma_new))
+    t_warm = timeit(lambda: solve_kepler(e, ma_new, guess=E + (ma_new - ma)))
+    print("{:6g} {} {:12.4f} {:12.4f}".format(e, t_old, t_cold, t_warm))
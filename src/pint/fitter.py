@@ -9,7 +9,9 @@ import numpy as np
 import pint.utils
 import scipy.linalg as sl
 import scipy.optimize as opt
+import scipy.sparse
 from astropy import log
+from pint.gls_likelihood import GLSLikelihood, NoiseLikelihood
 from pint.toa import TOAs
 from pint.utils import FTest
 from pint.pint_matrix import (
@@ -18,6 +20,7 @@ from pint.pint_matrix import (
     combine_design_matrices_by_quantity,
     combine_design_matrices_by_param,
     combine_covariance_matrix,
+    sparse_normal_matrix,
 )
 
 import pint.residuals as pr
@@ -153,8 +156,10 @@ class Fitter(object):
         """
         self.model.set_param_uncertainties(fitp)
 
-    def get_designmatrix(self):
-        return self.model.designmatrix(toas=self.toas, incfrozen=False, incoffset=True)
+    def get_designmatrix(self, sparse=False):
+        return self.model.designmatrix(
+            toas=self.toas, incfrozen=False, incoffset=True, sparse=sparse
+        )
 
     def minimize_func(self, x, *args):
         """Wrapper function for the residual class, meant to be passed to
@@ -692,13 +697,14 @@ class PowellFitter(Fitter):
         self.model.maskPar_has_toas_check(self.toas)
         # Initial guesses are model params
         fitp = self.model.get_params_dict("free", "num")
-        self.fitresult = opt.minimize(
-            self.minimize_func,
-            list(fitp.values()),
-            args=tuple(fitp.keys()),
-            options={"maxiter": maxiter},
-            method=self.method,
-        )
+        with self.model.kepler_warm_start():
+            self.fitresult = opt.minimize(
+                self.minimize_func,
+                list(fitp.values()),
+                args=tuple(fitp.keys()),
+                options={"maxiter": maxiter},
+                method=self.method,
+            )
         # Update model and resids, as the last iteration of minimize is not
         # necessarily the one that yields the best fit
         self.minimize_func(np.atleast_1d(self.fitresult.x), *list(fitp.keys()))
@@ -722,8 +728,16 @@ class WLSFitter(Fitter):
         )
         self.method = "weighted_least_square"
 
-    def fit_toas(self, maxiter=1, threshold=False):
-        """Run a linear weighted least-squared fitting method"""
+    def fit_toas(self, maxiter=1, threshold=False, sparse=False):
+        """Run a linear weighted least-squared fitting method
+
+        If sparse is True, the design matrix is kept as a sparse matrix and
+        the fit is solved from the normal equations, whose assembly only
+        touches the nonzero entries of the design matrix. Since this squares
+        the condition number of the problem, the usual SVD of the (dense)
+        design matrix is used instead if the normal equations are too poorly
+        conditioned.
+        """
         # check that params of timing model have necessary components
         self.model.maskPar_has_toas_check(self.toas)
         chi2 = 0
@@ -732,14 +746,17 @@ class WLSFitter(Fitter):
             fitpv = self.model.get_params_dict("free", "num")
             fitperrs = self.model.get_params_dict("free", "uncertainty")
             # Define the linear system
-            M, params, units, scale_by_F0 = self.get_designmatrix()
+            M, params, units, scale_by_F0 = self.get_designmatrix(sparse=sparse)
             # Get residuals and TOA uncertainties in seconds
             self.update_resids()
             residuals = self.resids.time_resids.to(u.s).value
             Nvec = self.toas.get_errors().to(u.s).value
 
             # "Whiten" design matrix and residuals by dividing by uncertainties
-            M = M / Nvec.reshape((-1, 1))
+            if sparse:
+                M = (scipy.sparse.diags(1 / Nvec) @ M).tocsc()
+            else:
+                M = M / Nvec.reshape((-1, 1))
             residuals = residuals / Nvec
 
             # For each column in design matrix except for col 0 (const. pulse
@@ -749,16 +766,38 @@ class WLSFitter(Fitter):
             # NOTE, We remove subtract mean value here, since it did not give us a
             # fast converge fitting.
             # M[:,1:] -= M[:,1:].mean(axis=0)
-            fac = M.std(axis=0)
-            fac[0] = 1.0
-            M /= fac
-            # Singular value decomp of design matrix:
-            #   M = U s V^T
-            # Dimensions:
-            #   M, U are Ntoa x Nparam
-            #   s is Nparam x Nparam diagonal matrix encoded as 1-D vector
-            #   V^T is Nparam x Nparam
-            U, s, Vt = sl.svd(M, full_matrices=False)
+            if sparse:
+                mean = np.asarray(M.mean(axis=0)).ravel()
+                fac = np.sqrt(
+                    np.asarray(M.multiply(M).mean(axis=0)).ravel() - mean ** 2
+                )
+                fac[0] = 1.0
+                M = (M @ scipy.sparse.diags(1 / fac)).tocsc()
+                # The SVD of M follows from that of M^T M = V s^2 V^T,
+                # and U^T r = s^-1 V^T M^T r
+                _, s2, Vt = sl.svd(sparse_normal_matrix(M), full_matrices=False)
+                if s2[-1] > 1e-8 * s2[0]:
+                    s = np.sqrt(s2)
+                    Utr = np.dot(Vt, M.T @ residuals) / s
+                else:
+                    log.info(
+                        "Normal equations are ill-conditioned; "
+                        "using the dense design matrix"
+                    )
+                    U, s, Vt = sl.svd(M.toarray(), full_matrices=False)
+                    Utr = np.dot(U.T, residuals)
+            else:
+                fac = M.std(axis=0)
+                fac[0] = 1.0
+                M /= fac
+                # Singular value decomp of design matrix:
+                #   M = U s V^T
+                # Dimensions:
+                #   M, U are Ntoa x Nparam
+                #   s is Nparam x Nparam diagonal matrix encoded as 1-D vector
+                #   V^T is Nparam x Nparam
+                U, s, Vt = sl.svd(M, full_matrices=False)
+                Utr = np.dot(U.T, residuals)
             # Note, here we could do various checks like report
             # matrix condition number or zero out low singular values.
             # print 'log_10 cond=', np.log10(s.max()/s.min())
@@ -787,7 +826,7 @@ class WLSFitter(Fitter):
             # The delta-parameter values
             #   dpars = V s^-1 U^T r
             # Scaling by fac recovers original units
-            dpars = np.dot(Vt.T, np.dot(U.T, residuals) / s) / fac
+            dpars = np.dot(Vt.T, Utr / s) / fac
             for ii, pn in enumerate(fitp.keys()):
                 uind = params.index(pn)  # Index of designmatrix
                 un = 1.0 / (units[uind])  # Unit in designmatrix
@@ -820,12 +859,34 @@ class GLSFitter(Fitter):
         )
         self.method = "generalized_least_square"
 
-    def fit_toas(self, maxiter=1, threshold=False, full_cov=False):
+    def gls_likelihood(self):
+        """Return a `pint.gls_likelihood.GLSLikelihood` for the current model.
+
+        Its noise model terms are cached on the TOAs, so they are shared by
+        the iterations of a fit and by later fits with the same noise
+        parameters.
+        """
+        return GLSLikelihood(self.model, self.toas)
+
+    def noise_likelihood(self, params):
+        """Return the likelihood of noise parameters, marginalized over the
+        free timing parameters.
+
+        This uses the current model and residuals; see
+        `pint.gls_likelihood.NoiseLikelihood`. The fitter's model is not
+        changed.
+        """
+        return NoiseLikelihood(
+            self.model, self.toas, params, resids=self.resids.time_resids
+        )
+
+    def fit_toas(self, maxiter=1, threshold=False, full_cov=False, sparse=False):
         """Run a Generalized least-squared fitting method
 
         If maxiter is less than one, no fitting is done, just the
-        chi-squared computation. In this case, you must provide the residuals
-        argument.
+        chi-squared computation from residuals recomputed for the current
+        model. Without full_cov this is the chi-squared for the white noise
+        alone.
 
         If maxiter is one or more, so fitting is actually done, the
         chi-squared value returned is only approximately the chi-squared
@@ -845,60 +906,60 @@ class GLSFitter(Fitter):
         of the covariance matrix, based on information provided by the noise
         model. The two algorithms should give the same result to numerical
         accuracy where they both can be applied.
+
+        If sparse is True, the timing design matrix is kept as a sparse
+        matrix, so that forming the normal equations scales with its number
+        of nonzero entries. This only applies when full_cov is False.
         """
         # check that params of timing model have necessary components
         self.model.maskPar_has_toas_check(self.toas)
         chi2 = 0
+        sparse = sparse and not full_cov
         for i in range(max(maxiter, 1)):
             fitp = self.model.get_params_dict("free", "quantity")
             fitpv = self.model.get_params_dict("free", "num")
             fitperrs = self.model.get_params_dict("free", "uncertainty")
 
-            # Define the linear system
-            M, params, units, scale_by_F0 = self.get_designmatrix()
-
             # Get residuals and TOA uncertainties in seconds
             if i == 0:
                 self.update_resids()
             residuals = self.resids.time_resids.to(u.s).value
+            if maxiter <= 0:
+                if full_cov:
+                    return self.gls_likelihood().chi2(residuals)
+                return self.gls_likelihood().white_chi2(residuals)
 
-            # get any noise design matrices and weight vectors
-            if not full_cov:
-                Mn = self.model.noise_model_designmatrix(self.toas)
-                phi = self.model.noise_model_basis_weight(self.toas)
-                phiinv = np.zeros(M.shape[1])
-                if Mn is not None and phi is not None:
-                    phiinv = np.concatenate((phiinv, 1 / phi))
-                    M = np.hstack((M, Mn))
+            # Define the linear system
+            M, params, units, scale_by_F0 = self.get_designmatrix(sparse=sparse)
 
             # normalize the design matrix
-            norm = np.sqrt(np.sum(M ** 2, axis=0))
-            ntmpar = len(fitp)
-            if M.shape[1] > ntmpar:
-                norm[ntmpar:] = 1
+            if sparse:
+                norm = np.sqrt(np.asarray(M.multiply(M).sum(axis=0)).ravel())
+            else:
+                norm = np.sqrt(np.sum(M ** 2, axis=0))
             if np.any(norm == 0):
                 # Make this a LinAlgError so it looks like other bad matrixness
                 raise sl.LinAlgError(
                     "One or more of the design-matrix columns is null."
                 )
-            M /= norm
+            if sparse:
+                M = (M @ scipy.sparse.diags(1 / norm)).tocsc()
+            else:
+                M /= norm
 
-            # compute covariance matrices
-            if full_cov:
+            if not full_cov:
+                # The noise model terms, and the factorization of their part
+                # of the normal equations, are cached by the likelihood
+                gls = self.gls_likelihood()
+                xhat, xvar, chi2, noise_resids = gls.solve(
+                    M, residuals, threshold=threshold
+                )
+            else:
                 cov = self.model.toa_covariance_matrix(self.toas)
                 cf = sl.cho_factor(cov)
                 cm = sl.cho_solve(cf, M)
                 mtcm = np.dot(M.T, cm)
                 mtcy = np.dot(cm.T, residuals)
-
-            else:
-                Nvec = self.model.scaled_toa_uncertainty(self.toas).to(u.s).value ** 2
-                cinv = 1 / Nvec
-                mtcm = np.dot(M.T, cinv[:, None] * M)
-                mtcm += np.diag(phiinv)
-                mtcy = np.dot(M.T, cinv * residuals)
-
-            if maxiter > 0:
                 try:
                     c = sl.cho_factor(mtcm)
                     xhat = sl.cho_solve(c, mtcy)
@@ -914,19 +975,9 @@ class GLSFitter(Fitter):
 
                     xvar = np.dot(Vt.T / s, Vt)
                     xhat = np.dot(Vt.T, np.dot(U.T, mtcy) / s)
-                newres = residuals - np.dot(M, xhat)
                 # compute linearized chisq
-                if full_cov:
-                    chi2 = np.dot(newres, sl.cho_solve(cf, newres))
-                else:
-                    chi2 = np.dot(newres, cinv * newres) + np.dot(xhat, phiinv * xhat)
-            else:
-                newres = residuals
-                if full_cov:
-                    chi2 = np.dot(newres, sl.cho_solve(cf, newres))
-                else:
-                    chi2 = np.dot(newres, cinv * newres)
-                return chi2
+                newres = residuals - M.dot(xhat)
+                chi2 = np.dot(newres, sl.cho_solve(cf, newres))
 
             # compute absolute estimates, normalized errors, covariance matrix
             dpars = xhat / norm
@@ -948,15 +999,11 @@ class GLSFitter(Fitter):
             # Update Uncertainties
             self.set_param_uncertainties(fitperrs)
 
-            # Compute the noise realizations if possible
+            # Record the noise realizations if possible
             if not full_cov:
-                noise_dims = self.model.noise_model_dimensions(self.toas)
-                noise_resids = {}
-                for comp in noise_dims.keys():
-                    p0 = noise_dims[comp][0] + ntmpar
-                    p1 = p0 + noise_dims[comp][1]
-                    noise_resids[comp] = np.dot(M[:, p0:p1], xhat[p0:p1]) * u.s
-                self.resids.noise_resids = noise_resids
+                self.resids.noise_resids = {
+                    comp: nr * u.s for comp, nr in noise_resids.items()
+                }
 
         # Update START/FINISH params
         self.model.START.value = self.toas.first_MJD
@@ -1061,19 +1108,29 @@ class WidebandTOAFitter(Fitter):  # Is GLSFitter the best here?
         """Update the residuals. Run after updating a model parameter."""
         self.resids = self.make_combined_residuals(self.additional_args)
 
-    def get_designmatrix(self):
+    def get_designmatrix(self, sparse=False):
         design_matrixs = []
         fit_params = self.model.free_params
         if len(self.fit_data) == 1:
             for ii, dmatrix_maker in enumerate(self.designmatrix_makers):
                 design_matrixs.append(
-                    dmatrix_maker(self.fit_data[0], self.model, fit_params, offset=True)
+                    dmatrix_maker(
+                        self.fit_data[0],
+                        self.model,
+                        fit_params,
+                        offset=True,
+                        sparse=sparse,
+                    )
                 )
         else:
             for ii, dmatrix_maker in enumerate(self.designmatrix_makers):
                 design_matrixs.append(
                     dmatrix_maker(
-                        self.fit_data[ii], self.model, fit_params, offset=True
+                        self.fit_data[ii],
+                        self.model,
+                        fit_params,
+                        offset=True,
+                        sparse=sparse,
                     )
                 )
         return combine_design_matrices_by_quantity(design_matrixs)
@@ -1138,18 +1195,23 @@ class WidebandTOAFitter(Fitter):  # Is GLSFitter the best here?
                 scaled_sigmas_no_unit.append(scaled_sigma)
         return np.hstack(scaled_sigmas_no_unit)
 
-    def fit_toas(self, maxiter=1, threshold=False, full_cov=False):
+    def fit_toas(self, maxiter=1, threshold=False, full_cov=False, sparse=False):
+        """Run a generalized least-squares fit to all the data.
+
+        The options are the same as for `GLSFitter.fit_toas`.
+        """
         # Maybe change the name to do_fit?
         # check that params of timing model have necessary components
         # self.model.maskPar_has_toas_check(self.toas)
         chi2 = 0
+        sparse = sparse and not full_cov
         for i in range(max(maxiter, 1)):
             fitp = self.model.get_params_dict("free", "quantity")
             fitpv = self.model.get_params_dict("free", "num")
             fitperrs = self.model.get_params_dict("free", "uncertainty")
 
             # Define the linear system
-            d_matrix = self.get_designmatrix()
+            d_matrix = self.get_designmatrix(sparse=sparse)
             M, params, units, scale_by_F0 = (
                 d_matrix.matrix,
                 d_matrix.derivative_params,
@@ -1167,7 +1229,7 @@ class WidebandTOAFitter(Fitter):  # Is GLSFitter the best here?
             # get any noise design matrices and weight vectors
             if not full_cov:
                 # We assume the fit date type is toa
-                Mn = self.noise_designmatrix_maker(self.toas, self.model)
+                Mn = self.noise_designmatrix_maker(self.toas, self.model, sparse=sparse)
                 phi = self.model.noise_model_basis_weight(self.toas)
                 phiinv = np.zeros(M.shape[1])
                 if Mn is not None and phi is not None:
@@ -1181,7 +1243,10 @@ class WidebandTOAFitter(Fitter):  # Is GLSFitter the best here?
                     )
 
             # normalize the design matrix
-            norm = np.sqrt(np.sum(M ** 2, axis=0))
+            if sparse:
+                norm = np.sqrt(np.asarray(M.multiply(M).sum(axis=0)).ravel())
+            else:
+                norm = np.sqrt(np.sum(M ** 2, axis=0))
             ntmpar = len(fitp)
             if M.shape[1] > ntmpar:
                 norm[ntmpar:] = 1
@@ -1190,7 +1255,10 @@ class WidebandTOAFitter(Fitter):  # Is GLSFitter the best here?
                 raise sl.LinAlgError(
                     "One or more of the design-matrix columns is null."
                 )
-            M /= norm
+            if sparse:
+                M = (M @ scipy.sparse.diags(1 / norm)).tocsc()
+            else:
+                M /= norm
 
             # compute covariance matrices
             if full_cov:
@@ -1204,9 +1272,12 @@ class WidebandTOAFitter(Fitter):  # Is GLSFitter the best here?
                 Nvec = self.scaled_all_sigma() ** 2
 
                 cinv = 1 / Nvec
-                mtcm = np.dot(M.T, cinv[:, None] * M)
+                if sparse:
+                    mtcm = sparse_normal_matrix(M, cinv)
+                else:
+                    mtcm = np.dot(M.T, cinv[:, None] * M)
                 mtcm += np.diag(phiinv)
-                mtcy = np.dot(M.T, cinv * residuals)
+                mtcy = M.T.dot(cinv * residuals)
 
             if maxiter > 0:
                 try:
@@ -1224,7 +1295,7 @@ class WidebandTOAFitter(Fitter):  # Is GLSFitter the best here?
 
                     xvar = np.dot(Vt.T / s, Vt)
                     xhat = np.dot(Vt.T, np.dot(U.T, mtcy) / s)
-                newres = residuals - np.dot(M, xhat)
+                newres = residuals - M.dot(xhat)
                 # compute linearized chisq
                 if full_cov:
                     chi2 = np.dot(newres, sl.cho_solve(cf, newres))
@@ -1267,7 +1338,7 @@ class WidebandTOAFitter(Fitter):  # Is GLSFitter the best here?
                 for comp in noise_dims.keys():
                     p0 = noise_dims[comp][0] + ntmpar
                     p1 = p0 + noise_dims[comp][1]
-                    noise_resids[comp] = np.dot(M[:, p0:p1], xhat[p0:p1]) * u.s
+                    noise_resids[comp] = M[:, p0:p1].dot(xhat[p0:p1]) * u.s
                 self.resids.noise_resids = noise_resids
 
         # Update START/FINISH params
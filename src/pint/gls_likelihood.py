@@ -0,0 +1,549 @@
+"""Gaussian likelihood for timing residuals with white plus low-rank noise.
+
+The TOA covariance matrix of the noise models is ``C = W + T phi T^T``: a
+block-diagonal matrix ``W`` of scaled TOA variances (EFAC/EQUAD) and of
+ECORR, whose blocks are the observing epochs, plus a low-rank part from the
+other correlated noise bases ``T`` (red noise Fourier modes, ...) with prior
+variances ``phi``. The Woodbury identity
+
+    C^-1 = W^-1 - W^-1 T Sigma^-1 T^T W^-1,  Sigma = phi^-1 + T^T W^-1 T,
+
+means that ``C`` is never formed: ``W`` is inverted one epoch at a time and
+only the small matrix ``Sigma`` has to be factorized. ``Sigma`` depends on
+the TOAs and the noise parameters but not on the timing parameters, so it is
+computed once and reused by all fitter iterations and likelihood evaluations
+until one of those changes.
+"""
+from __future__ import absolute_import, division, print_function
+
+import copy
+
+import astropy.units as u
+import numpy as np
+import scipy.linalg as sl
+import scipy.sparse
+
+from pint.models.noise_model import EcorrNoise
+from pint.pint_matrix import sparse_normal_matrix
+
+__all__ = ["GLSLikelihood", "NoiseLikelihood", "NoiseState"]
+
+
+def _as_seconds(x):
+    if hasattr(x, "unit"):
+        return x.to_value(u.s)
+    return np.asarray(x, dtype=float)
+
+
+class NoiseState(object):
+    """The noise model terms that do not depend on the timing parameters.
+
+    The covariance matrix is split as ``C = W + T phi T^T``, where
+    ``W = N + U J U^T`` is block diagonal: ``N`` holds the white-noise
+    variances, and the ECORR term ``U J U^T`` adds the variance ``J_e`` to
+    every pair of TOAs in the same observing epoch ``e``. ``W`` is never
+    formed; it is inverted one epoch at a time with the Sherman-Morrison
+    formula, from the TOA to epoch index. The remaining correlated-noise
+    bases ``T`` are handled with the Woodbury identity.
+
+    The bases are given as a list of arrays, one per basis function. If a
+    previous `NoiseState` with the same arrays (the cached bases of
+    `pint.models.noise_model.get_fourier_basis`, for example) and the same
+    ``W`` is given, its products ``W^-1 T`` and ``T^T W^-1 T`` are reused,
+    so that a change of the basis weights alone costs O(nbasis^3).
+
+    Attributes
+    ----------
+    Nvec : numpy.ndarray
+        The white-noise TOA variances in s^2.
+    epoch_index : numpy.ndarray or None
+        The epoch of each TOA (-1 if none), None if there is no ECORR.
+    epoch_weight : numpy.ndarray or None
+        The ECORR variance ``J_e`` of each epoch.
+    T : numpy.ndarray or None
+        The (ntoas, nbasis) correlated-noise basis, None if there is none.
+    phi : numpy.ndarray or None
+        The prior variances of the basis coefficients.
+    WT : numpy.ndarray or None
+        W^-1 T.
+    TNT : numpy.ndarray or None
+        The Gram matrix T^T W^-1 T.
+    Sigma : numpy.ndarray or None
+        phi^-1 + T^T W^-1 T.
+    Sigma_cf : tuple or None
+        The Cholesky factorization of Sigma, as returned by
+        `scipy.linalg.cho_factor`.
+    Sigma_inv : numpy.ndarray or None
+        The inverse of Sigma.
+    components : dict
+        For each noise component category, the slice of its columns in
+        ``T``, or None for the ECORR epochs.
+    logdet : float
+        The log-determinant of the TOA covariance matrix C.
+    """
+
+    def __init__(
+        self,
+        Nvec,
+        bases=(),
+        phi=None,
+        epoch_index=None,
+        epoch_weight=None,
+        components=None,
+        previous=None,
+    ):
+        self.Nvec = Nvec
+        self.Ninv = 1 / Nvec
+        self.components = {} if components is None else components
+        self.logdet = np.sum(np.log(Nvec))
+        self.epoch_index = epoch_index
+        self.epoch_weight = epoch_weight
+        self._epoch_sum = None
+        if epoch_index is not None:
+            rows = np.flatnonzero(epoch_index >= 0)
+            # Sums over the TOAs of each epoch, U^T x
+            self._epoch_sum = scipy.sparse.csr_matrix(
+                (np.ones(len(rows)), (epoch_index[rows], rows)),
+                shape=(len(epoch_weight), len(Nvec)),
+            )
+            # Sherman-Morrison: the block of epoch e has the inverse
+            # N_e^-1 - f_e N_e^-1 1 1^T N_e^-1, with f_e = J_e / (1 + J_e s_e)
+            # and s_e the sum of N_e^-1
+            js = epoch_weight * (self._epoch_sum @ self.Ninv)
+            self.epoch_factor = epoch_weight / (1 + js)
+            self.logdet += np.sum(np.log1p(js))
+        self.bases = tuple(bases)
+        self.phi = phi
+        if len(self.bases) == 0:
+            self.T = self.WT = self.TNT = None
+            self.Sigma = self.Sigma_cf = self.Sigma_inv = None
+            return
+        if previous is not None and self._same_bases(previous):
+            # Only the weights have changed
+            self.T, self.WT, self.TNT = previous.T, previous.WT, previous.TNT
+        else:
+            self.T = np.hstack(self.bases)
+            self.WT = self.white_dot(self.T)
+            self.TNT = np.dot(self.T.T, self.WT)
+        self.Sigma = self.TNT + np.diag(1 / phi)
+        self.Sigma_cf = sl.cho_factor(self.Sigma)
+        self.Sigma_inv = sl.cho_solve(self.Sigma_cf, np.eye(len(phi)))
+        self.logdet += np.sum(np.log(phi))
+        self.logdet += 2 * np.sum(np.log(np.diag(self.Sigma_cf[0])))
+
+    def _same_bases(self, other):
+        """Whether other has the same bases (the same arrays) and W."""
+        return (
+            len(self.bases) == len(other.bases)
+            and all(a is b for a, b in zip(self.bases, other.bases))
+            and self.epoch_index is other.epoch_index
+            and np.array_equal(self.epoch_weight, other.epoch_weight)
+            and np.array_equal(self.Nvec, other.Nvec)
+        )
+
+    @property
+    def phiinv(self):
+        return None if self.phi is None else 1 / self.phi
+
+    @property
+    def nbasis(self):
+        return 0 if self.T is None else self.T.shape[1]
+
+    def white_dot(self, x):
+        """Return W^-1 x, for a vector or a matrix of column vectors."""
+        Nx = (self.Ninv * np.asarray(x).T).T
+        if self._epoch_sum is None:
+            return Nx
+        corr = (self.epoch_factor * (self._epoch_sum @ Nx).T).T
+        return Nx - (self.Ninv * (self._epoch_sum.T @ corr).T).T
+
+    def white_normal_matrix(self, M):
+        """Return M^T W^-1 M, for a dense or sparse matrix M."""
+        if scipy.sparse.issparse(M):
+            MNM = sparse_normal_matrix(M, self.Ninv)
+            if self._epoch_sum is not None:
+                UNM = (self._epoch_sum @ (scipy.sparse.diags(self.Ninv) @ M)).toarray()
+        else:
+            MNM = np.dot(M.T, self.Ninv[:, None] * M)
+            if self._epoch_sum is not None:
+                UNM = self._epoch_sum @ (self.Ninv[:, None] * M)
+        if self._epoch_sum is not None:
+            MNM -= np.dot(UNM.T, self.epoch_factor[:, None] * UNM)
+        return MNM
+
+    def epoch_realization(self, resids):
+        """Return the ECORR noise that best explains the residuals.
+
+        The ECORR coefficient of each epoch is its Gaussian conditional
+        mean given the residuals, which do not include the other
+        correlated noise.
+        """
+        j = self.epoch_factor * (self._epoch_sum @ (self.Ninv * resids))
+        return self._epoch_sum.T @ j
+
+    def cinv_dot(self, x):
+        """Return C^-1 x, for a vector or a matrix of column vectors."""
+        Wx = self.white_dot(x)
+        if self.T is None:
+            return Wx
+        return Wx - np.dot(
+            self.WT, sl.cho_solve(self.Sigma_cf, np.dot(self.WT.T, np.asarray(x)))
+        )
+
+
+class GLSLikelihood(object):
+    """Chi-squared, log-likelihood and gradient for a model and TOAs.
+
+    The `NoiseState` for the current noise parameters is kept in
+    ``toas.selection_cache``, so it is shared by every `GLSLikelihood`,
+    fitter and residuals object using the same TOAs and noise parameter
+    values, and it is rebuilt only when the TOAs, their uncertainties or
+    the noise parameters change. Only the most recent noise state is kept.
+
+    Parameters
+    ----------
+    model : `pint.models.TimingModel`
+    toas : `pint.toa.TOAs`
+    """
+
+    def __init__(self, model, toas):
+        self.model = model
+        self.toas = toas
+
+    def noise_key(self):
+        """A hashable summary of the noise parameters of the model."""
+        key = []
+        for nc in getattr(self.model, "NoiseComponent_list", []):
+            for p in nc.params:
+                par = getattr(nc, p)
+                key_value = getattr(par, "key_value", None)
+                key.append(
+                    (
+                        p,
+                        par.value,
+                        getattr(par, "key", None),
+                        None if key_value is None else tuple(key_value),
+                    )
+                )
+        return tuple(key)
+
+    @property
+    def noise(self):
+        """The `NoiseState` for the current TOAs and noise parameters."""
+        cache = self.toas.selection_cache
+        key = self.noise_key()
+        # The uncertainties may have been changed in place
+        errors = np.asarray(self.toas.table["error"])
+        cached = cache.get("GLSLikelihood")
+        if (
+            cached is None
+            or cached[0] != key
+            or not np.array_equal(cached[1], errors)
+        ):
+            previous = None if cached is None else cached[2]
+            cached = (key, errors.copy(), self.compute_noise_state(previous))
+            cache["GLSLikelihood"] = cached
+        return cached[2]
+
+    def compute_noise_state(self, previous=None):
+        """Evaluate the noise model and factorize the result.
+
+        The basis products of a previous `NoiseState` are reused where
+        possible.
+        """
+        Nvec = self.model.scaled_toa_uncertainty(self.toas).to_value(u.s) ** 2
+        bases, weights = [], []
+        components = {}
+        epochs = {}
+        ntot = 0
+        for nc in getattr(self.model, "NoiseComponent_list", []):
+            if len(nc.basis_funcs) == 0:
+                continue
+            if isinstance(nc, EcorrNoise) and not nc.ecorr_epochs_overlap(self.toas):
+                # Block diagonal, so it is kept as an epoch index
+                index, weight = nc.ecorr_epoch_weight_pair(self.toas)
+                epochs = dict(epoch_index=index, epoch_weight=weight)
+                components[nc.category] = None
+                continue
+            nbf = 0
+            for bf in nc.basis_funcs:
+                T, phi = bf(self.toas)
+                bases.append(T)
+                weights.append(phi)
+                nbf += len(phi)
+            components[nc.category] = slice(ntot, ntot + nbf)
+            ntot += nbf
+        return NoiseState(
+            Nvec,
+            bases,
+            np.concatenate(weights) if weights else None,
+            components=components,
+            previous=previous,
+            **epochs
+        )
+
+    def _resids(self, resids):
+        if resids is None:
+            from pint.residuals import Residuals
+
+            resids = Residuals(self.toas, self.model).time_resids
+        return _as_seconds(resids)
+
+    def white_chi2(self, resids=None):
+        """Return r^T N^-1 r, ignoring the correlated noise."""
+        r = self._resids(resids)
+        return np.dot(r, self.noise.Ninv * r)
+
+    def chi2(self, resids=None):
+        """Return r^T C^-1 r.
+
+        Parameters
+        ----------
+        resids : array or `astropy.units.Quantity`, optional
+            The time residuals, in seconds if they have no units. By
+            default they are computed from the model.
+        """
+        r = self._resids(resids)
+        noise = self.noise
+        chi2 = np.dot(r, noise.white_dot(r))
+        if noise.T is not None:
+            TWr = np.dot(noise.WT.T, r)
+            chi2 -= np.dot(TWr, sl.cho_solve(noise.Sigma_cf, TWr))
+        return chi2
+
+    def logdet(self):
+        """Return the log-determinant of the TOA covariance matrix."""
+        return self.noise.logdet
+
+    def loglikelihood(self, resids=None):
+        """Return the Gaussian log-likelihood of the residuals."""
+        r = self._resids(resids)
+        return -0.5 * (self.chi2(r) + self.logdet() + len(r) * np.log(2 * np.pi))
+
+    def gradient(self, resids=None):
+        """Return the derivatives of the log-likelihood.
+
+        The residuals are taken to have their weighted mean removed, as
+        `pint.residuals.Residuals` does by default, so the mean is also
+        removed from each derivative of the residuals.
+
+        Returns
+        -------
+        grad : numpy.ndarray
+            The derivatives with respect to the free parameters of the
+            model, each in the inverse of the units of its parameter.
+        params : list of str
+            The names of the parameters, in the order of ``grad``.
+        """
+        r = self._resids(resids)
+        M, params, units, scale_by_F0 = self.model.designmatrix(
+            self.toas, incfrozen=False, incoffset=False
+        )
+        w = 1.0 / self.toas.get_errors().value ** 2
+        M -= np.dot(w, M) / np.sum(w)
+        # The residuals change by -M dp, so d lnL / dp = M^T C^-1 r
+        return np.dot(M.T, self.noise.cinv_dot(r)), params
+
+    def solve(self, M, resids, threshold=False):
+        """Solve the linearized GLS problem for a (normalized) design matrix.
+
+        The correlated-noise coefficients are included in the fit, with a
+        Gaussian prior of variance phi, but they are eliminated using the
+        cached factorization of Sigma and the block-diagonal ECORR term, so
+        that only a system the size of the number of timing parameters
+        needs to be factorized.
+
+        Parameters
+        ----------
+        M : numpy.ndarray or `scipy.sparse.spmatrix`
+            The (ntoas, ntmpar) timing design matrix.
+        resids : numpy.ndarray
+            The time residuals in seconds.
+        threshold : bool
+            If the Cholesky decomposition fails, the problem is solved by
+            singular value decomposition; remove the singular values below
+            threshold.
+
+        Returns
+        -------
+        xhat : numpy.ndarray
+            The best-fit timing parameter offsets.
+        xvar : numpy.ndarray
+            Their covariance matrix.
+        chi2 : float
+            The chi-squared of the linearized solution, including the prior
+            on the noise coefficients.
+        noise_resids : dict
+            The best-fit realization of each correlated-noise component, in
+            seconds, by component category.
+        """
+        noise = self.noise
+        r = _as_seconds(resids)
+        MNM = noise.white_normal_matrix(M)
+        MNr = M.T.dot(noise.white_dot(r))
+        k = len(MNr)
+        if noise.T is None:
+            A, b = MNM, MNr
+        else:
+            # M^T W^-1 T, computed without forming a dense M
+            MNT = np.asarray(M.T.dot(noise.WT))
+            TNr = np.dot(noise.WT.T, r)
+            SiB = np.dot(noise.Sigma_inv, MNT.T)
+            # Schur complement of Sigma
+            A = MNM - np.dot(MNT, SiB)
+            b = MNr - np.dot(SiB.T, TNr)
+        try:
+            c = sl.cho_factor(A)
+            xhat = sl.cho_solve(c, b)
+            xvar = sl.cho_solve(c, np.eye(k))
+            if noise.T is not None:
+                xn = np.dot(noise.Sigma_inv, TNr - np.dot(MNT.T, xhat))
+        except sl.LinAlgError:
+            if noise.T is None:
+                mtcm, mtcy = MNM, MNr
+            else:
+                mtcm = np.block([[MNM, MNT], [MNT.T, noise.Sigma]])
+                mtcy = np.concatenate((MNr, TNr))
+            U, s, Vt = sl.svd(mtcm, full_matrices=False)
+            if threshold:
+                threshold_val = np.finfo(np.longdouble).eps * max(M.shape) * s[0]
+                s[s < threshold_val] = 0.0
+            xvar = np.dot(Vt.T / s, Vt)[:k, :k]
+            x = np.dot(Vt.T, np.dot(U.T, mtcy) / s)
+            xhat, xn = x[:k], x[k:]
+        newres = r - M.dot(xhat)
+        chi2 = 0
+        if noise.T is not None:
+            newres -= np.dot(noise.T, xn)
+            chi2 += np.dot(xn, noise.phiinv * xn)
+        chi2 += np.dot(newres, noise.white_dot(newres))
+        noise_resids = {}
+        for comp, cols in noise.components.items():
+            if cols is None:
+                noise_resids[comp] = noise.epoch_realization(newres)
+            else:
+                noise_resids[comp] = np.dot(noise.T[:, cols], xn[cols])
+        return xhat, xvar, chi2, noise_resids
+
+
+class NoiseLikelihood(object):
+    """The likelihood of noise parameters, marginalized over timing parameters.
+
+    The timing model is linearized about its current parameters, and the
+    timing parameters (and the phase offset) are integrated out with flat
+    priors. This leaves a likelihood that depends only on the noise
+    parameters:
+
+        ln L = -1/2 (r^T C^-1 r - b^T A^-1 b + ln|C| + ln|A| + (n - k) ln(2 pi))
+
+    with ``A = M^T C^-1 M`` and ``b = M^T C^-1 r`` for the n residuals r and
+    the (n, k) design matrix M. The residuals and design matrix are computed
+    once. For each set of noise parameters the products of M and r with the
+    block-diagonal part of C cost O(n k^2); they and the noise basis
+    products are reused when only the weights of the correlated noise
+    change, so that those evaluations cost O((k + nbasis)^3).
+
+    The model is copied, so the model given is not changed.
+
+    Parameters
+    ----------
+    model : `pint.models.TimingModel`
+    toas : `pint.toa.TOAs`
+    params : list of str
+        The names of the noise parameters (EFAC1, EQUAD1, ECORR1, TNRedAmp,
+        ...) that are given to `loglikelihood`.
+    resids : array or `astropy.units.Quantity`, optional
+        The time residuals, in seconds if they have no units. By default
+        they are computed from the model.
+    """
+
+    def __init__(self, model, toas, params, resids=None):
+        self.model = copy.deepcopy(model)
+        self.toas = toas
+        self.params = list(params)
+        noise_params = set()
+        for nc in getattr(self.model, "NoiseComponent_list", []):
+            noise_params.update(nc.params)
+        for p in self.params:
+            if p not in noise_params:
+                raise ValueError("'%s' is not a noise model parameter." % p)
+        self.gls = GLSLikelihood(self.model, toas)
+        self.resids = self.gls._resids(resids)
+        M, names, units, scale_by_F0 = self.model.designmatrix(
+            toas, incfrozen=False, incoffset=True
+        )
+        self.designmatrix_params = names
+        # Normalize the columns for numerical stability; the log-likelihood
+        # does not depend on it
+        norm = np.sqrt(np.sum(M ** 2, axis=0))
+        if np.any(norm == 0):
+            raise sl.LinAlgError("One or more of the design-matrix columns is null.")
+        self.M = M / norm
+        self.lognorm = np.sum(np.log(norm))
+        self._products = None
+
+    @property
+    def values(self):
+        """The current values of the noise parameters."""
+        return np.array([getattr(self.model, p).value for p in self.params])
+
+    def set_values(self, values):
+        for p, v in zip(self.params, values):
+            getattr(self.model, p).value = v
+
+    def white_products(self, noise):
+        """Return the products of M and r with W^-1 and the noise basis.
+
+        These only depend on the white noise and ECORR, and on the noise
+        bases, so they are kept until the ``WT`` of the noise state changes.
+        """
+        # Without noise bases, the state itself identifies the white noise
+        key = noise if noise.WT is None else noise.WT
+        if self._products is not None and self._products[0] is key:
+            return self._products[1]
+        M, r = self.M, self.resids
+        WM = noise.white_dot(M)
+        products = dict(MWM=np.dot(M.T, WM), MWr=np.dot(WM.T, r))
+        products["rWr"] = np.dot(r, noise.white_dot(r))
+        if noise.T is not None:
+            products["MWT"] = np.dot(M.T, noise.WT)
+            products["TWr"] = np.dot(noise.WT.T, r)
+        self._products = (key, products)
+        return products
+
+    def loglikelihood(self, values=None):
+        """Return the marginalized log-likelihood for the noise parameters.
+
+        Parameters
+        ----------
+        values : array, optional
+            The values of the parameters in ``params``, in their units. The
+            model keeps them. By default the current values are used.
+
+        Returns
+        -------
+        float
+            The log-likelihood, or -inf if the covariance matrix is not
+            positive definite.
+        """
+        if values is not None:
+            self.set_values(values)
+        try:
+            noise = self.gls.noise
+            pr = self.white_products(noise)
+            rCr, A, b = pr["rWr"], pr["MWM"], pr["MWr"]
+            if noise.T is not None:
+                SiB = sl.cho_solve(noise.Sigma_cf, pr["MWT"].T)
+                SiTWr = sl.cho_solve(noise.Sigma_cf, pr["TWr"])
+                rCr = rCr - np.dot(pr["TWr"], SiTWr)
+                A = A - np.dot(pr["MWT"], SiB)
+                b = b - np.dot(pr["MWT"], SiTWr)
+            cf = sl.cho_factor(A)
+        except (sl.LinAlgError, ValueError):
+            return -np.inf
+        # M = M_norm diag(norm), so ln|A| = ln|A_norm| + 2 sum(ln norm)
+        logdetA = 2 * np.sum(np.log(np.diag(cf[0]))) + 2 * self.lognorm
+        n, k = self.M.shape
+        chi2 = rCr - np.dot(b, sl.cho_solve(cf, b))
+        lnl = -0.5 * (chi2 + noise.logdet + logdetA + (n - k) * np.log(2 * np.pi))
+        return float(lnl) if np.isfinite(lnl) else -np.inf
@@ -3,38 +3,273 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import os
 import copy
 import multiprocessing
-from multiprocessing import Process, Queue
 
 import astropy.units as u
 import numpy as np
+import scipy.linalg as sl
 from astropy import log
 import astropy.constants as const
 import pint.utils
+from pint.fitter import GLSFitter
 
-__all__ = ["grid_chisq", "grid_chisq_mp", "plot_grid_chisq"]
+__all__ = [
+    "grid_chisq",
+    "grid_chisq_mp",
+    "grid_chisq_nd",
+    "grid_chisq_linear",
+    "plot_grid_chisq",
+]
 
 
-def _grid_docol(ftr, par1_name, par1, par2_name, par2_grid, ii, q):
-    """Worker process that computes one row of the chisq grid"""
-    for jj, par2 in enumerate(par2_grid):
-        # Make a full copy of the fitter to work with
-        myftr = copy.deepcopy(ftr)
-        # Freeze the two params we are going to grid over and set their values
-        # All other unfrozen parameters will be fitted for at each grid point
-        getattr(myftr.model, par1_name).frozen = True
-        getattr(myftr.model, par2_name).frozen = True
-        getattr(myftr.model, par1_name).quantity = par1
-        getattr(myftr.model, par2_name).quantity = par2
-        chisq = myftr.fit_toas()
-        print(".", end="")
-        q.put([ii, jj, chisq])
+# The state of the grid workers: the fitter, with the grid parameters frozen,
+# and the free parameter values each fit starts from. The parent process sets
+# it before the workers are forked, so each worker has its own copy.
+_grid_state = {}
+
+
+def _grid_setup(ftr, parnames, fitargs):
+    """Prepare ftr for gridding over parnames and make it the worker fitter."""
+    for name in parnames:
+        getattr(ftr.model, name).frozen = True
+    _grid_state["ftr"] = ftr
+    _grid_state["parnames"] = parnames
+    _grid_state["start"] = ftr.model.get_params_dict("free", "num")
+    _grid_state["fitargs"] = fitargs
+
+
+def _grid_doline(item):
+    """Fit the grid points along one line of the grid.
+
+    item is (index, values, lastvalues, warmstart): the index of the line,
+    the values of all but the last grid parameter, the values of the last
+    one along the line, and whether each fit starts from the result of the
+    previous one. Returns the index and the chi-squared values.
+    """
+    index, values, lastvalues, warmstart = item
+    ftr = _grid_state["ftr"]
+    parnames = _grid_state["parnames"]
+    model = ftr.model
+    for name, value in zip(parnames[:-1], values):
+        getattr(model, name).quantity = value
+    model.set_param_values(_grid_state["start"])
+    chi2 = np.zeros(len(lastvalues))
+    for jj, value in enumerate(lastvalues):
+        getattr(model, parnames[-1]).quantity = value
+        if not warmstart:
+            model.set_param_values(_grid_state["start"])
+        chi2[jj] = ftr.fit_toas(**_grid_state["fitargs"])
+    return index, chi2
+
+
+def _grid_run(ftr, parnames, items, ncpu, fitargs):
+    """Run _grid_doline on items, in ncpu processes, yielding the results.
+
+    The results come in the order they are finished. A copy of ftr is used,
+    so ftr itself is not changed.
+    """
+    if ncpu is None:
+        ncpu = multiprocessing.cpu_count()
+    gridftr = copy.copy(ftr)
+    gridftr.model = copy.deepcopy(ftr.model)
+    _grid_setup(gridftr, parnames, fitargs)
+    pool = None
+    try:
+        if ncpu > 1 and len(items) > 1:
+            pool = multiprocessing.get_context("fork").Pool(min(ncpu, len(items)))
+            results = pool.imap_unordered(_grid_doline, items)
+        else:
+            results = map(_grid_doline, items)
+        for result in results:
+            yield result
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        _grid_state.clear()
+
+
+def grid_chisq_nd(
+    ftr, parnames, parvalues, ncpu=1, printprogress=True, warmstart=False, **fitargs
+):
+    """Compute chisq over a grid of any number of parameters
+
+    The parameters in parnames are frozen at each point of the grid and all
+    the other free parameters are fitted for. Fits start from the values of
+    the free parameters in ftr, or, if warmstart is True, from the result of
+    the fit at the neighboring point along the last grid axis; warm starts
+    can save iterations of nonlinear fits but make the result depend on the
+    order of the points.
+
+    The grid is split into lines along its last axis, which are handed out
+    one at a time to ncpu worker processes. Each worker is forked with its
+    own copy of the fitter, so the fitter (with its model and TOAs) is never
+    copied or pickled again, and is reused for all the points it fits. ftr
+    itself is not changed.
+
+    Parameters
+    ----------
+    ftr
+        The base fitter to use.
+    parnames : list of str
+        Names of the parameters to grid over
+    parvalues : list of array or Quantity
+        The values of each parameter
+    ncpu : int, optional
+        Number of processes to use; None uses all the CPUs available. With 1
+        the grid is computed in this process.
+    printprogress : bool, optional
+        Log the progress through the grid
+    warmstart : bool, optional
+        Start each fit from the result of the previous one along the line
+    fitargs
+        Passed on to ``ftr.fit_toas``
+
+    Returns
+    -------
+    array
+        chisq values, with one axis for each parameter, so that
+        ``chi2[i, j]`` is the value at ``parvalues[0][i]``, ``parvalues[1][j]``
+    """
+    parnames = list(parnames)
+    shape = tuple(len(v) for v in parvalues)
+    chi2 = np.zeros(shape)
+    items = [
+        (
+            index,
+            [v[i] for v, i in zip(parvalues[:-1], index)],
+            parvalues[-1],
+            warmstart,
+        )
+        for index in np.ndindex(*shape[:-1])
+    ]
+    step = max(len(items) // 10, 1)
+    for ndone, (index, line) in enumerate(
+        _grid_run(ftr, parnames, items, ncpu, fitargs), start=1
+    ):
+        chi2[index] = line
+        if printprogress and (ndone % step == 0 or ndone == len(items)):
+            log.info(
+                "Computed {} of {} grid points".format(ndone * shape[-1], chi2.size)
+            )
+    return chi2
+
+
+def grid_chisq_linear(
+    ftr, parnames, parvalues, refit=None, ncpu=1, printprogress=True, **fitargs
+):
+    """Compute chisq over a grid of parameters from the linearized model
+
+    The timing model is linearized about the parameters in ftr, which
+    should be the result of a fit: one design matrix, including the grid
+    parameters, is computed there. The chi-squared, minimized over all the
+    other free parameters, is then a quadratic function of the grid
+    parameters whose coefficients come from one Cholesky factorization of
+    the normal matrix of the other parameters, so the whole grid costs
+    about as much as one fit.
+
+    For a `pint.fitter.GLSFitter`, the correlated noise (ECORR, red noise)
+    is included through its basis and weights, as in the fit; otherwise
+    only the (scaled) TOA uncertainties are used.
+
+    The result is exact for parameters the model depends on linearly and
+    a good approximation near the best fit. Points where it is within refit
+    of its minimum can be recomputed with full fits, as in
+    :func:`grid_chisq_nd`.
+
+    Parameters
+    ----------
+    ftr
+        The base fitter to use, after fitting.
+    parnames : list of str
+        Names of the parameters to grid over
+    parvalues : list of array or Quantity
+        The values of each parameter
+    refit : float, optional
+        Refit exactly the points where the linearized chisq is less than
+        refit above its minimum
+    ncpu : int, optional
+        Number of processes to use for refitting (see :func:`grid_chisq_nd`)
+    printprogress : bool, optional
+        Log the progress of the refits
+    fitargs
+        Passed on to ``ftr.fit_toas`` for refitting
+
+    Returns
+    -------
+    array
+        chisq values, with one axis for each parameter, as for
+        :func:`grid_chisq_nd`
+    """
+    parnames = list(parnames)
+    model = copy.deepcopy(ftr.model)
+    for name in parnames:
+        getattr(model, name).frozen = False
+    M, params, units, scale_by_F0 = model.designmatrix(ftr.toas)
+    residuals = ftr.resids.time_resids.to_value(u.s)
+    Nvec = model.scaled_toa_uncertainty(ftr.toas).to_value(u.s) ** 2
+    phiinv = np.zeros(M.shape[1])
+    if isinstance(ftr, GLSFitter):
+        Mn = model.noise_model_designmatrix(ftr.toas)
+        phi = model.noise_model_basis_weight(ftr.toas)
+        if Mn is not None and phi is not None:
+            M = np.hstack((M, Mn))
+            phiinv = np.concatenate((phiinv, 1 / phi))
+    norm = np.sqrt(np.sum(M ** 2, axis=0))
+    norm[len(params) :] = 1
+    M /= norm
+
+    # The linearized chisq is
+    #   (r - M x)^T N^-1 (r - M x) + x^T phiinv x
+    # Minimizing over the parameters f that are not gridded, for given
+    # offsets xg of the grid parameters g, leaves
+    #   chi2(xg) = c0 - 2 h^T xg + xg^T S xg
+    # with A = M^T N^-1 M + phiinv, b = M^T N^-1 r,
+    #   S = A_gg - A_gf A_ff^-1 A_fg, h = b_g - A_gf A_ff^-1 b_f,
+    #   c0 = r^T N^-1 r - b_f^T A_ff^-1 b_f
+    A = np.dot(M.T, M / Nvec[:, None]) + np.diag(phiinv)
+    b = np.dot(M.T, residuals / Nvec)
+    g = [params.index(name) for name in parnames]
+    f = [ii for ii in range(M.shape[1]) if ii not in g]
+    cf = sl.cho_factor(A[np.ix_(f, f)])
+    K = sl.cho_solve(cf, np.column_stack([A[np.ix_(f, g)], b[f]]))
+    S = A[np.ix_(g, g)] - np.dot(A[np.ix_(g, f)], K[:, :-1])
+    h = b[g] - np.dot(A[np.ix_(g, f)], K[:, -1])
+    c0 = np.dot(residuals, residuals / Nvec) - np.dot(b[f], K[:, -1])
+
+    offsets = []
+    for name, values, ii in zip(parnames, parvalues, g):
+        par = getattr(model, name)
+        dx = (u.Quantity(values, par.units) - par.quantity).to_value(par.units)
+        offsets.append(np.asarray(dx, dtype=float) * norm[ii])
+    x = np.stack(np.meshgrid(*offsets, indexing="ij"), axis=-1)
+    chi2 = c0 - 2 * np.dot(x, h) + np.einsum("...i,ij,...j->...", x, S, x)
+
+    if refit is not None:
+        near = np.argwhere(chi2 <= chi2.min() + refit)
+        items = [
+            (
+                tuple(index),
+                [v[i] for v, i in zip(parvalues[:-1], index[:-1])],
+                parvalues[-1][index[-1] : index[-1] + 1],
+                False,
+            )
+            for index in near
+        ]
+        step = max(len(items) // 10, 1)
+        for ndone, (index, line) in enumerate(
+            _grid_run(ftr, parnames, items, ncpu, fitargs), start=1
+        ):
+            chi2[index] = line[0]
+            if printprogress and (ndone % step == 0 or ndone == len(items)):
+                log.info("Refitted {} of {} grid points".format(ndone, len(items)))
+    return chi2
 
 
 def grid_chisq_mp(ftr, par1_name, par1_grid, par2_name, par2_grid, ncpu=None):
     """Compute chisq over a grid of two parameters, multiprocessing version
     
     Use Python's multiprocessing package to do a parallel computation of 
-    chisq over 2-D grid of parameters.
+    chisq over 2-D grid of parameters. See :func:`grid_chisq_nd`.
 
     Parameters
     ----------
@@ -55,55 +290,16 @@ def grid_chisq_mp(ftr, par1_name, par1_grid, par2_name, par2_grid, ncpu=None):
     -------
     array : 2-D array of chisq values with par1 varying in columns and par2 varying in rows
     """
-
-    if ncpu is None:
-        # Use al available CPUs
-        ncpu = multiprocessing.cpu_count()
-
-    # Instantiate a Queue for getting return values from the worker processes
-    q = Queue()
-
-    chi2 = np.zeros((len(par1_grid), len(par2_grid)))
-    # First create all the processes and put them in a list
-    processes = []
-    # Want par1 on X-axis and par2 on y-axis
-    for ii, par1 in enumerate(par1_grid):
-        # ii indexes rows, now for have each column done by a different process
-        proc = Process(
-            target=_grid_docol, args=(ftr, par1_name, par1, par2_name, par2_grid, ii, q)
-        )
-        processes.append(proc)
-
-    # Now consume the list of processes by starting up to ncpu processes at a time
-    while len(processes):
-        # Start up to ncpu processes
-        started = []
-        for cpunum in range(ncpu):
-            if len(processes):
-                proc = processes.pop()
-                proc.start()
-                started.append(proc)
-        # Collect all the results from the started processes
-        for proc in started * len(par2_grid):
-            ii, jj, ch = q.get()
-            # Array index here is rownum, colnum so translates to y, x
-            chi2[jj, ii] = ch
-
-        # Now join each of those that are done to close them out
-        # This will be inefficient if the processes have large differences in runtime, since there
-        # is a synchronization point. In this case it should not be a problem.
-        for proc in started:
-            proc.join()
-            print("|", end="")
-        print("")
-
-    return chi2
+    return grid_chisq_nd(
+        ftr, [par1_name, par2_name], [par1_grid, par2_grid], ncpu=ncpu
+    ).T
 
 
 def grid_chisq(ftr, par1_name, par1_grid, par2_name, par2_grid):
     """Compute chisq over a grid of two parameters, serial version
     
     Single-threaded computation of chisq over 2-D grid of parameters.
+    See :func:`grid_chisq_nd`.
 
     Parameters
     ----------
@@ -123,32 +319,7 @@ def grid_chisq(ftr, par1_name, par1_grid, par2_name, par2_grid):
     array : 2-D array of chisq values with par1 varying in columns and par2 varying in rows
     
     """
-
-    # Save the current model so we can tweak it for gridding, then restore it at the end
-    savemod = ftr.model
-    gridmod = copy.deepcopy(ftr.model)
-    ftr.model = gridmod
-
-    # Freeze the two params we are going to grid over
-    getattr(ftr.model, par1_name).frozen = True
-    getattr(ftr.model, par2_name).frozen = True
-
-    # All other unfrozen parameters will be fitted for at each grid point
-
-    chi2 = np.zeros((len(par1_grid), len(par2_grid)))
-    # Want par1 on X-axis and par2 on y-axis
-    for ii, par1 in enumerate(par1_grid):
-        getattr(ftr.model, par1_name).quantity = par1
-        for jj, par2 in enumerate(par2_grid):
-            getattr(ftr.model, par2_name).quantity = par2
-            # Array index here is rownum, colnum so translates to y, x
-            chi2[jj, ii] = ftr.fit_toas()
-            print(".", end="")
-        print("")
-
-    # Restore saved model
-    ftr.model = savemod
-    return chi2
+    return grid_chisq_nd(ftr, [par1_name, par2_name], [par1_grid, par2_grid]).T
 
 
 def plot_grid_chisq(
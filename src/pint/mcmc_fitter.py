@@ -15,6 +15,7 @@ from pint.residuals import Residuals
 from pint.templates.lctemplate import LCTemplate
 
 __all__ = [
+    "PhaseSurrogate",
     "MCMCFitter",
     "MCMCFitterAnalyticTemplate",
     "MCMCFitterBinnedTemplate",
@@ -61,7 +62,10 @@ def lnlikelihood_basic(ftr, theta):
     Assumes that the phase is the last parmameter in the parameter list
     """
     ftr.set_parameters(theta)
-    phases = ftr.get_event_phases()
+    if ftr.surrogate is not None:
+        phases = ftr.get_surrogate_phases(theta)
+    else:
+        phases = ftr.get_event_phases()
     phss = phases.astype(np.float64)
 
     phss[phss < 0] += 1.0
@@ -105,6 +109,199 @@ def set_priors_basic(ftr, priorerrfact=10.0):
     ftr.priors_set = True
 
 
+class PhaseSurrogate(object):
+    """Fast approximation to the pulse phases of a set of TOAs.
+
+    Computing exact phases for every likelihood evaluation of an MCMC run is
+    slow when there are many TOAs, as for photon data. This class expands the
+    phases about a reference set of parameter values (the linearization
+    point) to first or second order in the parameter offsets, so that the
+    phases for new parameter values are a single matrix-vector product.
+
+    Every ``check_interval`` calls to :meth:`phases`, the expansion is
+    compared with exact phases; if the largest difference is more than
+    ``tolerance`` cycles, the expansion is recomputed about the best point
+    passed in (or about the current point).
+
+    Parameters
+    ----------
+    model : pint.models.timing_model.TimingModel
+        The model; its parameters are changed when exact phases are computed.
+    toas : pint.toa.TOAs
+    params : list of str
+        The names of the parameters to expand in.
+    order : int
+        1 for a linear expansion, 2 to include the second derivatives. The
+        second-order expansion needs ``len(params) * (len(params) + 3) / 2``
+        values per TOA.
+    steps : array-like, optional
+        Steps for the finite differences used to compute the second
+        derivatives, in the units of each parameter. Defaults to the
+        parameter uncertainties.
+    check_interval : int
+        Number of calls between accuracy checks; 0 disables them.
+    tolerance : float
+        Largest acceptable phase error, in cycles.
+    """
+
+    def __init__(
+        self,
+        model,
+        toas,
+        params,
+        order=1,
+        steps=None,
+        check_interval=1000,
+        tolerance=1e-3,
+    ):
+        if order not in (1, 2):
+            raise ValueError("Expansion order must be 1 or 2, not %s" % order)
+        self.model = model
+        self.toas = toas
+        self.params = list(params)
+        self.order = order
+        if steps is None:
+            steps = []
+            for p in self.params:
+                par = getattr(model, p)
+                err = par.uncertainty_value
+                if err is None or err == 0:
+                    err = 1e-6 * abs(par.value) if par.value else 1e-6
+                steps.append(err)
+        self.steps = np.asarray(steps, dtype=float)
+        self.check_interval = check_interval
+        self.tolerance = tolerance
+        self.ncalls = 0
+        self.nlinearize = 0
+        self.last_error = None
+        self.linearize()
+
+    def _get_values(self):
+        return np.array(
+            [getattr(self.model, p).value for p in self.params], dtype=np.longdouble
+        )
+
+    def _set_values(self, values):
+        self.model.set_param_values(dict(zip(self.params, values)))
+
+    def _derivatives(self):
+        """Return the phase derivatives at the current parameter values.
+
+        The result is an (ntoas, nparams) array, in cycles per unit of each
+        parameter.
+        """
+        delay = self.model.delay(self.toas)
+        derivs = self.model.d_phase_d_params(self.toas, delay, self.params)
+        D = np.empty((self.toas.ntoas, len(self.params)))
+        for ii, p in enumerate(self.params):
+            D[:, ii] = derivs[p].to_value(
+                u.Unit("") / getattr(self.model, p).units,
+                equivalencies=u.dimensionless_angles(),
+            )
+        return D
+
+    def linearize(self, values=None):
+        """Compute the expansion about values (by default, the model values)."""
+        if values is not None:
+            self._set_values(values)
+        self.values0 = self._get_values()
+        self.phase0 = self.model.phase(self.toas)
+        self.frac0 = np.asarray(self.phase0.frac.value, dtype=float)
+        D = self._derivatives()
+        if self.order == 2:
+            # Second derivatives by central differences of the first ones
+            nparams = len(self.params)
+            H = np.empty((self.toas.ntoas, nparams, nparams))
+            for jj, h in enumerate(self.steps):
+                values = self.values0.copy()
+                values[jj] += h
+                self._set_values(values)
+                Dp = self._derivatives()
+                values[jj] -= 2 * h
+                self._set_values(values)
+                Dm = self._derivatives()
+                H[:, :, jj] = (Dp - Dm) / (2 * h)
+            self._set_values(self.values0)
+            H = 0.5 * (H + H.transpose(0, 2, 1))
+            ii, jj = np.triu_indices(nparams)
+            # Each off-diagonal term appears twice in the expansion
+            weights = np.where(ii == jj, 0.5, 1.0)
+            self._pairs = (ii, jj)
+            D = np.hstack([D, H[:, ii, jj] * weights])
+        self.matrix = np.ascontiguousarray(D)
+        self.nlinearize += 1
+
+    def _terms(self, values):
+        dp = (np.asarray(values, dtype=np.longdouble) - self.values0).astype(float)
+        if self.order == 2:
+            ii, jj = self._pairs
+            dp = np.concatenate([dp, dp[ii] * dp[jj]])
+        return dp
+
+    def delta_phase(self, values):
+        """Approximate phase change from the linearization point, in cycles."""
+        return self.matrix.dot(self._terms(values))
+
+    def exact_delta_phase(self, values):
+        """Exact phase change from the linearization point, in cycles.
+
+        This leaves the model parameters set to values.
+        """
+        self._set_values(values)
+        dphase = self.model.phase(self.toas) - self.phase0
+        return (dphase.int.value + dphase.frac.value).astype(float)
+
+    def max_error(self, values):
+        """Largest difference between approximate and exact phases, in cycles.
+
+        This leaves the model parameters set to values.
+        """
+        self.last_error = np.abs(
+            self.exact_delta_phase(values) - self.delta_phase(values)
+        ).max()
+        return self.last_error
+
+    def check(self, values, best=None):
+        """Check the accuracy at values and recompute the expansion if needed.
+
+        If the error is more than the tolerance, the expansion is recomputed
+        about best, if given, or else about values. This leaves the model
+        parameters set to values.
+
+        Returns
+        -------
+        bool
+            True if the expansion was recomputed.
+        """
+        err = self.max_error(values)
+        if err <= self.tolerance:
+            return False
+        center = values if best is None else best
+        log.info(
+            "Phase expansion error %g cycles exceeds %g; recomputing it"
+            % (err, self.tolerance)
+        )
+        self.linearize(center)
+        err = self.max_error(values)
+        if err > self.tolerance:
+            log.warning(
+                "Phase expansion error is still %g cycles after recomputing it; "
+                "consider a higher order or more frequent checks" % err
+            )
+        return True
+
+    def phases(self, values, best=None):
+        """Return approximate pulse phases in [0, 1) for parameter values.
+
+        best, if given, is the point to recompute the expansion about if the
+        periodic accuracy check fails.
+        """
+        self.ncalls += 1
+        if self.check_interval and self.ncalls % self.check_interval == 0:
+            self.check(values, best=best)
+        return np.mod(self.frac0 + self.delta_phase(values), 1.0)
+
+
 class MCMCFitter(Fitter):
     """A class for Markov-Chain Monte Carlo optimization style-fitting
 
@@ -175,6 +372,7 @@ class MCMCFitter(Fitter):
         self.maxpost = -np.inf
         self.maxpost_fitvals = self.fitvals
         self.priors_set = False
+        self.surrogate = None
 
     def set_template(self, template):
         """
@@ -279,6 +477,35 @@ class MCMCFitter(Fitter):
         # ensure all positive
         return np.where(phases < 0.0, phases + 1.0, phases)
 
+    def use_surrogate(self, order=1, check_interval=1000, tolerance=1e-3):
+        """Use approximate phases in the likelihood, for speed.
+
+        The phases are expanded about the current model parameters with a
+        :class:`PhaseSurrogate`, using the parameter uncertainties as the
+        finite-difference steps. Pass order=0 to go back to exact phases.
+        """
+        if order == 0:
+            self.surrogate = None
+            return
+        self.surrogate = PhaseSurrogate(
+            self.model,
+            self.toas,
+            self.fitkeys,
+            order=order,
+            steps=np.where(self.fiterrs > 0, self.fiterrs, 1e-6),
+            check_interval=check_interval,
+            tolerance=tolerance,
+        )
+
+    def get_surrogate_phases(self, theta):
+        """
+        Return approximate pulse phases for theta from the surrogate
+        """
+        return self.surrogate.phases(
+            self.get_model_parameters(theta),
+            best=self.get_model_parameters(self.maxpost_fitvals),
+        )
+
     def lnposterior(self, theta):
         """
         The log posterior (priors * likelihood)
@@ -347,7 +574,13 @@ class MCMCFitter(Fitter):
         self.sampler.initialize_sampler(self.lnposterior, self.n_fit_params)
 
         # Run sampler for some number of iterations
-        self.sampler.run_mcmc(pos, maxiter)
+        with self.model.kepler_warm_start():
+            self.sampler.run_mcmc(pos, maxiter)
+        # The posterior may have been evaluated in other processes
+        lnpost, theta = self.sampler.get_max_posterior()
+        if lnpost > self.maxpost:
+            self.maxpost = lnpost
+            self.maxpost_fitvals = theta
 
         # Process results and get chi2 for new parameters
         self.set_params(dict(zip(self.fitkeys, self.maxpost_fitvals)))
@@ -591,6 +824,7 @@ class CompositeMCMCFitter(MCMCFitter):
         self.maxpost_fitvals = self.fitvals
         self.priors_set = False
         self.use_resids = False
+        self.surrogate = None
 
     def clip_template_params(self, pos):
         return pos
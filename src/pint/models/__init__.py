@@ -30,7 +30,7 @@ from pint.models.glitch import Glitch
 from pint.models.ifunc import IFunc
 from pint.models.jump import DelayJump, PhaseJump
 from pint.models.model_builder import get_model
-from pint.models.noise_model import EcorrNoise, PLRedNoise, ScaleToaError
+from pint.models.noise_model import EcorrNoise, PLDMNoise, PLRedNoise, ScaleToaError
 from pint.models.solar_system_shapiro import SolarSystemShapiro
 from pint.models.solar_wind_dispersion import SolarWindDispersion
 from pint.models.spindown import Spindown
@@ -46,6 +46,8 @@ class Astrometry(DelayComponent):
 
         self.delay_funcs_component += [self.solar_system_geometric_delay]
         self.register_deriv_funcs(self.d_delay_astrometry_d_PX, "PX")
+        # Quantities shared by the derivatives during d_delay_d_params
+        self._d_delay_quantities = None
 
     def setup(self):
         super(Astrometry, self).setup()
@@ -93,14 +95,26 @@ class Astrometry(DelayComponent):
             delay += (0.5 * (re_sqr / L) * (1.0 - re_dot_L ** 2 / re_sqr)).to(ls).value
         return delay * u.second
 
+    def d_delay_d_params(self, toas, params, acc_delay=None):
+        """Derivatives of the astrometric delay for several parameters.
+
+        The quantities from `get_d_delay_quantities` are computed only once
+        for all the parameters.
+        """
+        self._d_delay_quantities = {}
+        try:
+            return super(Astrometry, self).d_delay_d_params(toas, params, acc_delay)
+        finally:
+            self._d_delay_quantities = None
+
     def get_d_delay_quantities(self, toas):
         """Calculate values needed for many d_delay_d_param functions """
+        shared = self._d_delay_quantities
+        if shared is not None and "icrs" in shared:
+            return shared["icrs"]
         # TODO: Move all these calculations in a separate class for elegance
         rd = dict()
 
-        # TODO: Should delay not have units of u.second?
-        delay = self.delay(toas)
-
         # TODO: tbl['tdbld'].quantity should have units of u.day
         # NOTE: Do we need to include the delay here?
         tbl = toas.table
@@ -122,6 +136,8 @@ class Astrometry(DelayComponent):
         rd["earth_dec"] = numpy.arctan2(rd["ssb_obs_z"], rd["ssb_obs_xy"])
         rd["earth_ra"] = numpy.arctan2(rd["ssb_obs_y"], rd["ssb_obs_x"])
 
+        if shared is not None:
+            shared["icrs"] = rd
         return rd
 
     def get_params_as_ICRS(self):
@@ -596,6 +612,9 @@ class AstrometryEcliptic(Astrometry):
 
     def get_d_delay_quantities_ecliptical(self, toas):
         """Calculate values needed for many d_delay_d_param functions """
+        shared = self._d_delay_quantities
+        if shared is not None and "ecliptical" in shared:
+            return shared["ecliptical"]
         # TODO: Move all these calculations in a separate class for elegance
         rd = dict()
         # From the earth_ra dec to earth_elong and elat
@@ -607,12 +626,14 @@ class AstrometryEcliptic(Astrometry):
                 "Check your pint/datafile/ecliptic.dat file."
             )
 
-        rd = self.get_d_delay_quantities(toas)
+        rd = dict(self.get_d_delay_quantities(toas))
         coords_icrs = coords.ICRS(ra=rd["earth_ra"], dec=rd["earth_dec"])
         coords_elpt = coords_icrs.transform_to(PulsarEcliptic(obliquity=obliquity))
         rd["earth_elong"] = coords_elpt.lon
         rd["earth_elat"] = coords_elpt.lat
 
+        if shared is not None:
+            shared["ecliptical"] = rd
         return rd
 
     def get_params_as_ICRS(self):
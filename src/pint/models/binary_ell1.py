@@ -285,3 +285,5 @@ class BinaryELL1H(BinaryELL1Base):
         if self.STIGMA.quantity is not None:
             self.binary_instance.fit_params = ["H3", "STIGMA"]
             self.binary_instance.ds_func = self.binary_instance.delayS_H3_STIGMA_exact
+        # The Shapiro delay function may have changed
+        self.binary_instance.clear_cache()
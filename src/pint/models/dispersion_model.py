@@ -1,10 +1,12 @@
 """A simple model of a base dispersion delay and DMX dispersion."""
 from __future__ import absolute_import, division, print_function
 
+from collections import namedtuple
 from warnings import warn
 
 import numpy as np
 import astropy.units as u
+import scipy.sparse
 from astropy.table import Table
 from astropy.time import Time
 from pint.models.parameter import (
@@ -14,13 +16,19 @@ from pint.models.parameter import (
     maskParameter,
 )
 from pint.models.timing_model import DelayComponent, MissingParameter
-from pint.toa_select import TOASelect
 from pint.utils import split_prefixed_name, taylor_horner, taylor_horner_deriv
 
 # This value is cited from Duncan Lorimer, Michael Kramer, Handbook of Pulsar
 # Astronomy, Second edition, Page 86, Note 1
 DMconst = 1.0 / 2.41e-4 * u.MHz * u.MHz * u.s * u.cm ** 3 / u.pc
 
+#: The TOAs in each DMX bin, as returned by :func:`DispersionDMX.get_dmx_index`.
+#: ``names`` lists the DMX parameters, ``bin_toas`` maps each of them to the
+#: (sorted) indices of the TOAs in its range, and ``toa_bin`` gives for each
+#: TOA the position in ``names`` of its bin, or -1 if it is in none (if ranges
+#: overlap, the last matching bin).
+DMXIndex = namedtuple("DMXIndex", "names bin_toas toa_bin")
+
 
 class Dispersion(DelayComponent):
     """A base dispersion timing model."""
@@ -390,26 +398,61 @@ class DispersionDMX(Dispersion):
             errorMsg += "Please check your prefixed parameters."
             raise AttributeError(errorMsg)
 
-    def dmx_dm(self, toas):
-        condition = {}
-        tbl = toas.table
-        if not hasattr(self, "dmx_toas_selector"):
-            self.dmx_toas_selector = TOASelect(is_range=True)
+    def get_dmx_index(self, toas):
+        """Find the TOAs in each DMX range.
+
+        The TOAs are sorted by ``mjd_float`` once and each range is located
+        with a binary search, so the cost does not grow with the product of
+        the numbers of TOAs and of DMX ranges. The result is cached until the
+        TOAs or the DMX ranges change.
+
+        Parameters
+        ----------
+        toas : `pint.toa.TOAs` object
+
+        Returns
+        -------
+        DMXIndex
+        """
         DMX_mapping = self.get_prefix_mapping_component("DMX_")
         DMXR1_mapping = self.get_prefix_mapping_component("DMXR1_")
         DMXR2_mapping = self.get_prefix_mapping_component("DMXR2_")
-        for epoch_ind in DMX_mapping.keys():
-            r1 = getattr(self, DMXR1_mapping[epoch_ind]).quantity
-            r2 = getattr(self, DMXR2_mapping[epoch_ind]).quantity
-            condition[DMX_mapping[epoch_ind]] = (r1.mjd, r2.mjd)
-        select_idx = self.dmx_toas_selector.get_select_index(
-            condition, tbl["mjd_float"]
-        )
-        # Get DMX delays
-        dm = np.zeros(len(tbl)) * self.DM.units
-        for k, v in select_idx.items():
-            dm[v] = getattr(self, k).quantity
-        return dm
+        names = [DMX_mapping[epoch_ind] for epoch_ind in DMX_mapping.keys()]
+        r1 = [
+            getattr(self, DMXR1_mapping[epoch_ind]).quantity.mjd
+            for epoch_ind in DMX_mapping.keys()
+        ]
+        r2 = [
+            getattr(self, DMXR2_mapping[epoch_ind]).quantity.mjd
+            for epoch_ind in DMX_mapping.keys()
+        ]
+        cache = toas.selection_cache
+        cache_key = ("DMX", tuple(names), tuple(r1), tuple(r2))
+        if cache_key not in cache:
+            mjds = np.asarray(toas.table["mjd_float"])
+            order = np.argsort(mjds, kind="mergesort")
+            sorted_mjds = mjds[order]
+            # Ranges include both of their ends
+            start = np.searchsorted(sorted_mjds, r1, side="left")
+            end = np.searchsorted(sorted_mjds, r2, side="right")
+            bin_toas = {}
+            toa_bin = np.full(len(mjds), -1)
+            for ii, name in enumerate(names):
+                idx = np.sort(order[start[ii] : end[ii]])
+                idx.flags.writeable = False
+                bin_toas[name] = idx
+                toa_bin[idx] = ii
+            toa_bin.flags.writeable = False
+            cache[cache_key] = DMXIndex(names, bin_toas, toa_bin)
+        return cache[cache_key]
+
+    def dmx_dm(self, toas):
+        index = self.get_dmx_index(toas)
+        # The last entry is for TOAs outside all DMX ranges
+        dmx = np.zeros(len(index.names) + 1)
+        for ii, name in enumerate(index.names):
+            dmx[ii] = getattr(self, name).quantity.to_value(self.DM.units)
+        return dmx[index.toa_bin] * self.DM.units
 
     def DMX_dispersion_delay(self, toas, acc_delay=None):
         """ This is a wrapper function for interacting with the TimingModel class
@@ -417,30 +460,60 @@ class DispersionDMX(Dispersion):
         return self.dispersion_type_delay(toas)
 
     def d_dm_d_DMX(self, toas, param_name, acc_delay=None):
-        condition = {}
-        tbl = toas.table
-        if not hasattr(self, "dmx_toas_selector"):
-            self.dmx_toas_selector = TOASelect(is_range=True)
-        param = getattr(self, param_name)
-        dmx_index = param.index
-        DMXR1_mapping = self.get_prefix_mapping_component("DMXR1_")
-        DMXR2_mapping = self.get_prefix_mapping_component("DMXR2_")
-        r1 = getattr(self, DMXR1_mapping[dmx_index]).quantity
-        r2 = getattr(self, DMXR2_mapping[dmx_index]).quantity
-        condition = {param_name: (r1.mjd, r2.mjd)}
-        select_idx = self.dmx_toas_selector.get_select_index(
-            condition, tbl["mjd_float"]
+        dmx = np.zeros(toas.ntoas)
+        dmx[self.get_dmx_index(toas).bin_toas[param_name]] = 1.0
+        return dmx * (u.pc / u.cm ** 3) / (u.pc / u.cm ** 3)
+
+    def d_dm_d_DMX_matrix(self, toas):
+        """Derivatives of the DM with respect to all DMX parameters.
+
+        Parameters
+        ----------
+        toas : `pint.toa.TOAs` object
+
+        Returns
+        -------
+        matrix : scipy.sparse.csc_matrix
+            An (ntoas, ndmx) matrix that is 1 where the TOA is in the DMX
+            range and 0 elsewhere.
+        names : list of str
+            The DMX parameter for each column.
+        """
+        index = self.get_dmx_index(toas)
+        rows = [index.bin_toas[name] for name in index.names]
+        indptr = np.concatenate(([0], np.cumsum([len(r) for r in rows])))
+        indices = np.concatenate(rows) if rows else np.zeros(0, dtype=int)
+        matrix = scipy.sparse.csc_matrix(
+            (np.ones(len(indices)), indices, indptr),
+            shape=(toas.ntoas, len(index.names)),
         )
+        return matrix, list(index.names)
 
+    def d_delay_d_DMX_matrix(self, toas):
+        """Derivatives of the delay with respect to all DMX parameters.
+
+        This is the DMX block of the design matrix, which is mostly zeros.
+
+        Parameters
+        ----------
+        toas : `pint.toa.TOAs` object
+
+        Returns
+        -------
+        matrix : scipy.sparse.csc_matrix
+            An (ntoas, ndmx) matrix of derivatives, in s / (pc cm^-3).
+        names : list of str
+            The DMX parameter for each column.
+        """
         try:
             bfreq = self.barycentric_radio_freq(toas)
         except AttributeError:
             warn("Using topocentric frequency for dedispersion!")
-            bfreq = tbl["freq"]
-        dmx = np.zeros(len(tbl))
-        for k, v in select_idx.items():
-            dmx[v] = 1.0
-        return dmx * (u.pc / u.cm ** 3) / (u.pc / u.cm ** 3)
+            bfreq = toas.table["freq"]
+        scale = (DMconst / bfreq ** 2.0).to_value(u.s / (u.pc / u.cm ** 3))
+        matrix, names = self.d_dm_d_DMX_matrix(toas)
+        matrix.data = matrix.data * scale[matrix.indices]
+        return matrix, names
 
     def print_par(self,):
         result = ""
@@ -216,104 +216,109 @@ class Glitch(PhaseComponent):
         affected = np.where(dt > 0.0)[0]
         return tbl, p, ids, idv, dt, affected
 
-    def d_phase_d_GLPH(self, toas, param, delay):
-        """Calculate the derivative wrt GLPH"""
+    def glitch_deriv(self, param, dt):
+        """Phase derivative wrt a glitch parameter for the TOAs after the glitch.
+
+        dt is the time since the glitch epoch of the affected TOAs, as
+        returned by :meth:`deriv_prep`; before the epoch the derivatives
+        are zero.
+        """
+        p, ids, idv = split_prefixed_name(param)
+        par = getattr(self, param)
+        if p == "GLPH_":
+            deriv = np.ones(len(dt), dtype=np.longdouble) / par.units
+        elif p == "GLF0_":
+            deriv = dt
+        elif p == "GLF1_":
+            deriv = np.longdouble(0.5) * dt * dt
+        elif p == "GLF2_":
+            deriv = np.longdouble(1.0) / 6.0 * dt * dt * dt
+        elif p == "GLF0D_":
+            tau = getattr(self, "GLTD_%d" % idv).quantity
+            deriv = tau * (np.longdouble(1.0) - np.exp(-dt / tau))
+        elif p == "GLTD_":
+            if par.value == 0.0:
+                return np.zeros(len(dt), dtype=np.longdouble) / par.units
+            glf0d = getattr(self, "GLF0D_" + ids).quantity
+            tau = par.quantity
+            deriv = glf0d * (np.longdouble(1.0) - np.exp(-dt / tau)) + glf0d * tau * (
+                -np.exp(-dt / tau)
+            ) * dt / (tau * tau)
+        elif p == "GLEP_":
+            glf0 = getattr(self, "GLF0_" + ids).quantity
+            glf1 = getattr(self, "GLF1_" + ids).quantity
+            glf2 = getattr(self, "GLF2_" + ids).quantity
+            glf0d = getattr(self, "GLF0D_" + ids).quantity
+            tau = getattr(self, "GLTD_" + ids).quantity
+            deriv = -glf0 + -glf1 * dt + -0.5 * glf2 * dt ** 2
+            if tau.value != 0.0:
+                deriv = deriv + -glf0d / np.exp(dt / tau)
+        else:
+            raise ValueError("%s is not a glitch parameter." % param)
+        return deriv.to(1 / par.units)
+
+    def d_phase_d_params_sparse(self, toas, params, delay):
+        """Nonzero entries of the phase derivatives for glitch parameters.
+
+        The derivatives are zero before the glitch epoch, so they are only
+        evaluated for the TOAs after it, which are found once per glitch.
+
+        Returns
+        -------
+        dict
+            For each parameter, the indices of the affected TOAs and the
+            derivative for those TOAs.
+        """
+        result = {}
+        glitches = {}
+        for param in params:
+            p, ids, idv = split_prefixed_name(param)
+            if p not in self.glitch_prop:
+                continue
+            if ids not in glitches:
+                tbl, p, ids, idv, dt, affected = self.deriv_prep(toas, param, delay)
+                glitches[ids] = (affected, dt[affected])
+            affected, dt = glitches[ids]
+            result[param] = (affected, self.glitch_deriv(param, dt))
+        return result
+
+    def glitch_deriv_dense(self, toas, param, delay, prefix):
+        """Phase derivative wrt a glitch parameter for all TOAs."""
         tbl, p, ids, idv, dt, affected = self.deriv_prep(toas, param, delay)
-        if p != "GLPH_":
+        if p != prefix:
             raise ValueError(
-                "Can not calculate d_phase_d_GLPH with respect to %s." % param
+                "Can not calculate d_phase_d_%s with respect to %s."
+                % (prefix[:-1], param)
             )
-        par_GLPH = getattr(self, param)
-        dpdGLPH = np.zeros(len(tbl), dtype=np.longdouble) / par_GLPH.units
-        dpdGLPH[affected] += 1.0 / par_GLPH.units
-        return dpdGLPH
+        par = getattr(self, param)
+        deriv = np.zeros(len(tbl), dtype=np.longdouble) / par.units
+        deriv[affected] = self.glitch_deriv(param, dt[affected])
+        return deriv
+
+    def d_phase_d_GLPH(self, toas, param, delay):
+        """Calculate the derivative wrt GLPH"""
+        return self.glitch_deriv_dense(toas, param, delay, "GLPH_")
 
     def d_phase_d_GLF0(self, toas, param, delay):
         """Calculate the derivative wrt GLF0"""
-        tbl, p, ids, idv, dt, affected = self.deriv_prep(toas, param, delay)
-        if p != "GLF0_":
-            raise ValueError(
-                "Can not calculate d_phase_d_GLF0 with respect to %s." % param
-            )
-        par_GLF0 = getattr(self, param)
-        dpdGLF0 = np.zeros(len(tbl), dtype=np.longdouble) / par_GLF0.units
-        dpdGLF0[affected] = dt[affected]
-        return dpdGLF0
+        return self.glitch_deriv_dense(toas, param, delay, "GLF0_")
 
     def d_phase_d_GLF1(self, toas, param, delay):
         """Calculate the derivative wrt GLF1"""
-        tbl, p, ids, idv, dt, affected = self.deriv_prep(toas, param, delay)
-        if p != "GLF1_":
-            raise ValueError(
-                "Can not calculate d_phase_d_GLF1 with respect to %s." % param
-            )
-        par_GLF1 = getattr(self, param)
-        dpdGLF1 = np.zeros(len(tbl), dtype=np.longdouble) / par_GLF1.units
-        dpdGLF1[affected] += np.longdouble(0.5) * dt[affected] * dt[affected]
-        return dpdGLF1
+        return self.glitch_deriv_dense(toas, param, delay, "GLF1_")
 
     def d_phase_d_GLF2(self, toas, param, delay):
-        """Calculate the derivative wrt GLF1"""
-        tbl, p, ids, idv, dt, affected = self.deriv_prep(toas, param, delay)
-        if p != "GLF2_":
-            raise ValueError(
-                "Can not calculate d_phase_d_GLF2 with respect to %s." % param
-            )
-        par_GLF2 = getattr(self, param)
-        dpdGLF2 = np.zeros(len(tbl), dtype=np.longdouble) / par_GLF2.units
-        dpdGLF2[affected] += (
-            np.longdouble(1.0) / 6.0 * dt[affected] * dt[affected] * dt[affected]
-        )
-        return dpdGLF2
+        """Calculate the derivative wrt GLF2"""
+        return self.glitch_deriv_dense(toas, param, delay, "GLF2_")
 
     def d_phase_d_GLF0D(self, toas, param, delay):
         """Calculate the derivative wrt GLF0D"""
-        tbl, p, ids, idv, dt, affected = self.deriv_prep(toas, param, delay)
-        if p != "GLF0D_":
-            raise ValueError(
-                "Can not calculate d_phase_d_GLF0D with respect to %s." % param
-            )
-        par_GLF0D = getattr(self, param)
-        tau = getattr(self, "GLTD_%d" % idv).quantity
-        dpdGLF0D = np.zeros(len(tbl), dtype=np.longdouble) / par_GLF0D.units
-        dpdGLF0D[affected] += tau * (np.longdouble(1.0) - np.exp(-dt[affected] / tau))
-        return dpdGLF0D
+        return self.glitch_deriv_dense(toas, param, delay, "GLF0D_")
 
     def d_phase_d_GLTD(self, toas, param, delay):
         """Calculate the derivative wrt GLTD"""
-        tbl, p, ids, idv, dt, affected = self.deriv_prep(toas, param, delay)
-        if p != "GLTD_":
-            raise ValueError(
-                "Can not calculate d_phase_d_GLTD with respect to %s." % param
-            )
-        par_GLTD = getattr(self, param)
-        if par_GLTD.value == 0.0:
-            return np.zeros(len(tbl), dtype=np.longdouble) / par_GLTD.units
-        glf0d = getattr(self, "GLF0D_" + ids).quantity
-        tau = par_GLTD.quantity
-        dpdGLTD = np.zeros(len(tbl), dtype=np.longdouble) / par_GLTD.units
-        dpdGLTD[affected] += glf0d * (
-            np.longdouble(1.0) - np.exp(-dt[affected] / tau)
-        ) + glf0d * tau * (-np.exp(-dt[affected] / tau)) * dt[affected] / (tau * tau)
-        return dpdGLTD
+        return self.glitch_deriv_dense(toas, param, delay, "GLTD_")
 
     def d_phase_d_GLEP(self, toas, param, delay):
         """Calculate the derivative wrt GLEP"""
-        tbl, p, ids, idv, dt, affected = self.deriv_prep(toas, param, delay)
-        if p != "GLEP_":
-            raise ValueError(
-                "Can not calculate d_phase_d_GLEP with respect to %s." % param
-            )
-        par_GLEP = getattr(self, param)
-        glf0 = getattr(self, "GLF0_" + ids).quantity
-        glf1 = getattr(self, "GLF1_" + ids).quantity
-        glf2 = getattr(self, "GLF2_" + ids).quantity
-        glf0d = getattr(self, "GLF0D_" + ids).quantity
-        tau = getattr(self, "GLTD_" + ids).quantity
-        dpdGLEP = np.zeros(len(tbl), dtype=np.longdouble) / par_GLEP.units
-        dpdGLEP[affected] += (
-            -glf0 + -glf1 * dt[affected] + -0.5 * glf2 * dt[affected] ** 2
-        )
-        if tau.value != 0.0:
-            dpdGLEP[affected] += -glf0d / np.exp(dt[affected] / tau)
-        return dpdGLEP
+        return self.glitch_deriv_dense(toas, param, delay, "GLEP_")
@@ -125,6 +125,28 @@ class PhaseJump(PhaseComponent):
         d_phase_d_j[mask] = self.F0.value
         return (d_phase_d_j * self.F0.units).to(1 / u.second)
 
+    def d_phase_d_params_sparse(self, toas, params, delay):
+        """Nonzero entries of the phase derivatives for JUMP parameters.
+
+        Returns
+        -------
+        dict
+            For each JUMP, the indices of the TOAs it applies to (as cached by
+            `maskParameter.select_toa_mask`) and the derivative for those
+            TOAs.
+        """
+        d_phase_d_j = (self.F0.value * self.F0.units).to(1 / u.second)
+        result = {}
+        for param in params:
+            if param not in self.jumps:
+                continue
+            rows = getattr(self, param).select_toa_mask(toas)
+            result[param] = (
+                rows,
+                numpy.full(len(rows), d_phase_d_j.value) * d_phase_d_j.unit,
+            )
+        return result
+
     def print_par(self):
         result = ""
         for jump in self.jumps:
@@ -156,19 +156,45 @@ class ScaleToaError(NoiseComponent):
             )
         return pairs
 
+    def efac_equad_index(self, toas):
+        """Return the EFAC/EQUAD pair that applies to each TOA.
+
+        The pairs are numbered in the order of `pair_EFAC_EQUAD`; where
+        several select a TOA, the last one applies. The result is cached in
+        ``toas.selection_cache``, since it depends only on the TOAs and the
+        EFAC/EQUAD keys.
+
+        Returns
+        -------
+        numpy.ndarray
+            The index of the pair for each TOA, -1 for TOAs with no EFAC.
+        """
+        pairs = self.pair_EFAC_EQUAD()
+        cache = toas.selection_cache
+        cache_key = (
+            "EFAC_EQUAD",
+            tuple((efac.key, tuple(efac.key_value)) for efac, equad in pairs),
+        )
+        if cache_key not in cache:
+            index = np.full(toas.ntoas, -1)
+            for ct, (efac, equad) in enumerate(pairs):
+                index[efac.select_toa_mask(toas)] = ct
+            index.flags.writeable = False
+            cache[cache_key] = index
+        return cache[cache_key]
+
     def scale_toa_sigma(self, toas):
-        tbl = toas.table
-        sigma_old = tbl["error"].quantity
-        sigma_scaled = np.zeros_like(sigma_old)
-        EF_EQ_pairs = self.pair_EFAC_EQUAD()
-        for pir in EF_EQ_pairs:
-            efac = pir[0]
-            equad = pir[1]
-            mask = efac.select_toa_mask(toas)
-            sigma_scaled[mask] = efac.quantity * np.sqrt(
-                sigma_old[mask] ** 2 + (equad.quantity) ** 2
-            )
-        return sigma_scaled
+        sigma_old = toas.table["error"].quantity
+        pairs = self.pair_EFAC_EQUAD()
+        index = self.efac_equad_index(toas)
+        # The last entry is for the TOAs with no EFAC (index -1)
+        efacs = np.zeros(len(pairs) + 1)
+        equads = np.zeros(len(pairs) + 1)
+        for ct, (efac, equad) in enumerate(pairs):
+            efacs[ct] = efac.value
+            equads[ct] = equad.quantity.to_value(sigma_old.unit)
+        sigma_scaled = efacs[index] * np.sqrt(sigma_old.value ** 2 + equads[index] ** 2)
+        return sigma_scaled * sigma_old.unit
 
     def sigma_scaled_cov_matrix(self, toas):
         scaled_sigma = self.scale_toa_sigma(toas).to(u.s).value ** 2
@@ -388,6 +414,106 @@ class EcorrNoise(NoiseComponent):
             ecorrs.append(getattr(self, ecorr))
         return ecorrs
 
+    def ecorr_epochs(self, toas):
+        """Return the observing epochs of the ECORR parameters.
+
+        The epochs of all the ECORR parameters are numbered consecutively,
+        in the order of `get_ecorrs`; epochs with a single TOA are dropped.
+        These are the nonzero entries of the quantization matrix of
+        `ecorr_basis_weight_pair`. The result is cached in
+        ``toas.selection_cache``, since it depends only on the TOAs and the
+        ECORR keys.
+
+        Returns
+        -------
+        rows : numpy.ndarray
+            The TOAs in each epoch, one epoch after the other.
+        epochs : numpy.ndarray
+            The epoch of each entry of ``rows``.
+        group : numpy.ndarray
+            The index of the ECORR parameter of each epoch.
+        """
+        return self._ecorr_epochs(toas)[:3]
+
+    def _ecorr_epochs(self, toas):
+        ecorrs = self.get_ecorrs()
+        cache = toas.selection_cache
+        cache_key = ("ECORR", tuple((ec.key, tuple(ec.key_value)) for ec in ecorrs))
+        if cache_key not in cache:
+            t = (toas.table["tdbld"].quantity * u.day).to(u.s).value
+            rows, epochs, groups = [], [], []
+            nctot = 0
+            for ct, ec in enumerate(ecorrs):
+                sel = np.asarray(ec.select_toa_mask(toas), dtype=int)
+                labels = create_quantization_epochs(t[sel])
+                nn = labels.max() + 1 if len(labels) > 0 else 0
+                rows.append(sel[labels >= 0])
+                epochs.append(labels[labels >= 0] + nctot)
+                groups.append(np.full(nn, ct))
+                nctot += nn
+            rows = np.concatenate(rows) if rows else np.zeros(0, dtype=int)
+            epochs = np.concatenate(epochs) if epochs else np.zeros(0, dtype=int)
+            group = np.concatenate(groups) if groups else np.zeros(0, dtype=int)
+            order = np.lexsort((rows, epochs))
+            rows, epochs = rows[order], epochs[order]
+            if len(np.unique(rows)) == len(rows):
+                index = np.full(len(t), -1)
+                index[rows] = epochs
+                index.flags.writeable = False
+            else:
+                # Overlapping ECORR selections: some TOAs are in several
+                # epochs, so there is no epoch index
+                index = None
+            for a in (rows, epochs, group):
+                a.flags.writeable = False
+            cache[cache_key] = (rows, epochs, group, index)
+        return cache[cache_key]
+
+    def ecorr_epochs_overlap(self, toas):
+        """Whether some TOAs are selected by more than one ECORR parameter.
+
+        The ECORR covariance matrix is then not block diagonal, and there is
+        no `ecorr_epoch_index`.
+        """
+        return self._ecorr_epochs(toas)[3] is None
+
+    def ecorr_epoch_index(self, toas):
+        """Return the observing epoch of each TOA for the ECORR groups.
+
+        The epochs are those of `ecorr_epochs`. This requires each TOA to be
+        selected by at most one ECORR parameter (see `ecorr_epochs_overlap`).
+
+        Returns
+        -------
+        index : numpy.ndarray
+            The epoch number of each TOA, -1 for TOAs in no epoch (not
+            selected by any ECORR, or alone in their epoch).
+        group : numpy.ndarray
+            The index of the ECORR parameter of each epoch.
+        """
+        rows, epochs, group, index = self._ecorr_epochs(toas)
+        if index is None:
+            raise ValueError(
+                "Some TOAs are selected by more than one ECORR parameter."
+            )
+        return (index, group)
+
+    def ecorr_epoch_weights(self, toas):
+        """Return the ECORR weight of each epoch of `ecorr_epochs`, in s^2."""
+        group = self.ecorr_epochs(toas)[2]
+        values = np.array([ec.quantity.to(u.s).value ** 2 for ec in self.get_ecorrs()])
+        return values[group]
+
+    def ecorr_epoch_weight_pair(self, toas):
+        """Return the epoch of each TOA and the ECORR weight of each epoch.
+
+        This is the information of `ecorr_basis_weight_pair` without the
+        quantization matrix: TOA i belongs to epoch ``index[i]`` (if it is
+        not -1), whose weight is the square of its ECORR value in s^2.
+        """
+        index = self.ecorr_epoch_index(toas)[0]
+        return (index, self.ecorr_epoch_weights(toas))
+
     def ecorr_basis_weight_pair(self, toas):
         """Return a quantization matrix and ECORR weights.
 
@@ -395,32 +521,76 @@ class EcorrNoise(NoiseComponent):
         The weights used are the square of the ECORR values.
 
         """
-        tbl = toas.table
-        t = (tbl["tdbld"].quantity * u.day).to(u.s).value
-        ecorrs = self.get_ecorrs()
-        umats = []
-        for ec in ecorrs:
-            mask = ec.select_toa_mask(toas)
-            umats.append(create_quantization_matrix(t[mask]))
-        nc = sum(u.shape[1] for u in umats)
-        umat = np.zeros((len(t), nc))
-        weight = np.zeros(nc)
-        nctot = 0
-        for ct, ec in enumerate(ecorrs):
-            mask = ec.select_toa_mask(toas)
-            nn = umats[ct].shape[1]
-            umat[mask, nctot : nn + nctot] = umats[ct]
-            weight[nctot : nn + nctot] = ec.quantity.to(u.s).value ** 2
-            nctot += nn
-        return (umat, weight)
+        rows, epochs, group = self.ecorr_epochs(toas)
+        umat = np.zeros((toas.ntoas, len(group)))
+        umat[rows, epochs] = 1
+        return (umat, self.ecorr_epoch_weights(toas))
 
     def ecorr_cov_matrix(self, toas):
         """Full ECORR covariance matrix."""
-        U, Jvec = self.ecorr_basis_weight_pair(toas)
-        return np.dot(U * Jvec[None, :], U.T)
+        if self.ecorr_epochs_overlap(toas):
+            umat, weight = self.ecorr_basis_weight_pair(toas)
+            return np.dot(umat * weight, umat.T)
+        index, weight = self.ecorr_epoch_weight_pair(toas)
+        # The matrix is block diagonal, with the weight of each epoch
+        # in the block of its TOAs
+        same = (index[:, None] == index[None, :]) & (index >= 0)[:, None]
+        return np.where(same, np.where(index >= 0, weight[index], 0)[:, None], 0.0)
+
+
+class FourierNoise(NoiseComponent):
+    """Base class for noise processes with a power-law spectrum in a Fourier basis.
+
+    The process is expanded in sines and cosines at the frequencies n/T,
+    for n in [1, nmodes], where T is ``Tspan`` (by default the total
+    observing duration of the dataset). The basis can be scaled by
+    (ref_freq / f)^chromatic_index for processes that depend on the
+    observing frequency f.
+
+    The basis only depends on the TOAs, the number of modes and T, so it
+    is kept in ``toas.selection_cache`` (see `get_fourier_basis`); when the
+    amplitude or spectral index change only the weights are recomputed.
+    Setting ``Tspan`` puts the process on another frequency grid, for
+    example the one of a process common to several pulsars.
+
+    Subclasses provide ``get_pl_vals``, returning the amplitude, spectral
+    index and number of modes.
+    """
+
+    chromatic_index = 0
+    ref_freq = 1400.0  # MHz
 
+    def __init__(self,):
+        super(FourierNoise, self).__init__()
+        self.introduces_correlated_errors = True
+        self.Tspan = None
+
+    def get_pl_vals(self):
+        raise NotImplementedError
+
+    def fourier_basis_weight_pair(self, toas):
+        """Return a Fourier design matrix and power-law weights.
 
-class PLRedNoise(NoiseComponent):
+        The weights are the power-law PSD values at the frequencies of the
+        basis, times the frequency spacing.
+        """
+        amp, gam, nf = self.get_pl_vals()
+        Fmat, f = get_fourier_basis(
+            toas,
+            nf,
+            Tspan=self.Tspan,
+            chromatic_index=self.chromatic_index,
+            ref_freq=self.ref_freq,
+        )
+        weight = powerlaw(f, amp, gam) * f[0]
+        return (Fmat, weight)
+
+    def fourier_cov_matrix(self, toas):
+        Fmat, phi = self.fourier_basis_weight_pair(toas)
+        return np.dot(Fmat * phi[None, :], Fmat.T)
+
+
+class PLRedNoise(FourierNoise):
     """Timing noise with a power-law spectrum.
 
     Over the long term, pulsars are observed to experience timing noise
@@ -441,7 +611,6 @@ class PLRedNoise(NoiseComponent):
 
     def __init__(self,):
         super(PLRedNoise, self).__init__()
-        self.introduces_correlated_errors = True
         self.add_param(
             floatParameter(
                 name="RNAMP",
@@ -512,39 +681,115 @@ class PLRedNoise(NoiseComponent):
         the dataset.
 
         """
-        tbl = toas.table
-        t = (tbl["tdbld"].quantity * u.day).to(u.s).value
-        amp, gam, nf = self.get_pl_vals()
-        Fmat, f = create_fourier_design_matrix(t, nf)
-        weight = powerlaw(f, amp, gam) * f[0]
-        return (Fmat, weight)
+        return self.fourier_basis_weight_pair(toas)
 
     def pl_rn_cov_matrix(self, toas):
-        Fmat, phi = self.pl_rn_basis_weight_pair(toas)
-        return np.dot(Fmat * phi[None, :], Fmat.T)
+        return self.fourier_cov_matrix(toas)
 
 
-def create_quantization_matrix(toas_table, dt=1, nmin=2):
-    """Create quantization matrix mapping TOAs to observing epochs."""
-    isort = np.argsort(toas_table)
+class PLDMNoise(FourierNoise):
+    """Dispersion measure variations with a power-law spectrum.
 
-    bucket_ref = [toas_table[isort[0]]]
-    bucket_ind = [[isort[0]]]
+    The DM variations are a stochastic process with a power-law spectrum,
+    whose delay scales as the inverse square of the observing frequency:
+    its Fourier basis is scaled by (1400 MHz / f)^2.
 
-    for i in isort[1:]:
-        if toas_table[i] - bucket_ref[-1] < dt:
-            bucket_ind[-1].append(i)
-        else:
-            bucket_ref.append(toas_table[i])
-            bucket_ind.append([i])
+    Note
+    ----
+    The parameters follow the TempoNest convention.
 
-    # find only epochs with more than 1 TOA
-    bucket_ind2 = [ind for ind in bucket_ind if len(ind) >= nmin]
+    """
 
-    U = np.zeros((len(toas_table), len(bucket_ind2)), "d")
-    for i, l in enumerate(bucket_ind2):
-        U[l, i] = 1
+    register = True
+    category = "pl_dm_noise"
+    chromatic_index = 2
 
+    def __init__(self,):
+        super(PLDMNoise, self).__init__()
+        self.add_param(
+            floatParameter(
+                name="TNDMAmp",
+                units="",
+                aliases=[],
+                description="Amplitude of powerlaw DM noise in tempo2 format",
+            )
+        )
+        self.add_param(
+            floatParameter(
+                name="TNDMGam",
+                units="",
+                aliases=[],
+                description="Spectral index of powerlaw DM noise in tempo2 format",
+            )
+        )
+        self.add_param(
+            floatParameter(
+                name="TNDMC",
+                units="",
+                aliases=[],
+                description="Number of DM noise frequencies.",
+            )
+        )
+
+        self.covariance_matrix_funcs += [self.pl_dm_cov_matrix]
+        self.basis_funcs += [self.pl_dm_basis_weight_pair]
+
+    def get_pl_vals(self):
+        nf = int(self.TNDMC.value) if self.TNDMC.value is not None else 30
+        amp, gam = 10 ** self.TNDMAmp.value, self.TNDMGam.value
+        return (amp, gam, nf)
+
+    def pl_dm_basis_weight_pair(self, toas):
+        """Return a chromatic Fourier design matrix and DM noise weights."""
+        return self.fourier_basis_weight_pair(toas)
+
+    def pl_dm_cov_matrix(self, toas):
+        return self.fourier_cov_matrix(toas)
+
+
+def create_quantization_epochs(toas_table, dt=1, nmin=2):
+    """Label TOAs with the observing epoch they belong to.
+
+    Going through the TOA times in order, an epoch starts at the first TOA
+    at least dt after the start of the previous epoch. Epochs with fewer
+    than nmin TOAs are discarded, and the others are numbered in time order.
+
+    Returns
+    -------
+    numpy.ndarray
+        The epoch number of each TOA, or -1 if its epoch was discarded.
+    """
+    t = np.asarray(toas_table)
+    labels = np.full(len(t), -1)
+    if len(t) == 0:
+        return labels
+    isort = np.argsort(t, kind="mergesort")
+    ts = t[isort]
+    # A gap of at least dt always starts an epoch; only the runs between
+    # such gaps that last longer than dt have to be split further
+    start = np.zeros(len(ts), dtype=bool)
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(ts) >= dt) + 1, [len(ts)]))
+    start[bounds[:-1]] = True
+    long_runs = np.flatnonzero(ts[bounds[1:] - 1] - ts[bounds[:-1]] >= dt)
+    for lo, hi in zip(bounds[long_runs], bounds[long_runs + 1]):
+        s = lo
+        while True:
+            s = lo + np.searchsorted(ts[lo:hi], ts[s] + dt, side="left")
+            if s >= hi:
+                break
+            start[s] = True
+    bucket = np.cumsum(start) - 1
+    keep = np.bincount(bucket) >= nmin
+    labels[isort] = np.where(keep, np.cumsum(keep) - 1, -1)[bucket]
+    return labels
+
+
+def create_quantization_matrix(toas_table, dt=1, nmin=2):
+    """Create quantization matrix mapping TOAs to observing epochs."""
+    labels = create_quantization_epochs(toas_table, dt=dt, nmin=nmin)
+    U = np.zeros((len(labels), labels.max() + 1 if len(labels) > 0 else 0), "d")
+    rows = np.flatnonzero(labels >= 0)
+    U[rows, labels[rows]] = 1
     return U
 
 
@@ -579,6 +824,28 @@ def create_fourier_design_matrix(t, nmodes, Tspan=None):
     return F, Ffreqs
 
 
+def get_fourier_basis(toas, nmodes, Tspan=None, chromatic_index=0, ref_freq=1400.0):
+    """Return the Fourier design matrix of the TOAs, and its frequencies.
+
+    This is `create_fourier_design_matrix` for the TDB times of the TOAs,
+    with each row scaled by (ref_freq / f)^chromatic_index, where f is the
+    observing frequency in MHz. The result is cached in
+    ``toas.selection_cache`` and must not be modified.
+    """
+    cache = toas.selection_cache
+    cache_key = ("Fourier", nmodes, Tspan, chromatic_index, ref_freq)
+    if cache_key not in cache:
+        t = (toas.table["tdbld"].quantity * u.day).to(u.s).value
+        Fmat, f = create_fourier_design_matrix(t, nmodes, Tspan=Tspan)
+        if chromatic_index != 0:
+            freqs = toas.get_freqs().to(u.MHz).value
+            Fmat *= ((ref_freq / freqs) ** chromatic_index)[:, None]
+        Fmat.flags.writeable = False
+        f.flags.writeable = False
+        cache[cache_key] = (Fmat, f)
+    return cache[cache_key]
+
+
 def powerlaw(f, A=1e-16, gamma=5):
     """Power-law PSD.
 
@@ -1564,6 +1564,16 @@ class maskParameter(floatParameter):
         ------
         A array of returned index.
         """
+        # The selection only changes when the TOAs do
+        cache = toas.selection_cache
+        cache_key = (self.key, tuple(self.key_value))
+        if cache_key not in cache:
+            select_idx = self._select_toa_mask(toas)
+            select_idx.flags.writeable = False
+            cache[cache_key] = select_idx
+        return cache[cache_key]
+
+    def _select_toa_mask(self, toas):
         column_match = {"mjd": "mjd_float", "freq": "freq", "tel": "obs"}
         if len(self.key_value) == 1:
             if not hasattr(self, "toa_selector"):
@@ -1586,14 +1596,15 @@ class maskParameter(floatParameter):
         if (
             key.lower() not in column_match.keys()
         ):  # This only works for the one with flags.
-            section_name = key + "_section"
-            # if section_name not in tbl.keys():
-            # if statement removed so that flags recompute every time. If don't
-            # recompute, flags can only be added to the toa table once and then never update,
-            # making it impossible to add additional jump parameters after the par file is read in (pintk)
-            flag_col = [x.get(key, None) for x in tbl["flags"]]
-            tbl[section_name] = flag_col
-            col = tbl[section_name]
+            # Compare the key values with each distinct flag value only
+            values, codes = toas.get_flag_column(key)
+            if len(self.key_value) == 1:
+                match = [v == self.key_value[0] for v in values]
+            else:
+                match = [self.key_value[0] <= v <= self.key_value[1] for v in values]
+            # TOAs without the flag have code -1 and never match
+            match = np.append(np.array(match, dtype=bool), False)
+            return np.flatnonzero(match[codes])
         else:
             col = tbl[column_match[key.lower()]]
         select_idx = self.toa_selector.get_select_index(condition, col)
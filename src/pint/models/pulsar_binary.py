@@ -42,6 +42,8 @@ class PulsarBinary(DelayComponent):
         self.binary_model_name = None
         self.barycentric_time = None
         self.binary_model_class = None
+        # Set while d_delay_d_params shares one update of the binary object
+        self._binary_object_updated = False
         self.add_param(
             floatParameter(
                 name="PB", units=u.day, description="Orbital period", long_double=True
@@ -254,9 +256,26 @@ class PulsarBinary(DelayComponent):
 
     def d_binary_delay_d_xxxx(self, toas, param, acc_delay):
         """Return the binary model delay derivtives."""
-        self.update_binary_object(toas, acc_delay)
+        if not self._binary_object_updated:
+            self.update_binary_object(toas, acc_delay)
         return self.binary_instance.d_binarydelay_d_par(param)
 
+    def d_delay_d_params(self, toas, params, acc_delay=None):
+        """Derivatives of the binary delay for several parameters.
+
+        The binary object is updated only once for all the parameters, so
+        they share its memoized intermediate variables and partial
+        derivatives. The memoized values are dropped afterwards, since there
+        can be many of them; the Kepler solution is kept as a warm start.
+        """
+        self.update_binary_object(toas, acc_delay)
+        self._binary_object_updated = True
+        try:
+            return super(PulsarBinary, self).d_delay_d_params(toas, params, acc_delay)
+        finally:
+            self._binary_object_updated = False
+            self.binary_instance._clear_memo()
+
     def print_par(self):
         result = "BINARY {0}\n".format(self.binary_model_name)
         for p in self.params:
@@ -6,7 +6,7 @@ import numpy as np
 
 from pint import GMsun, Tsun, ls
 
-from .binary_generic import PSR_BINARY
+from .binary_generic import PSR_BINARY, memoized
 
 
 """
@@ -94,6 +94,7 @@ class BTmodel(PSR_BINARY):
         if input_params is not None:
             self.update_input(param_dict=input_params)
 
+    @memoized
     def delayL1(self):
         """First term of Blandford & Teukolsky (1976), ApJ, 205,
         580-591, eq 2.33/ First left-hand term of W.M. Smart, (1962),
@@ -105,6 +106,7 @@ class BTmodel(PSR_BINARY):
         """
         return self.a1() / c.c * np.sin(self.omega()) * (np.cos(self.E()) - self.ecc())
 
+    @memoized
     def delayL2(self):
         """Second term of Blandford & Teukolsky (1976), ApJ, 205,
         580-591, eq 2.33/ / Second left-hand term of W.M. Smart, (1962),
@@ -119,6 +121,7 @@ class BTmodel(PSR_BINARY):
             a1 * np.cos(self.omega()) * np.sqrt(1 - self.ecc() ** 2) + self.GAMMA
         ) * np.sin(self.E())
 
+    @memoized
     def delayR(self):
         """Third term of Blandford & Teukolsky (1976), ApJ, 205,
         580-591, eq 2.33 / Right-hand term of W.M. Smart, (1962),
@@ -143,6 +146,7 @@ class BTmodel(PSR_BINARY):
         # return 1.0 - 2*np.pi*num / (den * self.pbprime())
         return 1.0 - 2 * np.pi * num / (den * self.pb().to(u.second))
 
+    @memoized
     def BTdelay(self):
         """Full BT model delay"""
         return (self.delayL1() + self.delayL2()) * self.delayR()
@@ -7,6 +7,7 @@ import numpy as np
 from astropy import log
 from pint import GMsun, Tsun, ls
 
+from .binary_generic import memoized
 from .DD_model import DDmodel
 
 
@@ -115,6 +116,7 @@ class DDKmodel(DDmodel):
     # Reference:  KOPEIKIN. 1996 Eq 7 -> Eq 10.
     # Update binary parameters due to the pulser proper motion
 
+    @memoized
     def delta_kin_proper_motion(self):
         """The time dependent inclination angle.
         (KOPEIKIN. 1996 Eq 10.)
@@ -126,6 +128,7 @@ class DDKmodel(DDmodel):
         ) * self.tt0
         return d_KIN.to(self.KIN.unit)
 
+    @memoized
     def kin(self):
         if self.K96:
             return self.KIN + self.delta_kin_proper_motion()
@@ -194,6 +197,7 @@ class DDKmodel(DDmodel):
         else:
             return np.zeros(len(self.tt0)) * self.KIN / par_obj.unit
 
+    @memoized
     def delta_a1_proper_motion(self):
         """The correction on a1 (projected semi-major axis)
         due to the pulsar proper motion
@@ -246,6 +250,7 @@ class DDKmodel(DDmodel):
         )
         return d_delta_a1_proper_motion_d_T0.to(a1.unit / self.T0.unit)
 
+    @memoized
     def delta_omega_proper_motion(self):
         """The correction on omega (Longitude of periastron)
         due to the pulsar proper motion
@@ -305,6 +310,7 @@ class DDKmodel(DDmodel):
     # to the parallax.
     # Reference KOPEIKIN. 1995 Eq 18 -> Eq 19.
 
+    @memoized
     def delta_I0(self):
         """
         Refernce: (Kopeikin 1995 Eq 15)
@@ -313,6 +319,7 @@ class DDKmodel(DDmodel):
             -self.obs_pos[:, 0] * self.sin_alpha + self.obs_pos[:, 1] * self.cos_alpha
         )
 
+    @memoized
     def delta_J0(self):
         """
         Reference: (Kopeikin 1995 Eq 16)
@@ -323,6 +330,7 @@ class DDKmodel(DDmodel):
             + self.obs_pos[:, 2] * self.cos_delta
         )
 
+    @memoized
     def delta_sini_parallax(self):
         """Reference (Kopeikin 1995 Eq 18)
 
@@ -343,6 +351,7 @@ class DDKmodel(DDmodel):
         )
         return delta_sini.to("")
 
+    @memoized
     def delta_a1_parallax(self):
         """
         Reference: (Kopeikin 1995 Eq 18)
@@ -426,6 +435,7 @@ class DDKmodel(DDmodel):
         ) * kom_projection
         return d_delta_a1_d_T0.to(a1.unit / self.T0.unit)
 
+    @memoized
     def delta_omega_parallax(self):
         """
         Reference: (Kopeikin 1995 Eq 19)
@@ -499,9 +509,10 @@ class DDKmodel(DDmodel):
         mask = [proper_motion, parallax]
         for ii, cf in enumerate(corr_funs):
             if mask[ii]:
-                a1 += cf()
+                a1 = a1 + cf()
         return a1
 
+    @memoized
     def a1(self):
         if self.K96:
             return self.a1_k()
@@ -541,9 +552,10 @@ class DDKmodel(DDmodel):
         mask = [proper_motion, parallax]
         for ii, cf in enumerate(corr_funs):
             if mask[ii]:
-                omega += cf()
+                omega = omega + cf()
         return omega
 
+    @memoized
     def omega(self):
         if self.K96:
             return self.omega_k()
@@ -7,7 +7,7 @@ import numpy as np
 
 from pint import GMsun, Tsun, ls
 
-from .binary_generic import PSR_BINARY
+from .binary_generic import PSR_BINARY, memoized
 
 
 class DDmodel(PSR_BINARY):
@@ -73,6 +73,7 @@ class DDmodel(PSR_BINARY):
     # calculations for delays in DD model
 
     # DDmodel special omega.
+    @memoized
     def omega(self):
         """T. Damour and N. Deruelle(1986)equation [25]
 
@@ -154,6 +155,7 @@ class DDmodel(PSR_BINARY):
 
     ############################################################
     # Calculate er
+    @memoized
     def er(self):
         return self.ecc() + self.DR
 
@@ -179,6 +181,7 @@ class DDmodel(PSR_BINARY):
                 )
 
     ##########
+    @memoized
     def eTheta(self):
         return self.ecc() + self.DTH
 
@@ -204,6 +207,7 @@ class DDmodel(PSR_BINARY):
                 )
 
     ##########
+    @memoized
     def alpha(self):
         """Alpha defined in T. Damour and N. Deruelle(1986)equation [46]
 
@@ -258,6 +262,7 @@ class DDmodel(PSR_BINARY):
     #     return self.tt0/c.c*sinOmg
     ##############################################
 
+    @memoized
     def beta(self):
         """Beta defined in T. Damour and N. Deruelle(1986)equation [47]
 
@@ -417,6 +422,7 @@ class DDmodel(PSR_BINARY):
         return self.a1() / c.c * (-eTheta) / np.sqrt(1 - eTheta ** 2) * cosOmg
 
     ##################################################
+    @memoized
     def Dre(self):
         """Dre defined in T. Damour and N. Deruelle(1986)equation [48]
 
@@ -462,6 +468,7 @@ class DDmodel(PSR_BINARY):
             return (term1 + term2 + term3 + term4).to(Dre.unit / par_obj.unit)
 
     #################################################
+    @memoized
     def Drep(self):
         """Dervitive of Dre respect to E T. Damour and N. Deruelle(1986)equation [49]
 
@@ -503,6 +510,7 @@ class DDmodel(PSR_BINARY):
             return (term1 + term2 + term3).to(Drep.unit / par_obj.unit)
 
     #################################################
+    @memoized
     def Drepp(self):
         """Dervitive of Drep respect to E T. Damour and N. Deruelle(1986)equation [50]
 
@@ -544,6 +552,7 @@ class DDmodel(PSR_BINARY):
 
     #################################################
 
+    @memoized
     def nhat(self):
         """nhat defined as T. Damour and N. Deruelle(1986)equation [51]
 
@@ -583,6 +592,7 @@ class DDmodel(PSR_BINARY):
             )
 
     #################################################
+    @memoized
     def delayInverse(self):
         """DD model Inverse timing delay.
 
@@ -681,6 +691,7 @@ class DDmodel(PSR_BINARY):
             )
 
     #################################################
+    @memoized
     def delayS(self):
         """Binary shapiro delay
 
@@ -771,6 +782,7 @@ class DDmodel(PSR_BINARY):
             )
 
     #################################################
+    @memoized
     def delayE(self):
         """Binary Einstein delay
 
@@ -797,6 +809,7 @@ class DDmodel(PSR_BINARY):
 
     #################################################
 
+    @memoized
     def delayA(self):
         """Binary Abberation delay
 
@@ -855,6 +868,7 @@ class DDmodel(PSR_BINARY):
 
     #################################################
 
+    @memoized
     def DDdelay(self):
         """Full DD model delay"""
         return self.delayInverse() + self.delayS() + self.delayA()
@@ -9,6 +9,7 @@ import numpy as np
 
 from pint import GMsun, Tsun, ls
 
+from .binary_generic import memoized
 from .ELL1_model import ELL1BaseModel
 
 
@@ -54,6 +55,7 @@ class ELL1Hmodel(ELL1BaseModel):
         ]
         self.ds_func = self.delayS3p_H3_STIGMA_approximate
 
+    @memoized
     def delayS(self):
         if set(self.fit_params) == set(["H3", "H4"]):
             stigma = self.H4 / self.H3
@@ -68,6 +70,7 @@ class ELL1Hmodel(ELL1BaseModel):
             )
         return self.ds_func(self.H3, stigma, self.NHARMS)
 
+    @memoized
     def ELL1Hdelay(self):
         # TODO need aberration
         return self.delayI() + self.delayS()
@@ -7,7 +7,7 @@ import numpy as np
 
 from pint import GMsun, Tsun, ls
 
-from .binary_generic import PSR_BINARY
+from .binary_generic import PSR_BINARY, memoized
 
 
 class ELL1BaseModel(PSR_BINARY):
@@ -42,6 +42,7 @@ class ELL1BaseModel(PSR_BINARY):
 
     ###############################
 
+    @memoized
     def ttasc(self):
         """
         ttasc = t - TASC
@@ -52,6 +53,7 @@ class ELL1BaseModel(PSR_BINARY):
         ttasc = (t - self.TASC.value * u.day).to("second")
         return ttasc
 
+    @memoized
     def a1(self):
         """ELL1 model a1 calculation.
 
@@ -71,6 +73,7 @@ class ELL1BaseModel(PSR_BINARY):
     def d_a1_d_A1DOT(self):
         return self.ttasc()
 
+    @memoized
     def eps1(self):
         return self.EPS1 + self.ttasc() * self.EPS1DOT
 
@@ -85,6 +88,7 @@ class ELL1BaseModel(PSR_BINARY):
     def d_eps1_d_EPS1DOT(self):
         return self.ttasc()
 
+    @memoized
     def eps2(self):
         return self.EPS2 + self.ttasc() * self.EPS2DOT
 
@@ -103,12 +107,14 @@ class ELL1BaseModel(PSR_BINARY):
     # But pulsar_binary function M() is a generic function ot computes the
     # orbit phase in the range [0,1], So Phi can be computed by M(). But
     # the attribute .orbits_func needs to be set as orbits_ELL1
+    @memoized
     def Phi(self):
         """Orbit phase in ELL1 model. Using TASC
         """
         phase = self.M()
         return phase
 
+    @memoized
     def orbits_ELL1(self):
         PB = (self.pb()).to("second")
         PBDOT = self.pbdot()
@@ -181,6 +187,7 @@ class ELL1BaseModel(PSR_BINARY):
             )
         return d_Dre_d_par
 
+    @memoized
     def Drep(self):
         """ dDre/dPhi
         """
@@ -228,6 +235,7 @@ class ELL1BaseModel(PSR_BINARY):
             )
         return d_Drep_d_par
 
+    @memoized
     def Drepp(self):
         a1 = self.a1()
         eps1 = self.eps1()
@@ -283,6 +291,7 @@ class ELL1BaseModel(PSR_BINARY):
             )
         return d_Drepp_d_par
 
+    @memoized
     def delayR(self):
         """ELL1 Roemer delay in proper time. Ch. Lange,1 F. Camilo, 2001 eq. A6 """
         Phi = self.Phi()
@@ -295,6 +304,7 @@ class ELL1BaseModel(PSR_BINARY):
             )
         ).decompose()
 
+    @memoized
     def delayI(self):
         """Inverse time delay formular.
 
@@ -322,6 +332,7 @@ class ELL1BaseModel(PSR_BINARY):
             * (1 - nhat * Drep + (nhat * Drep) ** 2 + 1.0 / 2 * nhat ** 2 * Dre * Drepp)
         ).decompose()
 
+    @memoized
     def nhat(self):
         return 2 * np.pi / self.pb()
 
@@ -385,6 +396,7 @@ class ELL1model(ELL1BaseModel):
         self.binary_delay_funcs = [self.ELL1delay]
         self.d_binarydelay_d_par_funcs = [self.d_ELL1delay_d_par]
 
+    @memoized
     def delayS(self):
         """ELL1 Shaprio delay. Ch. Lange,1 F. Camilo, 2001 eq. A16
         """
@@ -421,6 +433,7 @@ class ELL1model(ELL1BaseModel):
             )
         return d_delayS_d_par
 
+    @memoized
     def ELL1delay(self):
         # TODO need add aberration delay
         return self.delayI() + self.delayS()
@@ -1,6 +1,8 @@
 # This file is a prototype of independent psr binary model class
 from __future__ import absolute_import, division, print_function
 
+import functools
+
 import astropy.constants as c
 import astropy.units as u
 import numpy as np
@@ -9,10 +11,49 @@ from astropy._erfa import DAYSEC as SECS_PER_DAY
 
 from pint import Tsun, ls
 from pint.models.stand_alone_psr_binaries.binary_orbits import OrbitPB
+from pint.orbital.kepler import solve_kepler
 
 SECS_PER_JUL_YEAR = SECS_PER_DAY * 365.25
 
 
+def memoized(method):
+    """Decorator caching the value of a binary model method.
+
+    The value is kept on the binary object, keyed on the method and its
+    arguments, until the input TOAs or a parameter value change (see
+    `PSR_BINARY.update_input`). This way the delay and all its derivatives
+    share one computation of each intermediate variable.
+
+    The cached values are shared between callers, so they must not be
+    modified in place.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        key = (method, args)
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        result = method(self, *args)
+        self._memo[key] = result
+        return result
+
+    return wrapper
+
+
+def _same_value(a, b):
+    """Check whether an input is unchanged, so cached values remain valid."""
+    if a is b:
+        return True
+    if hasattr(a, "unit") or hasattr(b, "unit"):
+        if getattr(a, "unit", None) != getattr(b, "unit", None):
+            return False
+        a, b = a.value, b.value
+    a, b = np.asanyarray(a), np.asanyarray(b)
+    return a.shape == b.shape and a.dtype == b.dtype and np.array_equal(a, b)
+
+
 class PSR_BINARY(object):
     """A base (generic) object for psr binary models.
 
@@ -88,6 +129,12 @@ class PSR_BINARY(object):
     """
 
     def __init__(self,):
+        # Values of the memoized methods for the current inputs
+        self._memo = {}
+        # Start solving Kepler's equation from the previous solution; off by
+        # default so that results do not depend on earlier evaluations
+        self.kepler_warm_start = False
+        self._kepler_solution = None
         # Necessary parameters for all binary model
         self.binary_name = None
         self.param_default_value = {
@@ -117,7 +164,6 @@ class PSR_BINARY(object):
         self.param_aliases = {"ECC": ["E"], "EDOT": ["ECCDOT"], "A1DOT": ["XDOT"]}
         self.binary_params = list(self.param_default_value.keys())
         self.inter_vars = ["E", "M", "nu", "ecc", "omega", "a1", "TM2"]
-        self.cache_vars = ["E", "nu"]
         self.binary_delay_funcs = []
         self.d_binarydelay_d_par_funcs = []
         self.orbits_cls = OrbitPB(self, ["PB", "PBDOT", "XPBDOT", "T0"])
@@ -129,6 +175,7 @@ class PSR_BINARY(object):
     @t.setter
     def t(self, val):
         self._t = val
+        self._clear_memo()
         if hasattr(self, "T0"):
             self._tt0 = self.get_tt0(self._t)
 
@@ -139,6 +186,7 @@ class PSR_BINARY(object):
     @T0.setter
     def T0(self, val):
         self._T0 = val
+        self._clear_memo()
         if hasattr(self, "_t"):
             self._tt0 = self.get_tt0(self._t)
 
@@ -147,16 +195,23 @@ class PSR_BINARY(object):
         return self._tt0
 
     def update_input(self, **updates):
-        """Update the toas and parameters."""
+        """Update the toas and parameters.
+
+        Inputs equal to the current ones are left alone, so the values of
+        the memoized methods are only recomputed when something changed.
+        """
         # Update toas
         if "barycentric_toa" in updates:
-            self.t = np.atleast_1d(updates["barycentric_toa"])
+            t = np.atleast_1d(updates["barycentric_toa"])
+            if not _same_value(t, getattr(self, "_t", None)):
+                self.t = t
         # Update observatory position.
-        if "obs_pos" in updates:
-            self.obs_pos = np.atleast_1d(updates["obs_pos"])
-
-        if "psr_pos" in updates:
-            self.psr_pos = np.atleast_1d(updates["psr_pos"])
+        for key in ["obs_pos", "psr_pos"]:
+            if key in updates:
+                pos = np.atleast_1d(updates[key])
+                if not _same_value(pos, getattr(self, key, None)):
+                    setattr(self, key, pos)
+                    self._clear_memo()
         # update parameters
         d_list = ["barycentric_toa", "obs_pos", "psr_pos"]
         parameters = {}
@@ -165,10 +220,21 @@ class PSR_BINARY(object):
                 parameters[key] = value
         self.set_param_values(parameters)
 
-        # Switch the cache off
-        # NOTE Having cache is needs to be very careful.
-        for cv in self.cache_vars:
-            setattr(self, "_" + cv, None)
+    def clear_cache(self):
+        """Forget the values of the memoized methods and the previous Kepler
+        solution.
+
+        The memoized values are dropped automatically when the inputs change
+        through `update_input` or `set_param_values`; call this after
+        modifying the object in any other way. Afterwards the results do not
+        depend on earlier evaluations, even with kepler_warm_start set.
+        """
+        self._clear_memo()
+        self._kepler_solution = None
+
+    def _clear_memo(self):
+        # The previous Kepler solution is kept as a warm start
+        self._memo = {}
 
     def set_param_values(self, valDict=None):
         """Set the parameters and assign values,
@@ -178,6 +244,7 @@ class PSR_BINARY(object):
         if valDict is None:
             for par in self.param_default_value.keys():
                 setattr(self, par.upper(), self.param_default_value[par])
+            self._clear_memo()
         else:
             for par in valDict.keys():
                 if par not in self.binary_params:  # search for aliases
@@ -193,7 +260,10 @@ class PSR_BINARY(object):
                 else:
                     parname = par
                 if valDict[par] is None:
-                    setattr(self, parname, self.param_default_value[parname])
+                    val = self.param_default_value[parname]
+                    if not _same_value(val, getattr(self, parname, None)):
+                        setattr(self, parname, val)
+                        self._clear_memo()
                     continue
                 if not hasattr(valDict[par], "unit"):
                     bm_par = getattr(self, parname)
@@ -203,7 +273,9 @@ class PSR_BINARY(object):
                         val = valDict[par] * getattr(self, parname).unit
                 else:
                     val = valDict[par]
-                setattr(self, parname, val)
+                if not _same_value(val, getattr(self, parname, None)):
+                    setattr(self, parname, val)
+                    self._clear_memo()
 
     def add_binary_params(self, parameter, defaultValue, unit=False):
         """Add one parameter to the binary class."""
@@ -221,6 +293,7 @@ class PSR_BINARY(object):
             else:
                 self.param_default_value[parameter] = defaultValue
             setattr(self, parameter, self.param_default_value[parameter])
+            self._clear_memo()
 
     def add_inter_vars(self, interVars):
         if not isinstance(interVars, list):
@@ -271,6 +344,7 @@ class PSR_BINARY(object):
 
         return result
 
+    @memoized
     def prtl_der(self, y, x):
         """Find the partial derivatives in binary model pdy/pdx
 
@@ -356,6 +430,16 @@ class PSR_BINARY(object):
         array_like
             The eccentric anomaly in radians, given a set of mean_anomalies
             in radians.
+
+        Notes
+        -----
+        If kepler_warm_start is set, the previous solution, shifted by the
+        change in mean anomaly, is used as a starting point where it is
+        closer to the solution, which saves iterations when the parameters
+        change slightly between evaluations, as in fitting or MCMC. The
+        result then differs by up to the convergence tolerance (5e-15 rad)
+        from the one computed without a warm start. It is off by default;
+        `TimingModel.kepler_warm_start` turns it on for a block of code.
         """
         if hasattr(eccentricity, "unit"):
             # FIXME: isn't this an error?
@@ -363,18 +447,17 @@ class PSR_BINARY(object):
         else:
             e = eccentricity
 
-        if any(e < 0) or any(e >= 1):
-            raise ValueError("Eccentricity should be in the range of [0,1).")
-
         if hasattr(mean_anomaly, "unit"):
             ma = np.longdouble(mean_anomaly).value
         else:
             ma = mean_anomaly
-        k = lambda E: E - e * np.sin(E) - ma  # Kepler Equation
-        dk = lambda E: 1 - e * np.cos(E)  # derivative Kepler Equation
-        U = ma
-        while np.max(abs(k(U))) > 5e-15:  # Newton-Raphson method
-            U = U - k(U) / dk(U)
+        guess = None
+        if self.kepler_warm_start and self._kepler_solution is not None:
+            prev_ma, prev_U = self._kepler_solution
+            if prev_ma.shape == np.shape(ma):
+                guess = prev_U + (ma - prev_ma)
+        U = solve_kepler(e, ma, guess=guess)
+        self._kepler_solution = (ma, U)
         return U * u.rad
 
     def get_tt0(self, barycentricTOA):
@@ -388,6 +471,7 @@ class PSR_BINARY(object):
         tt0 = (barycentricTOA - T0).to("second")
         return tt0
 
+    @memoized
     def ecc(self):
         """Calculate ecctricity with EDOT """
         ECC = self.ECC
@@ -405,6 +489,7 @@ class PSR_BINARY(object):
     def d_ecc_d_EDOT(self):
         return self.tt0
 
+    @memoized
     def a1(self):
         return self.A1 + self.tt0 * self.A1DOT
 
@@ -432,6 +517,7 @@ class PSR_BINARY(object):
         result = func()
         return result
 
+    @memoized
     def pb(self):
         return self.orbits_cls.pbprime()
 
@@ -455,12 +541,15 @@ class PSR_BINARY(object):
         result = self.orbits_cls.d_pbprime_d_par(par)
         return result.to(self.PB.unit / par_obj.unit)
 
+    @memoized
     def pbdot(self):
         return self.orbits_cls.pbdot_orbit()
 
+    @memoized
     def orbits(self):
         return self.orbits_cls.orbits()
 
+    @memoized
     def M(self):
         """Orbit phase."""
         return self.orbits_cls.orbit_phase()
@@ -489,11 +578,10 @@ class PSR_BINARY(object):
 
     ###############################################
 
+    @memoized
     def E(self):
         """Eccentric Anomaly """
-        if not hasattr(self, "_E") or self._E is None:
-            self._E = self.compute_eccentric_anomaly(self.ecc(), self.M())
-        return self._E
+        return self.compute_eccentric_anomaly(self.ecc(), self.M())
 
     # Analytically calculate derivtives.
 
@@ -545,18 +633,14 @@ class PSR_BINARY(object):
                 E = self.E()
                 return np.zeros(len(self.tt0)) * E.unit / par_obj.unit
 
+    @memoized
     def nu(self):
         """True anomaly  (Ae) """
-        if not hasattr(self, "_nu") or self._nu is None:
-            ecc = self.ecc()
-            nu = 2 * np.arctan(
-                np.sqrt((1.0 + ecc) / (1.0 - ecc)) * np.tan(self.E() / 2.0)
-            )
-            # Normalize True anomaly to on orbit.
-            nu[nu < 0] += 2 * np.pi * u.rad
-            nu2 = 2 * np.pi * self.orbits() * u.rad + nu - self.M()
-            self._nu = nu2
-        return self._nu
+        ecc = self.ecc()
+        nu = 2 * np.arctan(np.sqrt((1.0 + ecc) / (1.0 - ecc)) * np.tan(self.E() / 2.0))
+        # Normalize True anomaly to on orbit.
+        nu[nu < 0] += 2 * np.pi * u.rad
+        return 2 * np.pi * self.orbits() * u.rad + nu - self.M()
 
     def d_nu_d_E(self):
         nu = self.nu()
@@ -639,6 +723,7 @@ class PSR_BINARY(object):
                 nu = self.nu()
                 return np.zeros(len(self.tt0)) * nu.unit / par_obj.unit
 
+    @memoized
     def omega(self):
         PB = self.pb().to("second")
         OMDOT = self.OMDOT
@@ -684,12 +769,14 @@ class PSR_BINARY(object):
         result.fill(-self.EDOT.value)
         return result * u.Unit(self.EDOT.unit)
 
+    @memoized
     def TM2(self):
         return self.M2.value * Tsun
 
     def d_TM2_d_M2(self):
         return Tsun / (1.0 * u.Msun)
 
+    @memoized
     def pbprime(self):
         return self.pb() - self.pbdot() * self.tt0
 
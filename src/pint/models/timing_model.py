@@ -9,6 +9,7 @@ import copy
 import inspect
 from collections import defaultdict, OrderedDict
 import warnings
+from contextlib import contextmanager
 
 import astropy.time as time
 import astropy.units as u
@@ -27,6 +28,7 @@ from pint.models.parameter import (
     MJDParameter,
 )
 from pint.phase import Phase
+from pint.pint_matrix import SparseColumnBuilder
 from pint.utils import PrefixError, interesting_lines, lines_of, split_prefixed_name
 from pint.toa import TOAs
 
@@ -405,6 +407,33 @@ class TimingModel(object):
         """Does the model describe a binary pulsar? (True or False)"""
         return any(x.startswith("Binary") for x in self.components.keys())
 
+    @contextmanager
+    def kepler_warm_start(self):
+        """Start solving Kepler's equation from the previous solution in this block.
+
+        Use this around loops that evaluate the model many times with
+        slightly different parameters (fitting, MCMC): the binary model then
+        needs fewer iterations, but its results depend on the earlier
+        evaluations by up to the solver tolerance (see
+        `PSR_BINARY.kepler_warm_start`). The binary caches are cleared on
+        leaving the block, so later evaluations do not depend on the ones
+        made inside it.
+        """
+        binaries = [
+            cp.binary_instance
+            for cp in self.components.values()
+            if hasattr(cp, "binary_instance")
+        ]
+        previous = [b.kepler_warm_start for b in binaries]
+        for b in binaries:
+            b.kepler_warm_start = True
+        try:
+            yield
+        finally:
+            for b, warm_start in zip(binaries, previous):
+                b.kepler_warm_start = warm_start
+                b.clear_cache()
+
     def orbital_phase(self, barytimes, anom="mean", radians=True):
         """Return orbital phase (in radians) at barycentric MJD times
 
@@ -959,6 +988,31 @@ class TimingModel(object):
                 delay += df(toas, delay)
         return delay
 
+    def component_delays(self, toas):
+        """Total delay, and the delay accumulated before each delay component.
+
+        Parameters
+        ----------
+        toas: toa.TOAs
+            The toas for analysis delays.
+
+        Returns
+        -------
+        delay : astropy.units.Quantity
+            The total delay, the same as `delay`.
+        acc_delays : dict
+            Maps the name of each delay component to the delay of all the
+            components before it, the same as
+            ``delay(toas, name, include_last=False)``.
+        """
+        delay = np.zeros(toas.ntoas) * u.second
+        acc_delays = {}
+        for dc in self.DelayComponent_list:
+            acc_delays[dc.__class__.__name__] = delay.copy()
+            for df in dc.delay_funcs_component:
+                delay += df(toas, delay)
+        return delay, acc_delays
+
     def phase(self, toas, abs_phase=False):
         """Return the model-predicted pulse phase for the given TOAs."""
         # First compute the delays to "pulsar time"
@@ -1125,65 +1179,75 @@ class TimingModel(object):
 
         return result
 
+    def noise_likelihood(self, toas, params, resids=None):
+        """Return the likelihood of noise parameters for these TOAs.
+
+        The timing parameters are marginalized over analytically; see
+        `pint.gls_likelihood.NoiseLikelihood`, which this returns. It
+        works on a copy of the model.
+
+        Parameters
+        ----------
+        toas : `pint.toa.TOAs`
+        params : list of str
+            The noise parameters to vary (EFAC1, ECORR1, TNRedAmp, ...).
+        resids : array or `astropy.units.Quantity`, optional
+            The time residuals; by default they are computed.
+        """
+        from pint.gls_likelihood import NoiseLikelihood
+
+        return NoiseLikelihood(self, toas, params, resids=resids)
+
     def jump_flags_to_params(self, toas):
         """convert jump flags in toas.table["flags"] to jump parameters in the model"""
         from . import jump
 
-        for flag_dict in toas.table["flags"]:
-            if "jump" in flag_dict.keys():
-                break
-            elif "gui_jump" in flag_dict.keys():
-                break
-        else:
+        jump_values, jump_codes = toas.get_flag_column("jump")
+        gui_jump_values, gui_jump_codes = toas.get_flag_column("gui_jump")
+        if len(jump_values) == 0 and len(gui_jump_values) == 0:
             log.info("No jump flags to process")
             return None
-        for flag_dict in toas.table["flags"]:
-            if "jump" in flag_dict.keys():
-                jump_nums = [
-                    flag_dict["jump"] if "jump" in flag_dict.keys() else np.nan
-                    for flag_dict in toas.table["flags"]
-                ]
-                if "PhaseJump" not in self.components:
-                    log.info("PhaseJump component added")
-                    a = jump.PhaseJump()
-                    a.setup()
-                    self.add_component(a)
-                    self.remove_param("JUMP1")
-                for num in np.arange(1, np.nanmax(jump_nums) + 1):
-                    if "JUMP" + str(int(num)) not in self.params:
-                        param = maskParameter(
-                            name="JUMP",
-                            index=int(num),
-                            key="jump",
-                            key_value=int(num),
-                            value=0.0,
-                            units="second",
-                            uncertainty=0.0,
-                        )
-                        self.add_param_from_top(param, "PhaseJump")
-                        getattr(self, param.name).frozen = False
-                if 0 in jump_nums:
-                    for flag_dict in toas.table["flags"]:
-                        if "jump" in flag_dict.keys() and flag_dict["jump"] == 0:
-                            flag_dict["jump"] = int(np.nanmax(jump_nums) + 1)
+        if len(jump_values) > 0:
+            jump_nums = np.append(jump_values.astype(float), np.nan)[jump_codes]
+            if "PhaseJump" not in self.components:
+                log.info("PhaseJump component added")
+                a = jump.PhaseJump()
+                a.setup()
+                self.add_component(a)
+                self.remove_param("JUMP1")
+            for num in np.arange(1, np.nanmax(jump_nums) + 1):
+                if "JUMP" + str(int(num)) not in self.params:
                     param = maskParameter(
                         name="JUMP",
-                        index=int(np.nanmax(jump_nums) + 1),
+                        index=int(num),
                         key="jump",
-                        key_value=int(np.nanmax(jump_nums) + 1),
+                        key_value=int(num),
                         value=0.0,
                         units="second",
                         uncertainty=0.0,
                     )
                     self.add_param_from_top(param, "PhaseJump")
                     getattr(self, param.name).frozen = False
+            if 0 in jump_nums:
+                for ii in np.flatnonzero(jump_nums == 0):
+                    toas.table["flags"][ii]["jump"] = int(np.nanmax(jump_nums) + 1)
+                toas.clear_flag_cache()
+                param = maskParameter(
+                    name="JUMP",
+                    index=int(np.nanmax(jump_nums) + 1),
+                    key="jump",
+                    key_value=int(np.nanmax(jump_nums) + 1),
+                    value=0.0,
+                    units="second",
+                    uncertainty=0.0,
+                )
+                self.add_param_from_top(param, "PhaseJump")
+                getattr(self, param.name).frozen = False
         # convert string list key_value from file into int list for jumps
         # previously added thru pintk
-        for flag_dict in toas.table["flags"]:
-            if "gui_jump" in flag_dict.keys():
-                num = flag_dict["gui_jump"]
-                jump = getattr(self.components["PhaseJump"], "JUMP" + str(num))
-                jump.key_value = list(map(int, jump.key_value))
+        for num in gui_jump_values:
+            jump = getattr(self.components["PhaseJump"], "JUMP" + str(num))
+            jump.key_value = list(map(int, jump.key_value))
         self.components["PhaseJump"].setup()
 
     def get_barycentric_toas(self, toas, cutoff_component=""):
@@ -1252,50 +1316,161 @@ class TimingModel(object):
         """
         pass
 
-    def d_phase_d_param(self, toas, delay, param):
-        """Return the derivative of phase with respect to the parameter."""
+    def d_phase_d_delay(self, toas, delay):
+        """Return the derivative of phase with respect to the total delay.
+
+        This is the sum of the d_phase_d_delay functions of all the phase
+        components; it is the same for every delay parameter.
+        """
+        result = np.longdouble(np.zeros(toas.ntoas)) / u.second
+        for dpddf in self.d_phase_d_delay_funcs:
+            result += dpddf(toas, delay)
+        return result
+
+    def d_phase_d_param(
+        self, toas, delay, param, d_phase_d_delay=None, acc_delay=None
+    ):
+        """Return the derivative of phase with respect to the parameter.
+
+        If the parameter affects the delay, the derivative is computed with
+        the chain rule from the derivative of the delay and the result of
+        `d_phase_d_delay` for these TOAs and delay, which can be passed in
+        as d_phase_d_delay to avoid computing it again for each parameter.
+        acc_delay is passed on to `d_delay_d_param`.
+        """
+        return self.d_phase_d_params(
+            toas, delay, [param], d_phase_d_delay=d_phase_d_delay, acc_delay=acc_delay
+        )[param]
+
+    def d_phase_d_params(
+        self, toas, delay, params, d_phase_d_delay=None, acc_delay=None
+    ):
+        """Return the derivatives of phase with respect to several parameters.
+
+        The derivatives of the delay are computed with `d_delay_d_params`,
+        so the delay components can share their work between parameters.
+        The other arguments are as for `d_phase_d_param`.
+
+        Returns
+        -------
+        dict
+            The derivative for each parameter.
+        """
         # TODO need to do correct chain rule stuff wrt delay derivs, etc
         # Is it safe to assume that any param affecting delay only affects
         # phase indirectly (and vice-versa)??
-        par = getattr(self, param)
-        result = np.longdouble(np.zeros(toas.ntoas)) / par.units
-        param_phase_derivs = []
         phase_derivs = self.phase_deriv_funcs
-        delay_derivs = self.delay_deriv_funcs
-        if param in list(phase_derivs.keys()):
-            for df in phase_derivs[param]:
-                result += df(toas, param, delay).to(
-                    result.unit, equivalencies=u.dimensionless_angles()
+        delay_params = [p for p in params if p not in phase_derivs]
+        if len(delay_params) > 0:
+            d_delay_d_ps = self.d_delay_d_params(toas, delay_params, acc_delay)
+            if d_phase_d_delay is None:
+                d_phase_d_delay = self.d_phase_d_delay(toas, delay)
+        results = {}
+        for param in params:
+            par = getattr(self, param)
+            result = np.longdouble(np.zeros(toas.ntoas)) / par.units
+            if param in phase_derivs:
+                for df in phase_derivs[param]:
+                    result += df(toas, param, delay).to(
+                        result.unit, equivalencies=u.dimensionless_angles()
+                    )
+            else:
+                # Apply chain rule for the parameters in the delay.
+                # total_phase = Phase1(delay(param)) + Phase2(delay(param))
+                # d_total_phase_d_param = d_Phase1/d_delay*d_delay/d_param +
+                #                         d_Phase2/d_delay*d_delay/d_param
+                #                       = (d_Phase1/d_delay + d_Phase2/d_delay) *
+                #                         d_delay_d_param
+                result = d_phase_d_delay * d_delay_d_ps[param]
+            results[param] = result.to(
+                result.unit, equivalencies=u.dimensionless_angles()
+            )
+        return results
+
+    def d_phase_d_params_sparse(self, toas, delay, params):
+        """Return the nonzero entries of phase derivatives that are mostly zero.
+
+        Phase components whose parameters only affect some of the TOAs
+        (JUMPs, glitches) provide a ``d_phase_d_params_sparse`` method giving
+        the derivatives only for those TOAs. Parameters without one, or with
+        derivatives from more than one component, are left out.
+
+        Returns
+        -------
+        dict
+            For each parameter, the indices of the TOAs where its derivative
+            may be nonzero and the derivative for those TOAs, in the units of
+            `d_phase_d_param`.
+        """
+        phase_derivs = self.phase_deriv_funcs
+        results = {}
+        for cp in self.PhaseComponent_list:
+            if not hasattr(cp, "d_phase_d_params_sparse"):
+                continue
+            cp_params = [
+                p
+                for p in params
+                if p in cp.deriv_funcs
+                and len(phase_derivs.get(p, [])) == len(cp.deriv_funcs[p])
+            ]
+            if len(cp_params) == 0:
+                continue
+            for param, (rows, deriv) in cp.d_phase_d_params_sparse(
+                toas, cp_params, delay
+            ).items():
+                unit = u.Unit("") / getattr(self, param).units
+                results[param] = (
+                    rows,
+                    deriv.to(unit, equivalencies=u.dimensionless_angles()),
                 )
-        else:
-            # Apply chain rule for the parameters in the delay.
-            # total_phase = Phase1(delay(param)) + Phase2(delay(param))
-            # d_total_phase_d_param = d_Phase1/d_delay*d_delay/d_param +
-            #                         d_Phase2/d_delay*d_delay/d_param
-            #                       = (d_Phase1/d_delay + d_Phase2/d_delay) *
-            #                         d_delay_d_param
-
-            d_delay_d_p = self.d_delay_d_param(toas, param)
-            dpdd_result = np.longdouble(np.zeros(toas.ntoas)) / u.second
-            for dpddf in self.d_phase_d_delay_funcs:
-                dpdd_result += dpddf(toas, delay)
-            result = dpdd_result * d_delay_d_p
-        return result.to(result.unit, equivalencies=u.dimensionless_angles())
+        return results
 
     def d_delay_d_param(self, toas, param, acc_delay=None):
-        """Return the derivative of delay with respect to the parameter."""
-        par = getattr(self, param)
-        result = np.longdouble(np.zeros(toas.ntoas) << (u.s / par.units))
+        """Return the derivative of delay with respect to the parameter.
+
+        acc_delay is handed to the derivative functions. It can also be the
+        dictionary returned by `component_delays`, in which case each
+        derivative function gets the delay accumulated before its own
+        component.
+        """
+        return self.d_delay_d_params(toas, [param], acc_delay)[param]
+
+    def d_delay_d_params(self, toas, params, acc_delay=None):
+        """Return the derivatives of delay with respect to several parameters.
+
+        Each delay component computes the derivatives for all of its
+        parameters in one call to `DelayComponent.d_delay_d_params`, which
+        lets it share intermediate results between them.
+
+        acc_delay is as for `d_delay_d_param`.
+
+        Returns
+        -------
+        dict
+            The derivative for each parameter.
+        """
         delay_derivs = self.delay_deriv_funcs
-        if param not in list(delay_derivs.keys()):
-            raise AttributeError(
-                "Derivative function for '%s' is not provided"
-                " or not registered. " % param
-            )
-        for df in delay_derivs[param]:
-            result += df(toas, param, acc_delay).to(
-                result.unit, equivalencies=u.dimensionless_angles()
-            )
+        result = {}
+        for param in params:
+            if param not in delay_derivs:
+                raise AttributeError(
+                    "Derivative function for '%s' is not provided"
+                    " or not registered. " % param
+                )
+            par = getattr(self, param)
+            result[param] = np.longdouble(np.zeros(toas.ntoas) << (u.s / par.units))
+        for cp in self.DelayComponent_list:
+            cp_params = [p for p in params if p in cp.deriv_funcs]
+            if len(cp_params) == 0:
+                continue
+            if isinstance(acc_delay, dict):
+                cp_acc_delay = acc_delay.get(cp.__class__.__name__)
+            else:
+                cp_acc_delay = acc_delay
+            for param, deriv in cp.d_delay_d_params(
+                toas, cp_params, cp_acc_delay
+            ).items():
+                result[param] += deriv
         return result
 
     def d_phase_d_param_num(self, toas, param, step=1e-2):
@@ -1381,7 +1556,13 @@ class TimingModel(object):
         return result
 
     def designmatrix(
-        self, toas, acc_delay=None, scale_by_F0=True, incfrozen=False, incoffset=True
+        self,
+        toas,
+        acc_delay=None,
+        scale_by_F0=True,
+        incfrozen=False,
+        incoffset=True,
+        sparse=False,
     ):
         """Return the design matrix.
 
@@ -1389,6 +1570,10 @@ class TimingModel(object):
         or d_toa_d_param; it is used in fitting and calculating parameter
         covariances.
 
+        If sparse is True, the matrix is returned as a
+        `scipy.sparse.csc_matrix` holding only the nonzero entries; this
+        saves memory and time for models with many parameters that only
+        affect a few TOAs (JUMPs, DMX, ...).
         """
         params = ["Offset"] if incoffset else []
         params += [
@@ -1398,17 +1583,54 @@ class TimingModel(object):
         F0 = self.F0.quantity  # 1/sec
         ntoas = toas.ntoas
         nparams = len(params)
-        delay = self.delay(toas)
+        # The delays and the phase-delay derivative are shared by all the
+        # parameter derivatives
+        delay, acc_delays = self.component_delays(toas)
+        d_phase_d_delay = self.d_phase_d_delay(toas, delay)
+        # The sparse DMX columns are taken from the DMX block of the delay
+        # derivatives, and the JUMP and glitch columns from the TOAs they
+        # affect, without forming dense columns
+        dmx_columns = {}
+        sparse_columns = {}
+        if sparse and "DispersionDMX" in self.components:
+            block, names = self.components["DispersionDMX"].d_delay_d_DMX_matrix(
+                toas
+            )
+            for ii, name in enumerate(names):
+                if name in params:
+                    entries = slice(block.indptr[ii], block.indptr[ii + 1])
+                    dmx_columns[name] = (
+                        block.indices[entries],
+                        block.data[entries],
+                    )
+        if sparse:
+            sparse_columns = self.d_phase_d_params_sparse(
+                toas, delay, [p for p in params if p not in dmx_columns]
+            )
+        d_phase_d_ps = self.d_phase_d_params(
+            toas,
+            delay,
+            [
+                p
+                for p in params
+                if p != "Offset" and p not in dmx_columns and p not in sparse_columns
+            ],
+            d_phase_d_delay=d_phase_d_delay,
+            acc_delay=acc_delays,
+        )
         units = []
         # Apply all delays ?
         # tt = toas['tdbld']
         # for df in self.delay_funcs:
         #    tt -= df(toas)
 
-        M = np.zeros((ntoas, nparams))
+        if sparse:
+            builder = SparseColumnBuilder(ntoas)
+        else:
+            M = np.zeros((ntoas, nparams))
         for ii, param in enumerate(params):
             if param == "Offset":
-                M[:, ii] = 1.0
+                q = 1.0
                 units.append(u.s / u.s)
             else:
                 # NOTE Here we have negative sign here. Since in pulsar timing
@@ -1416,10 +1638,27 @@ class TimingModel(object):
                 # from the conventional definition of least square definition (Data - model)
                 # We decide to add minus sign here in the design matrix, so the fitter
                 # keeps the conventional way.
-                q = -self.d_phase_d_param(toas, delay, param)
-                M[:, ii] = q
+                if param in dmx_columns:
+                    rows, d_delay = dmx_columns[param]
+                    q = -(d_phase_d_delay.value[rows] * d_delay)
+                elif param in sparse_columns:
+                    rows, d_phase = sparse_columns[param]
+                    q = -d_phase.value
+                else:
+                    q = -d_phase_d_ps[param].value
+                if sparse and scale_by_F0:
+                    # Round to double first, as in the dense matrix
+                    q = np.asarray(q, dtype=float) / F0.value
                 units.append(u.Unit("") / getattr(self, param).units)
+            if param in dmx_columns or param in sparse_columns:
+                builder.append_sparse(rows, q)
+            elif sparse:
+                builder.append(q)
+            else:
+                M[:, ii] = q
 
+        if sparse:
+            M = builder.tocsc()
         if scale_by_F0:
             mask = []
             for ii, un in enumerate(units):
@@ -1427,7 +1666,8 @@ class TimingModel(object):
                     continue
                 units[ii] = un * u.second
                 mask.append(ii)
-            M[:, mask] /= F0.value
+            if not sparse:
+                M[:, mask] /= F0.value
         return M, params, units, scale_by_F0
 
     def compare(self, othermodel, nodmx=True, threshold_sigma=3.0, verbosity="max"):
@@ -2301,6 +2541,39 @@ class DelayComponent(Component):
         super(DelayComponent, self).__init__()
         self.delay_funcs_component = []
 
+    def d_delay_d_params(self, toas, params, acc_delay=None):
+        """Derivatives of this component's delay for several parameters.
+
+        This calls the registered derivative functions one parameter at a
+        time. Components whose derivatives have expensive parts in common
+        override it to compute those only once.
+
+        Parameters
+        ----------
+        toas : `pint.toa.TOAs` object
+        params : list of str
+            Parameters with derivative functions registered by this
+            component.
+        acc_delay : `astropy.units.Quantity`, optional
+            The delay accumulated before this component.
+
+        Returns
+        -------
+        dict
+            The derivative of the delay for each parameter, in seconds per
+            parameter unit.
+        """
+        result = {}
+        for param in params:
+            par = getattr(self, param)
+            deriv = np.longdouble(np.zeros(toas.ntoas) << (u.s / par.units))
+            for df in self.deriv_funcs[param]:
+                deriv += df(toas, param, acc_delay).to(
+                    deriv.unit, equivalencies=u.dimensionless_angles()
+                )
+            result[param] = deriv
+        return result
+
 
 class PhaseComponent(Component):
     def __init__(self):
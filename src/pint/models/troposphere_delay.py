@@ -9,7 +9,8 @@ import numpy as np
 import pint.utils as ut
 import scipy.interpolate
 from astropy import log
-from astropy.coordinates import AltAz, SkyCoord
+from astropy.coordinates import AltAz, EarthLocation, SkyCoord
+from pint.erfautils import gcrs_posvel_from_itrf
 from pint.models.parameter import boolParameter
 from pint.models.timing_model import DelayComponent
 from pint.observatory import get_observatory
@@ -85,6 +86,9 @@ class TroposphereDelay(DelayComponent):
 
     EARTH_R = 6356766 * u.m  # earth radius at 45 degree latitude
 
+    # the cached target altitudes are reused until the target moves further than this
+    ALT_CACHE_TOLERANCE = 1 * u.mas
+
     @staticmethod
     def _herring_map(alt, a, b, c):
         """equation 4 from the Niell mapping function.
@@ -134,11 +138,80 @@ class TroposphereDelay(DelayComponent):
 
     def _get_target_altitude(self, obs, grp, radec):
         """convert the sky coordinates of the target to the angular altitude at each TOA
+
+        This uses the full astropy transformation; troposphere_delay uses the
+        faster _get_cached_altitude instead.
         """
         transformAltaz = AltAz(location=obs, obstime=grp["mjd"])
         alt = radec.transform_to(transformAltaz).alt  # * u.deg
         return alt
 
+    @staticmethod
+    def _get_zenith_vectors(obs, grp):
+        """return the unit vector towards the local (geodetic) zenith at each TOA
+
+        The vectors are in GCRS axes, which are parallel to ICRS ones. The
+        zenith is found in ITRF from the geodetic latitude and longitude and
+        rotated to GCRS by comparing the GCRS positions of the observatory
+        and of a point 1000 km above it.
+        """
+        up = np.array(
+            [
+                np.cos(obs.lat) * np.cos(obs.lon),
+                np.cos(obs.lat) * np.sin(obs.lon),
+                np.sin(obs.lat),
+            ]
+        )
+        xyz = np.array([obs.x.to_value(u.m), obs.y.to_value(u.m), obs.z.to_value(u.m)])
+        above = EarthLocation.from_geocentric(*(xyz + 1e6 * up), unit=u.m)
+        t = grp["mjd"]
+        pos = gcrs_posvel_from_itrf(obs, t).pos.to_value(u.m)
+        pos_above = gcrs_posvel_from_itrf(above, t).pos.to_value(u.m)
+        zenith = (pos_above - pos).T
+        return zenith / np.sqrt(np.sum(zenith ** 2, axis=1))[:, None]
+
+    def _get_cached_altitude(self, toas, obs, grp, loind, hiind, radec):
+        """return the altitude of the target at each TOA of one observatory group
+
+        The geometry that does not depend on the target (the zenith
+        directions) is stored on the TOAs, in ``toas.selection_cache``, so
+        it is computed once per TOAs object. The altitude is then the angle
+        between the horizon and the target direction, corrected for the
+        aberration due to the observatory velocity ``ssb_obs_vel``.
+
+        The altitudes are stored too and reused until the target has moved
+        by more than ALT_CACHE_TOLERANCE or the TOA positions have been
+        recomputed. Refraction is not included, as in the astropy
+        transformation this replaces; unlike that transformation, the
+        deflection of light by the Sun is ignored, which changes the altitude
+        by a fraction of an arcsecond near solar conjunction.
+        """
+        cache = toas.selection_cache
+        key = ("troposphere", grp["obs"][0], loind, hiind)
+        vel = toas.table["ssb_obs_vel"]
+        psr_dir = radec.icrs.cartesian.xyz.value
+        try:
+            zenith, cached_vel, cached_dir, alt = cache[key]
+        except KeyError:
+            zenith = self._get_zenith_vectors(obs, grp)
+            cached_vel = cached_dir = alt = None
+        else:
+            if (
+                cached_vel is vel
+                and np.dot(cached_dir, psr_dir)
+                >= np.cos(self.ALT_CACHE_TOLERANCE.to_value(u.rad))
+            ):
+                return alt
+        beta = vel[loind:hiind].quantity.to_value(u.km / u.s) / (
+            const.c.to_value(u.km / u.s)
+        )
+        apparent = psr_dir + beta
+        apparent /= np.sqrt(np.sum(apparent ** 2, axis=1))[:, None]
+        sin_alt = np.clip(np.sum(zenith * apparent, axis=1), -1.0, 1.0)
+        alt = (np.arcsin(sin_alt) * u.rad).to(u.deg)
+        cache[key] = zenith, vel, psr_dir, alt
+        return alt
+
     def _get_target_skycoord(self):
         """return the sky coordinates for the target, either from equatorial or ecliptic coordinates
         """
@@ -184,7 +257,10 @@ class TroposphereDelay(DelayComponent):
 
                 obs = obsobj.earth_location_itrf()
 
-                alt = self._get_target_altitude(obs, grp, radec)
+                # delay_model changes invalid altitudes in place
+                alt = self._get_cached_altitude(
+                    toas, obs, grp, loind, hiind, radec
+                ).copy()
 
                 # now actually calculate the atmospheric delay based on the models
 
@@ -213,6 +213,14 @@ class Observatory(object):
         # TOA metadata which may be necessary in some cases.
         raise NotImplementedError
 
+    def clock_files(self):
+        """Returns a list of the clock files that clock_corrections() reads
+        with the current settings (include_gps, include_bipm, etc.).
+
+        This is used to decide whether stored clock-corrected TOAs are
+        still valid."""
+        return []
+
     def get_TDBs(self, t, method="default", ephem=None, options=None, grp=None):
         """This is a high level function for converting TOAs to TDB time scale.
 
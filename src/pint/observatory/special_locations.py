@@ -107,6 +107,14 @@ class SpecialLocation(Observatory):
         )
         return os.path.join(os.getenv("TEMPO2"), "clock", fname)
 
+    def clock_files(self):
+        files = []
+        if self.include_gps:
+            files.append(self.gps_fullpath)
+        if self.include_bipm:
+            files.append(self.bipm_fullpath)
+        return files
+
     def clock_corrections(self, t):
         corr = numpy.zeros(t.shape) * u.s
         if self.include_gps:
@@ -171,6 +179,9 @@ class BarycenterObs(SpecialLocation):
             origin="ssb",
         )
 
+    def clock_files(self):
+        return []
+
     def clock_corrections(self, t):
         log.info("Special observatory location. No clock corrections applied.")
         return numpy.zeros(t.shape) * u.s
@@ -206,6 +206,18 @@ class TopoObs(Observatory):
     def earth_location_itrf(self, time=None):
         return self._loc_itrf
 
+    def clock_files(self):
+        files = (
+            list(self.clock_fullpath)
+            if self._multiple_clock_files
+            else [self.clock_fullpath]
+        )
+        if self.include_gps:
+            files.append(self.gps_fullpath)
+        if self.include_bipm:
+            files.append(self.bipm_fullpath)
+        return [f for f in files if f is not None]
+
     def clock_corrections(self, t):
         """Compute the total clock corrections,
 
@@ -8,8 +8,9 @@ import collections
 
 import numpy as np
 import scipy.linalg
+from astropy import log
 from scipy.linalg import block_diag
-from scipy.optimize import fsolve, newton
+from scipy.optimize import fsolve
 
 # FIXME: can I import this from somewhere?
 G = 36768.59290949113  # Based on standard gravitational parameter
@@ -45,6 +46,92 @@ def true_from_eccentric(e, eccentric_anomaly):
     return true_anomaly, true_anomaly_de, true_anomaly_prime
 
 
+def solve_kepler(e, mean_anomaly, guess=None, tol=5e-15, maxiter=50):
+    """Solve Kepler's equation E - e*sin(E) = M for the eccentric anomaly.
+
+    Halley's method is applied to all the elements at once, but each element
+    leaves the iteration as soon as it has converged, so a few hard cases
+    (high eccentricity, M near periastron) do not keep the whole array
+    iterating. The starting point is the second-order series in e for
+    e < 0.8 and M + 0.85*e*sign(sin(M)) (Danby 1987) above that; both
+    converge in a few steps.
+
+    Parameters
+    ----------
+    e : array_like
+        The eccentricity, in [0, 1).
+    mean_anomaly : array_like
+        The mean anomaly in radians, preferably reduced to [0, 2*pi); far from
+        zero its rounding error can exceed tol.
+    guess : array_like, optional
+        Approximate eccentric anomalies, for example the solution for
+        slightly different parameters. Elements where it is not close to a
+        solution start from the default point instead.
+    tol : float, optional
+        Convergence criterion on abs(E - e*sin(E) - M).
+    maxiter : int, optional
+        The maximum number of iterations.
+
+    Returns
+    -------
+    array
+        The eccentric anomaly in radians, with the broadcast shape and dtype
+        of the inputs.
+    """
+    e, mean_anomaly = np.asarray(e), np.asarray(mean_anomaly)
+    e = e.astype(np.result_type(e, mean_anomaly, float))
+    e, mean_anomaly = np.broadcast_arrays(e, mean_anomaly)
+    if np.any(e < 0) or np.any(e >= 1):
+        raise ValueError("Eccentricity should be in the range of [0,1).")
+    e = e.ravel()
+    ma = mean_anomaly.ravel()
+    E = np.empty(ma.shape, dtype=np.result_type(e, ma))
+    sin_E = np.empty_like(E)
+    if guess is None:
+        cold = np.arange(len(E))
+    else:
+        E[:] = np.broadcast_to(guess, mean_anomaly.shape).ravel()
+        sin_E[:] = np.sin(E)
+        # Guesses this far off are not worth refining
+        cold = np.flatnonzero(~(np.abs(E - e * sin_E - ma) < 1e-6))
+    if len(cold) > 0:
+        e_c, ma_c = e[cold], ma[cold]
+        sin_ma = np.sin(ma_c)
+        E_c = np.where(
+            e_c < 0.8,
+            ma_c + e_c * sin_ma * (1 + e_c * np.cos(ma_c)),
+            ma_c + 0.85 * e_c * np.sign(sin_ma),
+        )
+        E[cold] = E_c
+        sin_E[cold] = np.sin(E_c)
+    f = E - e * sin_E - ma
+    active = np.flatnonzero(np.abs(f) > tol)
+    f = f[active]
+    for i in range(maxiter):
+        if len(active) == 0:
+            break
+        e_a = e[active]
+        E_a = E[active]
+        # f' = 1 - e*cos(E), f'' = e*sin(E)
+        d1 = 1 - e_a * np.cos(E_a)
+        d2 = e_a * sin_E[active]
+        E_a = E_a - f / (d1 - f * d2 / (2 * d1))
+        sin_E_a = np.sin(E_a)
+        E[active] = E_a
+        sin_E[active] = sin_E_a
+        f = E_a - e_a * sin_E_a - ma[active]
+        unconverged = np.abs(f) > tol
+        active = active[unconverged]
+        f = f[unconverged]
+    else:
+        if len(active) > 0:
+            log.warning(
+                "Kepler's equation did not converge to %g in %d iterations for "
+                "%d of %d values" % (tol, maxiter, len(active), E.size)
+            )
+    return E.reshape(mean_anomaly.shape)[()]
+
+
 def eccentric_from_mean(e, mean_anomaly):
     """Compute the eccentric anomaly from the mean anomaly.
 
@@ -62,10 +149,9 @@ def eccentric_from_mean(e, mean_anomaly):
     derivatives : float
         pair of derivatives with respect to the two inputs
     """
-    eccentric_anomaly = newton(
-        lambda E: E - e * np.sin(E) - mean_anomaly,
-        mean_anomaly,
-        lambda E: 1 - e * np.cos(E),
+    orbits = np.floor(mean_anomaly / (2 * np.pi))
+    eccentric_anomaly = (
+        solve_kepler(e, mean_anomaly - 2 * np.pi * orbits) + 2 * np.pi * orbits
     )
     eccentric_anomaly_de = np.sin(eccentric_anomaly) / (
         1 - e * np.cos(eccentric_anomaly)
@@ -3,6 +3,7 @@ and the covariance matrix
 """
 
 import numpy as np
+import scipy.sparse
 from itertools import combinations
 import astropy.units as u
 from collections import OrderedDict
@@ -15,15 +16,106 @@ __all__ = [
     "CovarianceMatrix",
     "combine_design_matrices_by_quantity",
     "combine_design_matrices_by_param",
+    "SparseColumnBuilder",
+    "sparse_normal_matrix",
 ]
 
 
+class SparseColumnBuilder:
+    """Assemble a sparse matrix one dense column at a time.
+
+    Only the nonzero entries of each column are kept, so the memory used
+    grows with the number of nonzero entries rather than with the size of
+    the matrix.
+
+    Parameters
+    ----------
+    nrows : int
+        The number of rows of the matrix.
+    """
+
+    def __init__(self, nrows):
+        self.nrows = nrows
+        self.indices = []
+        self.data = []
+        self.indptr = [0]
+
+    def append(self, column):
+        """Add a column to the right of the matrix."""
+        column = np.asarray(column, dtype=float)
+        if column.ndim == 0:
+            column = np.full(self.nrows, column)
+        nz = np.flatnonzero(column)
+        self.indices.append(nz)
+        self.data.append(column[nz])
+        self.indptr.append(self.indptr[-1] + len(nz))
+
+    def append_sparse(self, indices, data):
+        """Add a column given by its nonzero entries to the right of the matrix."""
+        self.indices.append(np.asarray(indices))
+        self.data.append(np.asarray(data, dtype=float))
+        self.indptr.append(self.indptr[-1] + len(indices))
+
+    def tocsc(self):
+        """Return the columns as a `scipy.sparse.csc_matrix`."""
+        if len(self.data) == 0:
+            return scipy.sparse.csc_matrix((self.nrows, 0))
+        return scipy.sparse.csc_matrix(
+            (np.concatenate(self.data), np.concatenate(self.indices), self.indptr),
+            shape=(self.nrows, len(self.data)),
+        )
+
+
+def sparse_normal_matrix(matrix, weights=None, dense_fraction=0.1):
+    """Compute M^T W M for a sparse matrix M and a diagonal weight matrix W.
+
+    Columns with more than dense_fraction of their entries nonzero (the
+    spin-down or astrometric derivatives, Fourier noise bases, ...) are
+    treated as a dense block, whose products are done by BLAS; the products
+    involving the other columns only visit their nonzero entries.
+
+    Parameters
+    ----------
+    matrix : `scipy.sparse.spmatrix`
+        The (nrows, ncols) matrix M.
+    weights : `numpy.ndarray`, optional
+        The diagonal of W. Default is all ones.
+    dense_fraction : float, optional
+        The fraction of nonzero entries above which a column is dense.
+
+    Returns
+    -------
+    `numpy.ndarray`
+        The dense (ncols, ncols) matrix M^T W M.
+    """
+    matrix = scipy.sparse.csc_matrix(matrix)
+    nrows, ncols = matrix.shape
+    if weights is None:
+        weights = np.ones(nrows)
+    nnz = np.diff(matrix.indptr)
+    is_dense = nnz > dense_fraction * nrows
+    dense = np.flatnonzero(is_dense)
+    sparse = np.flatnonzero(~is_dense)
+    D = matrix[:, dense].toarray()
+    S = matrix[:, sparse]
+    WD = weights[:, None] * D
+    cross = S.T @ WD
+    result = np.empty((ncols, ncols))
+    result[np.ix_(dense, dense)] = np.dot(D.T, WD)
+    result[np.ix_(sparse, dense)] = cross
+    result[np.ix_(dense, sparse)] = cross.T
+    result[np.ix_(sparse, sparse)] = (
+        S.T @ (scipy.sparse.diags(weights) @ S)
+    ).toarray()
+    return result
+
+
 class PintMatrix:
     """PINT matrix is a base class for PINT fitters matrix.
 
     Parameters
     ----------
-    data : `numpy.ndarray`
+    data : `numpy.ndarray` or `scipy.sparse.spmatrix`
         Matrix data.
 
     axis_labels : list of dictionary
@@ -199,7 +291,7 @@ class DesignMatrix(PintMatrix):
 
     Parameters
     ----------
-    matrix : `numpy.ndarray`
+    matrix : `numpy.ndarray` or `scipy.sparse.csc_matrix`
         Design matrix values.
     axis_labels : list of dictionary
         The labels of the axises. Each list element contains the names and
@@ -220,6 +312,11 @@ class DesignMatrix(PintMatrix):
         super(DesignMatrix, self).__init__(matrix, labels)
         self.scaled_by_F0 = False
 
+    @property
+    def sparse(self):
+        """Whether the matrix is stored as a `scipy.sparse` matrix."""
+        return scipy.sparse.issparse(self.matrix)
+
     @property
     def param_units(self):
         param_lb = self.get_axis_labels(1)
@@ -268,7 +365,13 @@ class DesignMatrixMaker:
         self.deriv_func_name = "d_{}_d_param".format(self.derivative_quantity)
 
     def __call__(
-        self, data, model, derivative_params, offset=False, offset_padding=0.0
+        self,
+        data,
+        model,
+        derivative_params,
+        offset=False,
+        offset_padding=0.0,
+        sparse=False,
     ):
         """ A general method to make design matrix.
 
@@ -285,6 +388,8 @@ class DesignMatrixMaker:
             This is match the current phase offset in the design matrix.
         offset_padding : float, optional
             if including offset, the value for padding.
+        sparse : bool, optional
+            Return the matrix as a `scipy.sparse.csc_matrix`. Default is False.
         """
         # Get derivative functions
         deriv_func = getattr(model, self.deriv_func_name)
@@ -292,21 +397,30 @@ class DesignMatrixMaker:
         params = ["Offset"] if offset else []
         params += derivative_params
         labels = []
-        M = np.zeros((len(data), len(params)))
-        labels.append({self.derivative_quantity: (0, M.shape[0], self.quantity_unit)})
+        if sparse:
+            builder = SparseColumnBuilder(len(data))
+        else:
+            M = np.zeros((len(data), len(params)))
+        labels.append({self.derivative_quantity: (0, len(data), self.quantity_unit)})
         labels_dim2 = {}
         for ii, param in enumerate(params):
             if param == "Offset":
-                M[:, ii] = offset_padding
+                column = offset_padding
                 param_unit = u.Unit("")
             else:
                 param_unit = getattr(model, param).units
                 q = deriv_func(data, param).to(self.quantity_unit / param_unit)
                 # This will strip the units
-                M[:, ii] = q
+                column = q.value
+            if sparse:
+                builder.append(column)
+            else:
+                M[:, ii] = column
             labels_dim2[param] = (ii, ii + 1, param_unit)
 
         labels.append(labels_dim2)
+        if sparse:
+            M = builder.tocsc()
         return DesignMatrix(M, labels)
 
 
@@ -322,6 +436,7 @@ class PhaseDesignMatrixMaker(DesignMatrixMaker):
         scaled_by_F0=True,
         offset=True,
         offset_padding=1.0,
+        sparse=False,
     ):
         """ Create the phase design matrix.
 
@@ -339,42 +454,77 @@ class PhaseDesignMatrixMaker(DesignMatrixMaker):
             Add the an offset to the beginning of design matrix. Default is True.
         offset_padding : float, optional
             if including offset, the value for padding. Default is 1.0
+        sparse : bool, optional
+            Return the matrix as a `scipy.sparse.csc_matrix`. Default is False.
         """
-        deriv_func = getattr(model, self.deriv_func_name)
         # Check if the derivate quantity a phase derivative
         params = ["Offset"] if offset else []
         params += derivative_params
         labels = []
-        M = np.zeros((data.ntoas, len(params)))
-        labels.append({self.derivative_quantity: (0, M.shape[0], self.quantity_unit)})
+        if sparse:
+            builder = SparseColumnBuilder(data.ntoas)
+        else:
+            M = np.zeros((data.ntoas, len(params)))
+        labels.append({self.derivative_quantity: (0, data.ntoas, self.quantity_unit)})
         labels_dim2 = {}
-        delay = model.delay(data)
+        # Shared by all the parameter derivatives
+        delay, acc_delays = model.component_delays(data)
+        d_phase_d_delay = model.d_phase_d_delay(data, delay)
+        # JUMP and glitch columns are only computed for the TOAs they affect
+        sparse_columns = {}
+        if sparse:
+            sparse_columns = model.d_phase_d_params_sparse(
+                data, delay, [p for p in params if p != "Offset"]
+            )
+        d_phase_d_ps = model.d_phase_d_params(
+            data,
+            delay,
+            [p for p in params if p != "Offset" and p not in sparse_columns],
+            d_phase_d_delay=d_phase_d_delay,
+            acc_delay=acc_delays,
+        )
         for ii, param in enumerate(params):
             if param == "Offset":
-                M[:, ii] = offset_padding
+                column = offset_padding
                 param_unit = u.Unit("")
             else:
                 param_unit = getattr(model, param).units
                 # Since this is the phase derivative, we know the quantity unit.
-                q = deriv_func(data, delay, param).to(u.Unit("") / param_unit)
+                if param in sparse_columns:
+                    rows, q = sparse_columns[param]
+                else:
+                    q = d_phase_d_ps[param]
+                q = q.to(u.Unit("") / param_unit)
 
                 # NOTE Here we have negative sign here. Since in pulsar timing
                 # the residuals are calculated as (Phase - int(Phase)), which is different
                 # from the conventional definition of least square definition (Data - model)
                 # We decide to add minus sign here in the design matrix, so the fitter
                 # keeps the conventional way.
-                M[:, ii] = -q
+                column = -q.value
+                if sparse and scaled_by_F0:
+                    # Round to double first, as in the dense matrix
+                    column = np.asarray(column, dtype=float) / model.F0.value
+            if param in sparse_columns:
+                builder.append_sparse(rows, column)
+            elif sparse:
+                builder.append(column)
+            else:
+                M[:, ii] = column
             labels_dim2[param] = (ii, ii + 1, param_unit)
 
         labels.append(labels_dim2)
 
+        if sparse:
+            M = builder.tocsc()
         if scaled_by_F0:
-            mask = []
-            for ii, param in enumerate(params):
-                if param == "Offset":
-                    continue
-                mask.append(ii)
-            M[:, mask] /= model.F0.value
+            if not sparse:
+                mask = []
+                for ii, param in enumerate(params):
+                    if param == "Offset":
+                        continue
+                    mask.append(ii)
+                M[:, mask] /= model.F0.value
             # TODO maybe use defined label is better
             labels[0] = {
                 self.derivative_quantity: (0, M.shape[0], self.quantity_unit * u.s)
@@ -395,9 +545,22 @@ class TOADesignMatrixMaker(PhaseDesignMatrixMaker):
         # The derivative function should be a wrapper function like d_phase_d_param()
         self.deriv_func_name = "d_phase_d_param"
 
-    def __call__(self, data, model, derivative_params, offset=True, offset_padding=1.0):
+    def __call__(
+        self,
+        data,
+        model,
+        derivative_params,
+        offset=True,
+        offset_padding=1.0,
+        sparse=False,
+    ):
         d_matrix = super().__call__(
-            data, model, derivative_params, offset=offset, offset_padding=offset_padding
+            data,
+            model,
+            derivative_params,
+            offset=offset,
+            offset_padding=offset_padding,
+            sparse=sparse,
         )
         return d_matrix
 
@@ -410,14 +573,19 @@ class NoiseDesignMatrixMaker(DesignMatrixMaker):
     TODO: give proper labels.
     """
 
-    def __call__(self, data, model):
+    def __call__(self, data, model, sparse=False):
         result = []
         if len(model.basis_funcs) == 0:
             return None
 
         for nf in model.basis_funcs:
             result.append(nf(data)[0])
-        M = np.hstack([r for r in result])
+        if sparse:
+            M = scipy.sparse.hstack(
+                [scipy.sparse.csc_matrix(r) for r in result], format="csc"
+            )
+        else:
+            M = np.hstack([r for r in result])
         labels = [
             {"toa": (0, M.shape[0], u.s)},
             {"toa_noise_params": (0, M.shape[1], u.s)},
@@ -436,6 +604,8 @@ def combine_design_matrices_by_quantity(design_matrices):
     """ A fast method to combine two design matrix along the derivative
     quantity. If requires the parameter list match to each other.
 
+    If any of the input matrices is sparse, the result is a sparse matrix.
+
     Parameters
     ----------
     design_matrices: `pint_matrix.DesignMatrix` object
@@ -466,7 +636,11 @@ def combine_design_matrices_by_quantity(design_matrices):
                 off_set = new_labels[-1][1][1]
             axis_labels[0].update(dict(new_labels))
         all_matrix.append(d_matrix.matrix)
-    result = DesignMatrix(np.vstack(all_matrix), axis_labels)
+    if any(scipy.sparse.issparse(m) for m in all_matrix):
+        combined = scipy.sparse.vstack(all_matrix, format="csc")
+    else:
+        combined = np.vstack(all_matrix)
+    result = DesignMatrix(combined, axis_labels)
     return result
 
 
@@ -482,7 +656,17 @@ def combine_design_matrices_by_param(matrix1, matrix2, padding=0.0):
     padding : float, optional
         The padding number if the derivative quantity is independent from the
         parameters. Default is 0.0.
+
+    Note
+    ----
+    If either of the input matrices is sparse, the result is a sparse matrix;
+    padding then has to be zero.
     """
+    sparse = scipy.sparse.issparse(matrix1.matrix) or scipy.sparse.issparse(
+        matrix2.matrix
+    )
+    if sparse and padding != 0.0:
+        raise ValueError("Sparse design matrices can only be padded with zeros.")
     # init the quantity axis.
     axis_labels = copy.deepcopy(matrix1.axis_labels)
 
@@ -531,24 +715,54 @@ def combine_design_matrices_by_param(matrix1, matrix2, padding=0.0):
                 append_offset + append_size,
             )
             append_offset += append_size
-            append_data = np.zeros((append_size, matrix2.shape[1]))
-            append_data.fill(padding)
-            base_matrix = np.vstack((base_matrix, append_data))
+            if sparse:
+                append_data = scipy.sparse.csc_matrix(
+                    (append_size, base_matrix.shape[1])
+                )
+                base_matrix = scipy.sparse.vstack(
+                    (base_matrix, append_data), format="csc"
+                )
+            else:
+                append_data = np.zeros((append_size, base_matrix.shape[1]))
+                append_data.fill(padding)
+                base_matrix = np.vstack((base_matrix, append_data))
 
         axis_labels[0].update(
             {d_quantity: new_quantity_index[d_quantity] + (quantity_label[2],)}
         )
 
     # Combine matrix
-    # make default new matrix with the rigth size
-    new_matrix = np.zeros((base_matrix.shape[0], matrix2.shape[1]))
-    new_matrix.fill(padding)
-    # Fill up the new_matrix with matrix2
-    for quantity, new_idx in new_quantity_index.items():
-        old_idx = matrix2.get_label_along_axis(0, d_quantity)[2:4]
-        new_matrix[new_idx[0] : new_idx[1], :] = matrix2.matrix[
-            old_idx[0] : old_idx[1], :
-        ]
+    if sparse:
+        # Stack the blocks of matrix2 in the row order of the combined
+        # matrix, with empty blocks for the quantities it does not have
+        matrix2_csc = scipy.sparse.csc_matrix(matrix2.matrix)
+        blocks = []
+        row = 0
+        for quantity, new_idx in sorted(
+            new_quantity_index.items(), key=lambda item: item[1]
+        ):
+            if new_idx[0] > row:
+                blocks.append(
+                    scipy.sparse.csc_matrix((new_idx[0] - row, matrix2.shape[1]))
+                )
+            old_idx = matrix2.get_label_along_axis(0, quantity)[2:4]
+            blocks.append(matrix2_csc[old_idx[0] : old_idx[1], :])
+            row = new_idx[1]
+        if base_matrix.shape[0] > row:
+            blocks.append(
+                scipy.sparse.csc_matrix((base_matrix.shape[0] - row, matrix2.shape[1]))
+            )
+        new_matrix = scipy.sparse.vstack(blocks, format="csc")
+    else:
+        # make default new matrix with the rigth size
+        new_matrix = np.zeros((base_matrix.shape[0], matrix2.shape[1]))
+        new_matrix.fill(padding)
+        # Fill up the new_matrix with matrix2
+        for quantity, new_idx in new_quantity_index.items():
+            old_idx = matrix2.get_label_along_axis(0, quantity)[2:4]
+            new_matrix[new_idx[0] : new_idx[1], :] = matrix2.matrix[
+                old_idx[0] : old_idx[1], :
+            ]
 
     new_param_label = []
     param_offset = matrix1.shape[1]
@@ -560,7 +774,10 @@ def combine_design_matrices_by_param(matrix1, matrix2, padding=0.0):
 
     axis_labels[1].update(dict(new_param_label))
     # append the new matrix
-    result = np.hstack([base_matrix, new_matrix])
+    if sparse:
+        result = scipy.sparse.hstack([base_matrix, new_matrix], format="csc")
+    else:
+        result = np.hstack([base_matrix, new_matrix])
     return DesignMatrix(result, axis_labels)
 
 
@@ -707,6 +707,7 @@ class PlkWidget(tk.Frame):
         for dict in self.psr.all_toas.table["flags"]:
             if "jump" in dict.keys():
                 del dict["jump"]
+        self.psr.all_toas.clear_flag_cache()
         filename = tkFileDialog.asksaveasfilename(title="Choose output tim file")
         try:
             log.info("Choose output file %s" % filename)
@@ -295,6 +295,8 @@ class Pulsar(object):
                 dict1["jump"] = 1
                 dict2["gui_jump"] = 1
                 dict2["jump"] = 1
+            self.all_toas.clear_flag_cache()
+            self.selected_toas.clear_flag_cache()
             return param.name
         # if gets here, has at least one jump param already
         # if doesnt overlap or cancel, add the param
@@ -319,6 +321,7 @@ class Pulsar(object):
                 # apply to dictionaries for future use
                 for dict in self.all_toas.table["flags"][mask]:
                     dict["jump"] = jump_par.index
+            self.all_toas.clear_flag_cache()
             jump_nums = [
                 int(dict["jump"]) if "jump" in dict.keys() else np.nan
                 for dict in self.all_toas.table["flags"]
@@ -343,6 +346,7 @@ class Pulsar(object):
                         del dict2["jump"]
                         if "gui_jump" in dict2.keys():
                             del dict2["gui_jump"]
+                self.selected_toas.clear_flag_cache()
                 nums_subset = range(num + 1, numjumps + 1)
                 for n in nums_subset:
                     # iterate through jump params and rename them so that they are always in numerical order starting with JUMP1
@@ -356,6 +360,7 @@ class Pulsar(object):
                             if "gui_jump" in dict.keys():
                                 dict["gui_jump"] = n - 1
                                 param.key_value = n - 1
+                    self.all_toas.clear_flag_cache()
                     newpar = param.new_param(index=(n - 1), copy_all=True)
                     self.prefit_model.add_param_from_top(newpar, "PhaseJump")
                     self.prefit_model.remove_param(param.name)
@@ -390,6 +395,8 @@ class Pulsar(object):
             dict1["gui_jump"] = numjumps + 1
             dict2["jump"] = numjumps + 1
             dict2["gui_jump"] = numjumps + 1
+        self.all_toas.clear_flag_cache()
+        self.selected_toas.clear_flag_cache()
         param = pint.models.parameter.maskParameter(
             name="JUMP",
             index=numjumps + 1,
@@ -455,6 +462,7 @@ class Pulsar(object):
                     # apply to dictionaries for future use
                     for dict in self.all_toas.table["flags"][mask]:
                         dict["jump"] = jump_par.index
+                self.all_toas.clear_flag_cache()
                 jumps = [
                     True
                     if "jump" in dict.keys() and dict["jump"] in fit_jumps
@@ -490,6 +498,8 @@ class Pulsar(object):
                 # re-add the jump using overlap as 'selected'
                 for dict in self.all_toas.table["flags"][overlap]:
                     dict["jump"] = num
+            self.all_toas.clear_flag_cache()
+            self.selected_toas.clear_flag_cache()
 
         if self.fitted:
             self.prefit_model = self.postfit_model
@@ -121,18 +121,18 @@ class TimWidget(tk.Frame):
             pnChange = True
             for i in range(len(toas.table["flags"])):
                 toas.table["flags"][i]["pn"] = toas.table["pn"][i]
-        for time, err, freq, obs, flags in zip(
-            toas.table["mjd"],
+        # Remove the clock corrections so the file holds the original times
+        times = toas.table["mjd"]
+        if "clkcorr" in toas.table.colnames:
+            times = times - astropy.time.TimeDelta(toas.table["clkcorr"].quantity)
+        for time_out, err, freq, obs, flags in zip(
+            times,
             toas.table["error"].quantity,
             toas.table["freq"].quantity,
             toas.table["obs"],
             toas.table["flags"],
         ):
             obs_obj = pint.observatory.Observatory.get(obs)
-            if "clkcorr" in flags.keys():
-                time_out = time - astropy.time.TimeDelta(flags["clkcorr"])
-            else:
-                time_out = time
             asfile += pint.toa.format_toa_line(
                 time_out, err, freq, obs_obj, name="pint", flags=flags, format="TEMPO2"
             )
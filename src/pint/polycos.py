@@ -6,9 +6,12 @@ information and the polynomial coefficients
 """
 from __future__ import absolute_import, division, print_function
 
+import threading
+
 import astropy.table as table
 import astropy.units as u
 import numpy as np
+from astropy import log
 from astropy.io import registry
 from astropy.time import Time
 
@@ -23,6 +26,8 @@ __all__ = [
     "tempo_polyco_table_reader",
     "tempo_polyco_table_writer",
     "Polycos",
+    "RollingPolycos",
+    "SimulatedClock",
 ]
 
 
@@ -368,7 +373,7 @@ def tempo_polyco_table_writer(polycoTable, filename="polyco.dat"):
         rphase = str(rph)[0:19].ljust(20)
         f0 = ("%.12lf" % entry.f0).ljust(38 - 21 + 1)
         obs = entry.obs.ljust(43 - 39 + 1)
-        tspan = str(round(entry.mjdspan.to("min").value, 4))[0].ljust(49 - 44 + 1)
+        tspan = str(round(entry.mjdspan.to("min").value, 4)).ljust(49 - 44 + 1)
         if len(tspan) >= (49 - 44 + 1):  # Hack to fix read errors in python
             tspan = tspan + " "
         ncoeff = str(entry.ncoeff).ljust(54 - 50 + 1)
@@ -386,6 +391,99 @@ def tempo_polyco_table_writer(polycoTable, filename="polyco.dat"):
     f.close()
 
 
+def _polyco_table(entryList):
+    """Make a polyco table from a list of rows, as made by generate_polycos."""
+    return table.Table(
+        rows=entryList,
+        names=(
+            "psr",
+            "date",
+            "utc",
+            "tmid",
+            "dm",
+            "doppler",
+            "logrms",
+            "binary_phase",
+            "mjd_span",
+            "t_start",
+            "t_stop",
+            "obs",
+            "obsfreq",
+            "entry",
+        ),
+        meta={"name": "Polyco Data Table"},
+    )
+
+
+def _polyco_date_utc(tmid):
+    """Format the middle times of polyco segments for the table.
+
+    Returns the date (dd-mmm-yy) and UTC (hhmmss.ss...) strings of each
+    middle time (MJD, UTC) in the tempo style.
+    """
+    month = [
+        "Jan",
+        "Feb",
+        "Mar",
+        "Apr",
+        "May",
+        "Jun",
+        "Jul",
+        "Aug",
+        "Sep",
+        "Oct",
+        "Nov",
+        "Dec",
+    ]
+    tmid = np.atleast_1d(tmid)
+    midTime = Time(
+        tmid.astype(int), np.modf(tmid)[0], format="mjd", scale="utc"
+    ).iso
+    dates = []
+    utcs = []
+    for iso in np.atleast_1d(midTime):
+        date, hms = iso.split()
+        yy, mm, dd = date.split("-")
+        dates.append(dd + "-" + month[int(mm) - 1] + "-" + yy[2:4])
+        utcs.append(hms.replace(":", ""))
+    return dates, utcs
+
+
+def _polyfit_batch(x, y, ncoeff):
+    """Least-squares fit of polynomials to many data sets at once.
+
+    This does what ``np.polyfit(x[i], y[i], ncoeff - 1)[::-1]`` does for each
+    row i, scaling the columns of the Vandermonde matrices the same way, but
+    solves all the fits with one (stacked) singular value decomposition.
+
+    Parameters
+    ----------
+    x, y : numpy.ndarray
+        Arrays of shape (nfit, npoints).
+    ncoeff : int
+        Number of coefficients.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (nfit, ncoeff); the coefficients in increasing
+        order of power.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    lhs = x[:, :, np.newaxis] ** np.arange(ncoeff)
+    scale = np.sqrt((lhs * lhs).sum(axis=1))
+    lhs /= scale[:, np.newaxis, :]
+    uu, ss, vt = np.linalg.svd(lhs, full_matrices=False)
+    # The same cutoff as np.polyfit/np.linalg.lstsq
+    rcond = x.shape[1] * np.finfo(x.dtype).eps
+    good = ss > rcond * ss[:, :1]
+    inv_ss = np.where(good, 1.0 / np.where(good, ss, 1.0), 0.0)
+    uty = np.einsum("ijk,ij->ik", uu, y)
+    coeffs = np.einsum("ikj,ik->ij", vt, inv_ss * uty)
+    return coeffs / scale
+
+
 class Polycos(object):
     """
     A class for polycos model. Polyco is a fast phase calculator. It fits a set
@@ -406,6 +504,8 @@ class Polycos(object):
         self.fileFormat = None
         self.newFileName = None
         self.polycoTable = None
+        self._eval_arrays = None
+        self._eval_arrays_key = None
         self.polycoFormat = [
             {
                 "format": "tempo",
@@ -506,6 +606,7 @@ class Polycos(object):
         maxha=12.0,
         method="TEMPO",
         numNodes=20,
+        batch=True,
     ):
         """
         Generate the polyco data.
@@ -544,6 +645,13 @@ class Polycos(object):
             Number of nodes for fitting. It cannot be less then the number of
             coefficents.
 
+        batch : bool optional. Default True
+            Compute all the segments together: the middle points and nodes
+            of all segments go into one TOAs object, the model phase is
+            computed once, and the polynomials are fitted in one vectorized
+            least-squares pass. If False, each segment is computed on its
+            own, which gives the same table but is much slower.
+
         Return
         ---------
         A polyco table.
@@ -552,26 +660,8 @@ class Polycos(object):
         """
         mjdStart = data2longdouble(mjdStart) * u.day
         mjdEnd = data2longdouble(mjdEnd) * u.day
-        timeLength = mjdEnd - mjdStart
         segLength = data2longdouble(segLength) * u.min
         obsFreq = float(obsFreq)
-        month = [
-            "Jan",
-            "Feb",
-            "Mar",
-            "Apr",
-            "May",
-            "Jun",
-            "Jul",
-            "Aug",
-            "Sep",
-            "Oct",
-            "Nov",
-            "Dec",
-        ]
-        # Alocate memery
-        coeffs = data2longdouble(np.zeros(ncoeff))
-        entryList = []
         entryIntvl = np.arange(mjdStart.value, mjdEnd.value, segLength.to("day").value)
         if entryIntvl[-1] < mjdEnd.value:
             entryIntvl = np.append(entryIntvl, mjdEnd.value)
@@ -583,107 +673,151 @@ class Polycos(object):
         # generate the ploynomial coefficents
         if method == "TEMPO":
             # Using tempo1 method to create polycos
-            for i in range(len(entryIntvl) - 1):
-                tStart = entryIntvl[i]
-                tStop = entryIntvl[i + 1]
-                nodes = np.linspace(tStart, tStop, numNodes)
-                tmid = ((tStart + tStop) / 2.0) * u.day
-                toaMid = toa.get_TOAs_list(
-                    [
-                        toa.TOA(
-                            (np.modf(tmid.value)[1], np.modf(tmid.value)[0]),
-                            obs=obs,
-                            freq=obsFreq,
-                        )
-                    ]
-                )
-                refPhase = model.phase(toaMid)
-                mjdSpan = ((tStop - tStart) * u.day).to("min")
-                # Create node toas(Time sample using TOA class)
-                toaList = [
-                    toa.TOA(
-                        (np.modf(toaNode)[1], np.modf(toaNode)[0]),
-                        obs=obs,
-                        freq=obsFreq,
-                    )
-                    for toaNode in nodes
-                ]
-
-                toas = toa.get_TOAs_list(toaList)
-
-                ph = model.phase(toas)
-                dt = (nodes * u.day - tmid).to("min")  # Use constant
-                rdcPhase = ph - refPhase
-                rdcPhase = (
-                    rdcPhase.int - (dt.value * model.F0.value * 60.0) + rdcPhase.frac
-                )
-                dtd = dt.value.astype(float)  # Truncate to double
-                rdcPhased = rdcPhase.astype(float)
-                coeffs = np.polyfit(dtd, rdcPhased, ncoeff - 1)
-                coeffs = coeffs[::-1]
-                midTime = Time(
-                    int(tmid.value), np.modf(tmid.value)[0], format="mjd", scale="utc"
-                )
-                date, hms = midTime.iso.split()
-                yy, mm, dd = date.split("-")
-                date = dd + "-" + month[int(mm) - 1] + "-" + yy[2:4]
-                hms = hms.replace(":", "")
-                entry = PolycoEntry(
-                    tmid.value,
-                    mjdSpan.to("day").value,
-                    refPhase.int,
-                    refPhase.frac,
-                    model.F0.value,
-                    ncoeff,
-                    coeffs,
+            if batch:
+                entryList = self._tempo_entries_batch(
+                    model,
+                    entryIntvl[:-1],
+                    entryIntvl[1:],
                     obs,
+                    ncoeff,
+                    obsFreq,
+                    numNodes,
                 )
-                entryList.append(
-                    (
-                        model.PSR.value,
-                        date,
-                        hms,
-                        tmid.value,
-                        model.DM.value,
-                        0.0,
-                        0.0,
-                        0.0,
-                        mjdSpan.to("day").value,
-                        tStart,
-                        tStop,
+            else:
+                entryList = [
+                    self._tempo_entry(
+                        model,
+                        entryIntvl[i],
+                        entryIntvl[i + 1],
                         obs,
+                        ncoeff,
                         obsFreq,
-                        entry,
+                        numNodes,
                     )
-                )
+                    for i in range(len(entryIntvl) - 1)
+                ]
 
-            pTable = table.Table(
-                rows=entryList,
-                names=(
-                    "psr",
-                    "date",
-                    "utc",
-                    "tmid",
-                    "dm",
-                    "doppler",
-                    "logrms",
-                    "binary_phase",
-                    "mjd_span",
-                    "t_start",
-                    "t_stop",
-                    "obs",
-                    "obsfreq",
-                    "entry",
-                ),
-                meta={"name": "Polyco Data Table"},
-            )
-            self.polycoTable = pTable
+            self.polycoTable = _polyco_table(entryList)
             if len(self.polycoTable) == 0:
                 raise ValueError("Zero polycos found for table")
         else:
             #  Reading from an old polycofile
             pass
 
+    @staticmethod
+    def _tempo_row(model, tStart, tStop, tmid, date, hms, refPhase, coeffs, obs, obsFreq):
+        """Make the polyco table row for one segment."""
+        mjdSpan = ((tStop - tStart) * u.day).to("min")
+        entry = PolycoEntry(
+            tmid.value,
+            mjdSpan.to("day").value,
+            refPhase.int,
+            refPhase.frac,
+            model.F0.value,
+            len(coeffs),
+            coeffs,
+            obs,
+        )
+        return (
+            model.PSR.value,
+            date,
+            hms,
+            tmid.value,
+            model.DM.value,
+            0.0,
+            0.0,
+            0.0,
+            mjdSpan.to("day").value,
+            tStart,
+            tStop,
+            obs,
+            obsFreq,
+            entry,
+        )
+
+    def _tempo_entry(self, model, tStart, tStop, obs, ncoeff, obsFreq, numNodes):
+        """Compute the polyco table row for one segment on its own."""
+        nodes = np.linspace(tStart, tStop, numNodes)
+        tmid = ((tStart + tStop) / 2.0) * u.day
+        toaMid = toa.get_TOAs_list(
+            [
+                toa.TOA(
+                    (np.modf(tmid.value)[1], np.modf(tmid.value)[0]),
+                    obs=obs,
+                    freq=obsFreq,
+                )
+            ]
+        )
+        refPhase = model.phase(toaMid)
+        # Create node toas(Time sample using TOA class)
+        toaList = [
+            toa.TOA((np.modf(toaNode)[1], np.modf(toaNode)[0]), obs=obs, freq=obsFreq)
+            for toaNode in nodes
+        ]
+
+        toas = toa.get_TOAs_list(toaList)
+
+        ph = model.phase(toas)
+        dt = (nodes * u.day - tmid).to("min")  # Use constant
+        rdcPhase = ph - refPhase
+        rdcPhase = rdcPhase.int - (dt.value * model.F0.value * 60.0) + rdcPhase.frac
+        dtd = dt.value.astype(float)  # Truncate to double
+        rdcPhased = rdcPhase.astype(float)
+        coeffs = np.polyfit(dtd, rdcPhased, ncoeff - 1)
+        coeffs = coeffs[::-1]
+        (date,), (hms,) = _polyco_date_utc(tmid.value)
+        return self._tempo_row(
+            model, tStart, tStop, tmid, date, hms, refPhase, coeffs, obs, obsFreq
+        )
+
+    def _tempo_entries_batch(
+        self, model, tStarts, tStops, obs, ncoeff, obsFreq, numNodes
+    ):
+        """Compute the polyco table rows for many segments at once.
+
+        The result is the same as that of _tempo_entry for each segment, up
+        to rounding in the least-squares fit.
+        """
+        nseg = len(tStarts)
+        if nseg == 0:
+            return []
+        nodes = np.linspace(tStarts, tStops, numNodes, axis=1)
+        tmid = ((tStarts + tStops) / 2.0) * u.day
+        times = np.concatenate((tmid.value, nodes.ravel()))
+        toas = toa.get_TOAs_array(
+            (np.modf(times)[1], np.modf(times)[0]), obs=obs, freqs=obsFreq
+        )
+        ph = model.phase(toas)
+        refPhase = Phase(ph.int[:nseg], ph.frac[:nseg])
+        nodePhase = Phase(
+            ph.int[nseg:].reshape(nseg, numNodes),
+            ph.frac[nseg:].reshape(nseg, numNodes),
+        )
+        dt = (nodes * u.day - tmid[:, np.newaxis]).to("min")  # Use constant
+        rdcPhase = nodePhase - Phase(
+            refPhase.int[:, np.newaxis], refPhase.frac[:, np.newaxis]
+        )
+        rdcPhase = rdcPhase.int - (dt.value * model.F0.value * 60.0) + rdcPhase.frac
+        coeffs = _polyfit_batch(
+            dt.value.astype(float), rdcPhase.astype(float), ncoeff
+        )
+        dates, utcs = _polyco_date_utc(tmid.value)
+        return [
+            self._tempo_row(
+                model,
+                tStarts[i],
+                tStops[i],
+                tmid[i],
+                dates[i],
+                utcs[i],
+                Phase(refPhase.int[i], refPhase.frac[i]),
+                coeffs[i],
+                obs,
+                obsFreq,
+            )
+            for i in range(nseg)
+        ]
+
     def read_polyco_file(self, filename, format):
         """
         Read polyco file from one type of format to a table.
@@ -730,18 +864,86 @@ class Polycos(object):
         else:
             self.polycoTable.write(format=format)
 
-    def find_entry(self, t):
-        """Find the right entry for the input time.
+    def _get_eval_arrays(self):
+        """Collect the polyco entries into arrays for fast evaluation.
+
+        The arrays are rebuilt whenever polycoTable is replaced or changes
+        length; if entries are modified in place, set ``_eval_arrays`` to
+        None.
+
+        Returns
+        -------
+        dict
+            ``order`` (the table rows sorted by start time), ``t_start`` and
+            ``t_stop`` (in that order), and, in table order, ``tmid``,
+            ``f0``, ``rphase_int``, ``rphase_frac`` and ``coeffs``, a
+            contiguous (nentries, max ncoeff) long double array padded with
+            zeros.
         """
-        if not isinstance(t, (np.ndarray, list)):
-            t = np.array([t])
         # Check if polyco table exist
         if self.polycoTable is None:
             raise ValueError("polycoTable not set!")
+        if (
+            self._eval_arrays is None
+            or self._eval_arrays_key[0] is not self.polycoTable
+            or self._eval_arrays_key[1] != len(self.polycoTable)
+        ):
+            self._eval_arrays = self._make_eval_arrays()
+            self._eval_arrays_key = (self.polycoTable, len(self.polycoTable))
+        return self._eval_arrays
+
+    def _make_eval_arrays(self):
+        """Build the arrays returned by _get_eval_arrays."""
+        entries = self.polycoTable["entry"]
+        nentries = len(entries)
+        t_start = data2longdouble(self.polycoTable["t_start"])
+        order = np.argsort(t_start, kind="mergesort")
+        ncoeff = max(e.ncoeff for e in entries)
+        coeffs = np.zeros((nentries, ncoeff), dtype=np.longdouble)
+        for i, e in enumerate(entries):
+            coeffs[i, : e.ncoeff] = e.coeffs[: e.ncoeff]
+        return {
+            "order": order,
+            "t_start": t_start[order],
+            "t_stop": data2longdouble(self.polycoTable["t_stop"])[order],
+            "tmid": np.array([e.tmid.value for e in entries], dtype=np.longdouble),
+            "f0": np.array([e.f0 for e in entries], dtype=np.longdouble),
+            "rphase_int": np.array(
+                [e.rphase.int.value[0] for e in entries], dtype=np.longdouble
+            ),
+            "rphase_frac": np.array(
+                [e.rphase.frac.value[0] for e in entries], dtype=np.longdouble
+            ),
+            "coeffs": coeffs,
+        }
+
+    def find_entry(self, t):
+        """Find the right entry for the input time.
 
-        startIndex = np.searchsorted(self.polycoTable["t_start"], t)
-        entryIndex = startIndex - 1
-        overFlow = np.where(t > self.polycoTable["t_stop"][entryIndex])[0]
+        Parameters
+        ---------
+        t: numpy.ndarray or a single number.
+           Times in MJD, in any order.
+
+        Returns
+        ---------
+        numpy.ndarray
+            For each time, the index in polycoTable of the entry covering
+            it. A time on the boundary between two entries is assigned to
+            the earlier one.
+        """
+        if not isinstance(t, (np.ndarray, list)):
+            t = np.array([t])
+        return self._find_entry(np.asarray(t), self._get_eval_arrays())
+
+    def _find_entry(self, t, arrays):
+        """find_entry for an array of times, using the given eval arrays."""
+        sortedIndex = np.searchsorted(arrays["t_start"], t, side="left") - 1
+        # The start of the first entry is covered by it
+        sortedIndex[(sortedIndex < 0) & (t == arrays["t_start"][0])] = 0
+        overFlow = np.where(
+            (sortedIndex < 0) | (t > arrays["t_stop"][np.maximum(sortedIndex, 0)])
+        )[0]
         if overFlow.size != 0:
             errorMssg = "Input time "
             for i in overFlow:
@@ -749,7 +951,7 @@ class Polycos(object):
             errorMssg += "may be not coverd by entries."
             raise ValueError(errorMssg)
 
-        return entryIndex
+        return arrays["order"][sortedIndex]
 
     def eval_phase(self, t):
         if not isinstance(t, np.ndarray) and not isinstance(t, list):
@@ -760,40 +962,45 @@ class Polycos(object):
         """
         Polyco evaluate absolute phase for a time array.
 
+        All times are evaluated together, using Horner's method with the
+        same two-part arithmetic as PolycoEntry.evalabsphase.
+
         Parameters
         ---------
         t: numpy.ndarray or a single number.
-           An time array in MJD. Time sample should be in order
+           An time array in MJD, in any order.
 
         Returns
         ---------
         out: PINT Phase class
-             Polyco evaluated absolute phase for t.
+             Polyco evaluated absolute phase for t, in the order of t.
 
         phase = refPh + DT*60*F0 + COEFF(1) + COEFF(2)*DT + COEFF(3)*DT**2 + ...
         """
         if not isinstance(t, (np.ndarray, list)):
             t = np.array([t])
 
-        entryIndex = self.find_entry(t)
-        phaseInt = ()
-        phaseFrac = ()
-        # Compute phase for time in each entry
-        for i in range(len(self.polycoTable)):
-            mask = np.where(entryIndex == i)  # Build mask for time in each entry
-            t_in_entry = t[mask]
-            if len(t_in_entry) == 0:
-                continue
-            # Calculate the phase as an array
-            absp = self.polycoTable["entry"][i].evalabsphase(t_in_entry)
-            phaseInt += (absp.int,)
-            phaseFrac += (absp.frac,)
-            # Maybe add sort function here, since the time has been masked.
-        phaseInt = np.hstack(phaseInt).value
-        phaseFrac = np.hstack(phaseFrac).value
-        absPhase = Phase(phaseInt, phaseFrac)
-
-        return absPhase
+        arrays = self._get_eval_arrays()
+        entryIndex = self._find_entry(np.asarray(t), arrays)
+        coeffs = arrays["coeffs"][entryIndex]
+        dt = (data2longdouble(t) - arrays["tmid"][entryIndex]) * data2longdouble(
+            1440.0
+        )
+        # Compute polynomial by factoring out the dt's; the zeros padding
+        # the coefficients of shorter entries leave their phases unchanged
+        phase = Phase(coeffs[:, -1])
+        for i in range(coeffs.shape[1] - 2, -1, -1):
+            pI = Phase(dt * phase.int)
+            pF = Phase(dt * phase.frac)
+            c = Phase(coeffs[:, i])
+            phase = pI + pF + c
+
+        # Add DC term
+        rphase = Phase(
+            arrays["rphase_int"][entryIndex], arrays["rphase_frac"][entryIndex]
+        )
+        phase += rphase + Phase(dt * 60.0 * arrays["f0"][entryIndex])
+        return phase
 
     def eval_spin_freq(self, t):
         """
@@ -802,36 +1009,307 @@ class Polycos(object):
         Parameters
         ---------
         t: numpy.ndarray or a single number.
-           An time array in MJD. Time sample should be in order
+           An time array in MJD, in any order.
 
         Returns
         ---------
         out: numpy array of long double frequencies in Hz
-             Polyco evaluated spin frequency at time t.
+             Polyco evaluated spin frequency at time t, in the order of t.
 
         FREQ(Hz) = F0 + (1/60)*(COEFF(2) + 2*DT*COEFF(3) + 3*DT^2*COEFF(4) + ...)
         """
         if not isinstance(t, np.ndarray) and not isinstance(t, list):
             t = np.array([t])
 
-        entryIndex = self.find_entry(t)
-        poly_result = data2longdouble(np.zeros(len(t)))
-
-        dt = (
-            data2longdouble(t) - self.polycoTable[entryIndex]["tmid"]
-        ) * data2longdouble(1440.0)
-        s = data2longdouble(0.0)
-        for ii, (tt, eidx) in enumerate(zip(dt, entryIndex)):
-            coeffs = self.polycoTable["entry"][eidx].coeffs
-            coeffs = data2longdouble(range(len(coeffs))) * coeffs
-            coeffs = coeffs[::-1][:-1]
-            poly_result[ii] = np.polyval(coeffs, tt)
-        spinFreq = np.array(
-            [
-                self.polycoTable["entry"][eidx].f0
-                + poly_result[ii] / data2longdouble(60.0)
-                for ii, eidx in zip(range(len(t)), entryIndex)
-            ]
+        arrays = self._get_eval_arrays()
+        entryIndex = self._find_entry(np.asarray(t), arrays)
+        coeffs = arrays["coeffs"][entryIndex]
+        dt = (data2longdouble(t) - arrays["tmid"][entryIndex]) * data2longdouble(
+            1440.0
         )
+        poly_result = data2longdouble(np.zeros(len(t)))
+        for i in range(coeffs.shape[1] - 1, 0, -1):
+            poly_result = poly_result * dt + data2longdouble(i) * coeffs[:, i]
+        spinFreq = arrays["f0"][entryIndex] + poly_result / data2longdouble(60.0)
 
         return spinFreq
+
+
+class SimulatedClock(object):
+    """A clock for RollingPolycos that only moves when it is told to.
+
+    Parameters
+    ----------
+    mjd : float
+        The starting time (MJD, UTC).
+    """
+
+    def __init__(self, mjd):
+        self.mjd = float(mjd)
+
+    def __call__(self):
+        return self.mjd
+
+    def advance(self, minutes):
+        """Move the clock forward by the given number of minutes."""
+        self.mjd += minutes / MIN_PER_DAY
+
+
+def _wall_clock():
+    """Return the current time as an MJD (UTC)."""
+    return Time.now().mjd
+
+
+class RollingPolycos(object):
+    """Polycos kept up to date around the current time, for online folding.
+
+    For each observatory and observing frequency that has been added, this
+    keeps a table of polyco segments covering from ``behind`` minutes before
+    the current time to ``ahead`` minutes after it. Each call to update()
+    generates only the segments that have come into this window and drops
+    the ones that have left it; start() does this in a background thread.
+    Predictions are computed from the segments in memory, and segments are
+    generated on demand for times that are not covered; those beyond a gap
+    from the window are kept separately, so the window stays as it is.
+
+    The segments lie on a fixed grid (their boundaries are multiples of
+    segLength minutes since MJD 0), so they do not depend on when they were
+    generated. They are computed as by :func:`pint.polycos.Polycos.generate_polycos`.
+
+    Parameters
+    ----------
+    model : TimingModel
+        The timing model to predict phases with.
+    segLength : float
+        Length of the polyco segments [minutes].
+    ncoeff : int
+        Number of coefficients.
+    ahead : float
+        How far ahead of the current time to keep segments [minutes].
+    behind : float
+        How far behind the current time to keep segments [minutes].
+    numNodes : int
+        Number of nodes for fitting each segment.
+    clock : callable, optional
+        Returns the current time as an MJD (UTC); for example a
+        SimulatedClock. Defaults to the system clock.
+    """
+
+    def __init__(
+        self,
+        model,
+        segLength=60.0,
+        ncoeff=12,
+        ahead=120.0,
+        behind=60.0,
+        numNodes=20,
+        clock=None,
+    ):
+        self.model = model
+        self.segLength = float(segLength)
+        self.ncoeff = ncoeff
+        self.ahead = float(ahead)
+        self.behind = float(behind)
+        # Make sure the number of nodes is bigger then number of coeffs.
+        if numNodes < ncoeff:
+            numNodes = ncoeff + 1
+        self.numNodes = numNodes
+        self.clock = _wall_clock if clock is None else clock
+        # For each (obs, obsFreq): the Polycos in use, the number of the
+        # first segment and the table rows
+        self.polycos = {}
+        self._first_segment = {}
+        self._rows = {}
+        # Segments generated on demand away from the rolling window:
+        # (first segment, table rows, Polycos)
+        self._apart = {}
+        # Only one thread at a time uses the model
+        self._lock = threading.RLock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def add(self, obs, obsFreq):
+        """Start keeping polycos for an observatory and observing frequency
+        [MHz].
+
+        The segments are generated by the next call to update() or when they
+        are first needed.
+        """
+        with self._lock:
+            key = (obs, float(obsFreq))
+            if key not in self.polycos:
+                self.polycos[key] = None
+                self._first_segment[key] = None
+                self._rows[key] = []
+                self._apart[key] = (None, [], None)
+
+    def _segment_times(self, first, stop):
+        """The start and stop MJDs of segments first to stop - 1."""
+        seg = data2longdouble(self.segLength) / data2longdouble(MIN_PER_DAY)
+        edges = np.arange(first, stop + 1).astype(np.longdouble) * seg
+        return edges[:-1], edges[1:]
+
+    def _extend(self, key, first, rows, want_first, want_stop):
+        """Generate the segments missing from rows to cover segments
+        want_first to want_stop - 1.
+
+        rows are the table rows of segments first, first + 1, ...; they are
+        dropped if they are not next to or overlapping the wanted segments.
+        Returns the new first segment and rows.
+        """
+        if first is None or want_first > first + len(rows) or want_stop < first:
+            first, rows = want_first, []
+        stop = first + len(rows)
+        obs, obsFreq = key
+        p = Polycos()
+        if want_first < first:
+            tStarts, tStops = self._segment_times(want_first, first)
+            before = p._tempo_entries_batch(
+                self.model, tStarts, tStops, obs, self.ncoeff, obsFreq, self.numNodes
+            )
+            rows = before + rows
+            first = want_first
+        if want_stop > stop:
+            tStarts, tStops = self._segment_times(stop, want_stop)
+            after = p._tempo_entries_batch(
+                self.model, tStarts, tStops, obs, self.ncoeff, obsFreq, self.numNodes
+            )
+            rows = rows + after
+        return first, rows
+
+    def _cover(self, key, tStart, tStop, trim=False):
+        """Make sure the segments of key cover tStart to tStop (MJD).
+
+        Only missing segments are generated. If trim is True, segments
+        ending before tStart or starting after tStop (such as those added on
+        demand ahead of the window) are dropped. Otherwise, if there would be
+        a gap between the segments kept and the new ones, the new ones are
+        kept apart (see `_cover_apart`) so that the rolling window is not
+        lost.
+        """
+        seg = self.segLength / MIN_PER_DAY
+        want_first = int(np.floor(tStart / seg))
+        want_stop = int(np.floor(tStop / seg)) + 1
+        with self._lock:
+            rows = self._rows[key]
+            first = self._first_segment[key]
+            if (
+                not trim
+                and first is not None
+                and (want_first > first + len(rows) or want_stop < first)
+            ):
+                return self._cover_apart(key, want_first, want_stop)
+            first, rows = self._extend(key, first, rows, want_first, want_stop)
+            if trim and want_stop < first + len(rows):
+                rows = rows[: want_stop - first]
+            if trim and want_first > first:
+                rows = rows[want_first - first :]
+                first = want_first
+            if rows is not self._rows[key]:
+                p = Polycos()
+                p.polycoTable = _polyco_table(rows)
+                self._rows[key] = rows
+                self._first_segment[key] = first
+                self.polycos[key] = p
+            return self.polycos[key]
+
+    def _cover_apart(self, key, want_first, want_stop):
+        """Make sure the segments kept apart from the rolling window cover
+        segments want_first to want_stop - 1, and return their Polycos.
+
+        These serve predictions for times away from the current time; only
+        one run of them is kept for each key.
+        """
+        first, rows, p = self._apart[key]
+        new_first, new_rows = self._extend(key, first, rows, want_first, want_stop)
+        if new_rows is not rows:
+            p = Polycos()
+            p.polycoTable = _polyco_table(new_rows)
+            self._apart[key] = (new_first, new_rows, p)
+        return p
+
+    def update(self):
+        """Bring the segments of all observatories and frequencies up to date
+        with the current time."""
+        now = self.clock()
+        with self._lock:
+            for key in list(self.polycos):
+                self._cover(
+                    key,
+                    now - self.behind / MIN_PER_DAY,
+                    now + self.ahead / MIN_PER_DAY,
+                    trim=True,
+                )
+
+    def start(self, interval=60.0):
+        """Call update() every interval seconds in a background thread."""
+        if self._thread is not None:
+            raise ValueError("Polyco generation is already running")
+        self._stop.clear()
+
+        def run():
+            while True:
+                try:
+                    self.update()
+                except Exception as e:
+                    log.error("Failed to generate polycos: {}".format(e))
+                if self._stop.wait(interval):
+                    break
+
+        self._thread = threading.Thread(target=run, name="RollingPolycos")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread started by start()."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def get_polycos(self, obs, obsFreq, t=None):
+        """Return the Polycos for an observatory and frequency.
+
+        If times t (MJD) are given, the Polycos returned covers them.
+        """
+        key = (obs, float(obsFreq))
+        if key not in self.polycos:
+            self.add(obs, obsFreq)
+        p = self.polycos[key]
+        if t is None:
+            if p is None:
+                now = self.clock()
+                p = self._cover(
+                    key, now - self.behind / MIN_PER_DAY, now + self.ahead / MIN_PER_DAY
+                )
+            return p
+        t = np.atleast_1d(t)
+        for p in [p, self._apart[key][2]]:
+            if (
+                p is not None
+                and np.min(t) >= p.polycoTable["t_start"][0]
+                and np.max(t) < p.polycoTable["t_stop"][-1]
+            ):
+                return p
+        return self._cover(key, np.min(t), np.max(t))
+
+    def eval_abs_phase(self, t, obs, obsFreq):
+        """Evaluate the absolute phase at times t (MJD).
+
+        See :func:`pint.polycos.Polycos.eval_abs_phase`.
+        """
+        return self.get_polycos(obs, obsFreq, t).eval_abs_phase(t)
+
+    def eval_phase(self, t, obs, obsFreq):
+        """Evaluate the phase at times t (MJD).
+
+        See :func:`pint.polycos.Polycos.eval_phase`.
+        """
+        return self.get_polycos(obs, obsFreq, t).eval_phase(t)
+
+    def eval_spin_freq(self, t, obs, obsFreq):
+        """Evaluate the spin frequency at times t (MJD).
+
+        See :func:`pint.polycos.Polycos.eval_spin_freq`.
+        """
+        return self.get_polycos(obs, obsFreq, t).eval_spin_freq(t)
@@ -247,9 +247,11 @@ class Residuals:
 
         If the errors on the TOAs are independent this is a straightforward
         calculation, but if the noise model introduces correlated errors then
-        obtaining a meaningful chi-squared value requires a Cholesky
-        decomposition. This is carried out, here, by constructing a GLSFitter
-        and asking it to do the chi-squared computation but not a fit.
+        obtaining a meaningful chi-squared value requires accounting for the
+        full TOA covariance matrix. If full_cov is True, this is done with
+        `pint.gls_likelihood.GLSLikelihood`, which uses the low-rank
+        structure of the correlated noise instead of forming the matrix;
+        otherwise only the white-noise part of the covariance is used.
 
         The return value here is available as self.chi2, which will not
         redo the computation unless necessary.
@@ -262,12 +264,13 @@ class Residuals:
         correctly return infinity.
         """
         if self.model.has_correlated_errors:
-            # Use GLS but don't actually fit
-            from pint.fitter import GLSFitter
+            from pint.gls_likelihood import GLSLikelihood
 
-            f = GLSFitter(self.toas, self.model, residuals=self)
+            gls = GLSLikelihood(self.model, self.toas)
             try:
-                return f.fit_toas(maxiter=0, full_cov=full_cov)
+                if full_cov:
+                    return gls.chi2(self.time_resids)
+                return gls.white_chi2(self.time_resids)
             except LinAlgError as e:
                 log.warning(
                     "Degenerate conditions encountered when "
@@ -356,10 +359,14 @@ class Residuals:
         except KeyError:
             raise ValueError("ECORR not present in noise model")
 
-        # "U" matrix gives the TOA binning, "weight" is ECORR
-        # uncertainty in seconds, squared.
-        U, ecorr_err2 = ecorr.ecorr_basis_weight_pair(self.toas)
-        ecorr_err2 *= u.s * u.s
+        # "order" gives the TOAs of each epoch, one epoch after the other,
+        # "ecorr_err2" is ECORR uncertainty in seconds, squared.
+        order, epochs, group = ecorr.ecorr_epochs(self.toas)
+        ecorr_err2 = ecorr.ecorr_epoch_weights(self.toas) * u.s * u.s
+        nepochs = len(ecorr_err2)
+        counts = np.bincount(epochs, minlength=nepochs)
+        ends = np.cumsum(counts)
+        starts = ends - counts
 
         if use_noise_model:
             err = self.model.scaled_toa_uncertainty(self.toas)
@@ -367,12 +374,18 @@ class Residuals:
             err = self.toas.get_errors()
             ecorr_err2 *= 0.0
 
+        def epoch_sum(x):
+            x = u.Quantity(x[order])
+            if nepochs == 0:
+                return np.zeros(0) * x.unit
+            return np.add.reduceat(x.value, starts) * x.unit
+
         # Weight for sums, and normalization
         wt = 1.0 / (err * err)
-        a_norm = np.dot(U.T, wt)
+        a_norm = epoch_sum(wt)
 
         def wtsum(x):
-            return np.dot(U.T, wt * x) / a_norm
+            return epoch_sum(wt * x) / a_norm
 
         # Weighted average of various quantities
         avg = {}
@@ -388,7 +401,7 @@ class Residuals:
         avg["errors"] = np.sqrt(1.0 / a_norm + ecorr_err2)
 
         # Indices back into original TOA list
-        avg["indices"] = [list(np.where(U[:, i])[0]) for i in range(U.shape[1])]
+        avg["indices"] = [list(ii) for ii in np.split(order, ends[:-1])]
 
         return avg
 
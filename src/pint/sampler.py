@@ -1,7 +1,93 @@
+import itertools
+import multiprocessing
+
 import emcee
 import numpy as np
+from astropy import log
+
+__all__ = ["MCMCSampler", "EmceeSampler", "PosteriorPool"]
+
+# The posterior functions of the open pools, by key; worker processes
+# inherit this when they are forked
+_pool_lnpostfns = {}
+_pool_keys = itertools.count()
+
+
+class _PoolPosterior(object):
+    """A posterior function that pickles as a reference to a pool's copy.
+
+    In the process that made it, this calls the function directly; pickled
+    and sent to a worker of a `PosteriorPool`, it calls the copy of the
+    function that the worker inherited, so the model and TOAs are never
+    pickled.
+    """
+
+    def __init__(self, lnpostfn):
+        self.lnpostfn = lnpostfn
+        self.key = next(_pool_keys)
+
+    def __getstate__(self):
+        return {"key": self.key}
+
+    def __setstate__(self, state):
+        self.key = state["key"]
+        self.lnpostfn = _pool_lnpostfns[self.key]
+
+    def __call__(self, theta):
+        return self.lnpostfn(theta)
+
+
+class PosteriorPool(object):
+    """A pool of worker processes evaluating a log-posterior function.
+
+    The workers are forked when the pool is made, and each inherits a copy of
+    the function along with the fitter, model and TOAs it uses; only the
+    parameter vectors and the results are sent between processes. Changes
+    to the fitter made after the pool is opened are not seen by the workers.
+    Forking is not available on Windows.
+
+    The pool is used as the ``pool`` of an ``emcee.EnsembleSampler``, with
+    `lnpostfn` as its log-probability function::
 
-__all__ = ["MCMCSampler", "EmceeSampler"]
+        with PosteriorPool(fitter.lnposterior, ncores) as pool:
+            sampler = emcee.EnsembleSampler(nwalkers, ndim, pool.lnpostfn, pool=pool)
+            sampler.run_mcmc(pos, nsteps)
+
+    Parameters
+    ----------
+    lnpostfn : callable
+        The log-posterior function, or the `lnpostfn` of another pool.
+    ncores : int, optional
+        The number of worker processes; all the CPUs by default.
+    """
+
+    def __init__(self, lnpostfn, ncores=None):
+        if not isinstance(lnpostfn, _PoolPosterior):
+            lnpostfn = _PoolPosterior(lnpostfn)
+        self.lnpostfn = lnpostfn
+        _pool_lnpostfns[lnpostfn.key] = lnpostfn.lnpostfn
+        try:
+            self.pool = multiprocessing.get_context("fork").Pool(ncores)
+        except Exception:
+            del _pool_lnpostfns[lnpostfn.key]
+            raise
+
+    def map(self, func, iterable):
+        return self.pool.map(func, iterable)
+
+    def close(self):
+        """Stop the worker processes."""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+            _pool_lnpostfns.pop(self.lnpostfn.key, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
 
 class MCMCSampler(object):
@@ -40,6 +126,10 @@ class MCMCSampler(object):
         """
         raise NotImplementedError
 
+    def get_max_posterior(self):
+        """Return the largest log posterior in the chain and its position."""
+        raise NotImplementedError
+
     def get_initial_pos(self, fitkeys, fitvals, fiterrs, errfact, **kwargs):
         """Give the initial position(s) for the fitter based on given values."""
         raise NotImplementedError
@@ -64,13 +154,28 @@ class EmceeSampler(MCMCSampler):
 
     Be warned: emcee can only handle double precision. You will never get a
     longdouble response back.
+
+    Parameters
+    ----------
+    nwalkers : int
+        The number of walkers.
+    ncores : int, optional
+        The number of processes to evaluate the walkers in. If more than one,
+        each `run_mcmc` evaluates the posterior in a `PosteriorPool`.
+    seed : int, optional
+        Seed for the random numbers used for the initial positions and by
+        emcee. If None, the global numpy random state is used. With a seed,
+        the chains do not depend on ncores.
     """
 
-    def __init__(self, nwalkers):
+    def __init__(self, nwalkers, ncores=1, seed=None):
         super(EmceeSampler, self).__init__()
         self.method = "Emcee"
         self.nwalkers = nwalkers
+        self.ncores = ncores
+        self.random_state = None if seed is None else np.random.RandomState(seed)
         self.sampler = None
+        self.lnpostfn = None
 
     def is_initalized(self):
         """Simple way to check if the EmceeSampler can run yet."""
@@ -84,7 +189,12 @@ class EmceeSampler(MCMCSampler):
 
         """
         self.ndim = ndim
-        self.sampler = emcee.EnsembleSampler(self.nwalkers, self.ndim, lnpostfn)
+        self.lnpostfn = _PoolPosterior(lnpostfn)
+        self.sampler = emcee.EnsembleSampler(self.nwalkers, self.ndim, self.lnpostfn)
+        if self.random_state is not None:
+            self.sampler.random_state = np.random.RandomState(
+                self.random_state.randint(2 ** 31)
+            ).get_state()
 
     def get_initial_pos(self, fitkeys, fitvals, fiterrs, errfact, **kwargs):
         """Get the initial positions for each walker of the sampler.
@@ -98,9 +208,10 @@ class EmceeSampler(MCMCSampler):
                     len(fitkeys), len(fitvals)
                 )
             )
+        rng = np.random if self.random_state is None else self.random_state
         n_fit_params = len(fitvals)
         pos = [
-            fitvals + fiterrs * errfact * np.random.randn(n_fit_params)
+            fitvals + fiterrs * errfact * rng.randn(n_fit_params)
             for ii in range(self.nwalkers)
         ]
         # set starting params
@@ -119,10 +230,10 @@ class EmceeSampler(MCMCSampler):
             if param in fitkeys:
                 idx = fitkeys.index(param)
                 if param == "GLPH_1":
-                    svals = np.random.uniform(-0.5, 0.5, self.nwalkers)
+                    svals = rng.uniform(-0.5, 0.5, self.nwalkers)
                 elif param == "GLEP_1":
                     if "minMJD" in kwargs and "maxMJD" in kwargs:
-                        svals = np.random.uniform(
+                        svals = rng.uniform(
                             kwargs["minMJD"] + 100,
                             kwargs["maxMJD"] - 100,
                             self.nwalkers,
@@ -130,14 +241,14 @@ class EmceeSampler(MCMCSampler):
                     else:
                         raise ValueError("minMJD or maxMJD is None for glep_1 param")
                 elif param == "SINI":
-                    svals = np.random.uniform(0.0, 1.0, self.nwalkers)
+                    svals = rng.uniform(0.0, 1.0, self.nwalkers)
                 elif param == "M2":
-                    svals = np.random.uniform(0.1, 0.6, self.nwalkers)
+                    svals = rng.uniform(0.1, 0.6, self.nwalkers)
                 elif param == "PHASE":
-                    svals = np.random.uniform(0.0, 1.0, self.nwalkers)
+                    svals = rng.uniform(0.0, 1.0, self.nwalkers)
                 elif param in ["E", "ECC", "PX", "A1"]:
                     svals = np.fabs(
-                        fitvals[idx] + fiterrs[idx] * np.random.randn(self.nwalkers)
+                        fitvals[idx] + fiterrs[idx] * rng.randn(self.nwalkers)
                     )
                     if param in ["E", "ECC"]:
                         svals[svals > 1.0] = 1.0 - (svals[svals > 1.0] - 1.0)
@@ -163,10 +274,32 @@ class EmceeSampler(MCMCSampler):
         chains = [self.sampler.chain[:, :, ii].T for ii in range(len(names))]
         return dict(zip(names, chains))
 
+    def get_max_posterior(self):
+        """Return the largest log posterior in the chain and its position.
+
+        When the posterior is evaluated in worker processes, the fitter in
+        the main process does not see the values, so this is how to find
+        the best point.
+        """
+        if self.sampler is None:
+            raise ValueError("MCMCSampler object has not called initialize_sampler()")
+        lnprob = self.sampler.get_log_prob(flat=True)
+        ii = np.argmax(lnprob)
+        return lnprob[ii], self.sampler.get_chain(flat=True)[ii]
+
     def run_mcmc(self, pos, nsteps):
         """
         Wraps around emcee.run_mcmc
         """
         if self.sampler is None:
             raise ValueError("MCMCSampler object has not called initialize_sampler()")
-        self.sampler.run_mcmc(pos, nsteps, progress=True)
+        if self.ncores is None or self.ncores > 1:
+            log.info("Evaluating walkers in {} processes".format(self.ncores))
+            with PosteriorPool(self.lnpostfn, self.ncores) as pool:
+                self.sampler.pool = pool
+                try:
+                    self.sampler.run_mcmc(pos, nsteps, progress=True)
+                finally:
+                    self.sampler.pool = None
+        else:
+            self.sampler.run_mcmc(pos, nsteps, progress=True)
@@ -20,6 +20,7 @@ import pint.plot_utils as plot_utils
 import pint.toa as toa
 from pint.eventstats import hm, hmw
 from pint.fitter import Fitter
+from pint.mcmc_fitter import PhaseSurrogate
 from pint.models.priors import (
     GaussianBoundedRV,
     Prior,
@@ -27,24 +28,12 @@ from pint.models.priors import (
     UniformUnboundedRV,
 )
 from pint.observatory.fermi_obs import FermiObs
+from pint.sampler import EmceeSampler
 
 __all__ = ["read_gaussfitfile", "marginalize_over_phase", "main"]
 # log.setLevel('DEBUG')
 # np.seterr(all='raise')
 
-# initialization values
-# Should probably figure a way to make these not global variables
-maxpost = -9e99
-numcalls = 0
-
-
-class custom_timing(
-    pint.models.spindown.Spindown, pint.models.astrometry.AstrometryEcliptic
-):
-    def __init__(self, parfile):
-        super(custom_timing, self).__init__()
-        self.read_parfile(parfile)
-
 
 def read_gaussfitfile(gaussfitfile, proflen):
     """Read a Gaussian-fit file as created by the output of pygaussfit.py.
@@ -272,6 +261,10 @@ class emcee_fitter(Fitter):
             self.model, phs, phserr
         )
         self.n_fit_params = len(self.fitvals)
+        self.numcalls = 0
+        self.maxpost = -np.inf
+        self.maxpost_fitvals = self.fitvals
+        self.surrogate = None
 
     def get_event_phases(self):
         """
@@ -281,6 +274,26 @@ class emcee_fitter(Fitter):
         # ensure all postive
         return np.where(phss < 0.0, phss + 1.0, phss)
 
+    def use_surrogate(self, order=1, check_interval=1000, tolerance=1e-3):
+        """
+        Use approximate phases, expanded about the current model, in lnposterior
+
+        See :class:`pint.mcmc_fitter.PhaseSurrogate`. Pass order=0 to go
+        back to exact phases.
+        """
+        if order == 0:
+            self.surrogate = None
+            return
+        self.surrogate = PhaseSurrogate(
+            self.model,
+            self.toas,
+            self.fitkeys[:-1],
+            order=order,
+            steps=np.where(self.fiterrs[:-1] > 0, self.fiterrs[:-1], 1e-6),
+            check_interval=check_interval,
+            tolerance=tolerance,
+        )
+
     def lnprior(self, theta):
         """
         The log prior evaulated at the parameter values specified
@@ -297,12 +310,8 @@ class emcee_fitter(Fitter):
         """
         The log posterior (priors * likelihood)
         """
-        global maxpost, numcalls, ftr
         self.set_params(dict(zip(self.fitkeys[:-1], theta[:-1])))
-
-        numcalls += 1
-        if numcalls % (nwalkers * nsteps / 100) == 0:
-            log.info("~%d%% complete" % (numcalls / (nwalkers * nsteps / 100)))
+        self.numcalls += 1
 
         # Evaluate the prior FIRST, then don't even both computing
         # the posterior if the prior is not finite
@@ -311,16 +320,19 @@ class emcee_fitter(Fitter):
             return -np.inf
 
         # Call PINT to compute the phases
-        phases = self.get_event_phases()
+        if self.surrogate is not None:
+            phases = self.surrogate.phases(theta[:-1], best=self.maxpost_fitvals[:-1])
+        else:
+            phases = self.get_event_phases()
         lnlikelihood = profile_likelihood(
             theta[-1], self.xtemp, phases, self.template, self.weights
         )
         lnpost = lnprior + lnlikelihood
-        if lnpost > maxpost:
+        if lnpost > self.maxpost:
             log.info("New max: %f" % lnpost)
-            for name, val in zip(ftr.fitkeys, theta):
+            for name, val in zip(self.fitkeys, theta):
                 log.info("  %8s: %25.15g" % (name, val))
-            maxpost = lnpost
+            self.maxpost = lnpost
             self.maxpost_fitvals = theta
         return lnpost
 
@@ -363,15 +375,14 @@ class emcee_fitter(Fitter):
         Show binned profiles (and H-test values) as a function
         of the minimum weight used. nbins is only for the plots.
         """
-        global ftr
         f, ax = plt.subplots(3, 3, sharex=True)
-        phss = ftr.get_event_phases()
+        phss = self.get_event_phases()
         htests = []
         weights = np.linspace(0.0, 0.95, 20)
         for ii, minwgt in enumerate(weights):
-            good = ftr.weights > minwgt
+            good = self.weights > minwgt
             nphotons = np.sum(good)
-            wgts = ftr.weights[good] if use_weights else None
+            wgts = self.weights[good] if use_weights else None
             if nphotons <= 0:
                 hval = 0
             else:
@@ -402,18 +413,18 @@ class emcee_fitter(Fitter):
                     fontweight="bold",
                 )
         if use_weights:
-            plt.savefig(ftr.model.PSR.value + "_profs_v_wgtcut.png")
+            plt.savefig(self.model.PSR.value + "_profs_v_wgtcut.png")
         else:
-            plt.savefig(ftr.model.PSR.value + "_profs_v_wgtcut_unweighted.png")
+            plt.savefig(self.model.PSR.value + "_profs_v_wgtcut_unweighted.png")
         plt.close()
         plt.plot(weights, htests, "k")
         plt.xlabel("Min Weight")
         plt.ylabel("H-test")
         plt.title(self.model.PSR.value)
         if use_weights:
-            plt.savefig(ftr.model.PSR.value + "_htest_v_wgtcut.png")
+            plt.savefig(self.model.PSR.value + "_htest_v_wgtcut.png")
         else:
-            plt.savefig(ftr.model.PSR.value + "_htest_v_wgtcut_unweighted.png")
+            plt.savefig(self.model.PSR.value + "_htest_v_wgtcut_unweighted.png")
         plt.close()
 
 
@@ -495,6 +506,39 @@ def main(argv=None):
         type=float,
         default=10.0,
     )
+    parser.add_argument(
+        "--surrogate",
+        help="Approximate photon phases in the MCMC by a linear (1) or quadratic (2) "
+        "expansion about the starting parameters (def 0, exact phases)",
+        type=int,
+        choices=[0, 1, 2],
+        default=0,
+    )
+    parser.add_argument(
+        "--surrogateCheck",
+        help="Number of likelihood calls between checks of the phase expansion "
+        "against exact phases (def 1000)",
+        type=int,
+        default=1000,
+    )
+    parser.add_argument(
+        "--surrogateTol",
+        help="Phase error (cycles) above which the expansion is recomputed (def 0.001)",
+        type=float,
+        default=0.001,
+    )
+    parser.add_argument(
+        "--ncores",
+        help="Number of processes to evaluate the walkers in (def 1)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--seed",
+        help="Seed for the random numbers, to make the results reproducible",
+        type=int,
+        default=None,
+    )
     parser.add_argument(
         "--usepickle",
         help="Read events from pickle file, if available?",
@@ -502,8 +546,6 @@ def main(argv=None):
         action="store_true",
     )
 
-    global nwalkers, nsteps, ftr
-
     args = parser.parse_args(argv)
 
     eventfile = args.eventfile
@@ -533,13 +575,6 @@ def main(argv=None):
     # Read in initial model
     modelin = pint.models.get_model(parfile)
 
-    # The custom_timing version below is to manually construct the TimingModel
-    # class, which allows it to be pickled. This is needed for parallelizing
-    # the emcee call over a number of threads.  So far, it isn't quite working
-    # so it is disabled.  The code above constructs the TimingModel class
-    # dynamically, as usual.
-    # modelin = custom_timing(parfile)
-
     # Remove the dispersion delay as it is unnecessary
     # modelin.delay_funcs['L1'].remove(modelin.dispersion_delay)
     # Set the target coords for automatic weighting if necessary
@@ -695,10 +730,11 @@ def main(argv=None):
     # Set up the initial conditions for the emcee walkers.  Use the
     # scipy.optimize newfitvals instead if they are better
     ndim = ftr.n_fit_params
+    rng = np.random if args.seed is None else np.random.RandomState(args.seed)
     if like_start > like_optmin:
         # Keep the starting deviations small...
         pos = [
-            ftr.fitvals + ftr.fiterrs * args.initerrfact * np.random.randn(ndim)
+            ftr.fitvals + ftr.fiterrs * args.initerrfact * rng.randn(ndim)
             for ii in range(nwalkers)
         ]
         # Set starting params
@@ -706,18 +742,18 @@ def main(argv=None):
             if param in ftr.fitkeys:
                 idx = ftr.fitkeys.index(param)
                 if param == "GLPH_1":
-                    svals = np.random.uniform(-0.5, 0.5, nwalkers)
+                    svals = rng.uniform(-0.5, 0.5, nwalkers)
                 elif param == "GLEP_1":
-                    svals = np.random.uniform(minMJD + 100, maxMJD - 100, nwalkers)
+                    svals = rng.uniform(minMJD + 100, maxMJD - 100, nwalkers)
                     # svals = 55422.0 + np.random.randn(nwalkers)
                 elif param == "SINI":
-                    svals = np.random.uniform(0.0, 1.0, nwalkers)
+                    svals = rng.uniform(0.0, 1.0, nwalkers)
                 elif param == "M2":
-                    svals = np.random.uniform(0.1, 0.6, nwalkers)
+                    svals = rng.uniform(0.1, 0.6, nwalkers)
                 elif param in ["E", "ECC", "PX", "A1"]:
                     # Ensure all positive
                     svals = np.fabs(
-                        ftr.fitvals[idx] + ftr.fiterrs[idx] * np.random.randn(nwalkers)
+                        ftr.fitvals[idx] + ftr.fiterrs[idx] * rng.randn(nwalkers)
                     )
                     if param in ["E", "ECC"]:
                         svals[svals > 1.0] = 1.0 - (svals[svals > 1.0] - 1.0)
@@ -725,35 +761,31 @@ def main(argv=None):
                     pos[ii][idx] = svals[ii]
     else:
         pos = [
-            newfitvals + ftr.fiterrs * args.initerrfact * np.random.randn(ndim)
+            newfitvals + ftr.fiterrs * args.initerrfact * rng.randn(ndim)
             for i in range(nwalkers)
         ]
     # Set the 0th walker to have the initial pre-fit solution
     # This way, one walker should always be in a good position
     pos[0] = ftr.fitvals
 
-    import emcee
-
-    # Following are for parallel processing tests...
-    if 0:
-
-        def unwrapped_lnpost(theta, ftr=ftr):
-            return ftr.lnposterior(theta)
-
-        import pathos.multiprocessing as mp
-
-        pool = mp.ProcessPool(nodes=8)
-        sampler = emcee.EnsembleSampler(
-            nwalkers, ndim, unwrapped_lnpost, pool=pool, args=[ftr]
+    if args.surrogate:
+        log.info("Using an order %d expansion of the photon phases" % args.surrogate)
+        ftr.use_surrogate(
+            args.surrogate,
+            check_interval=args.surrogateCheck,
+            tolerance=args.surrogateTol,
         )
-    else:
-        sampler = emcee.EnsembleSampler(nwalkers, ndim, ftr.lnposterior)
-    # The number is the number of points in the chain
-    sampler.run_mcmc(pos, nsteps)
 
-    def chains_to_dict(names, sampler):
-        chains = [sampler.chain[:, :, ii].T for ii in range(len(names))]
-        return dict(zip(names, chains))
+    sampler = EmceeSampler(nwalkers, ncores=args.ncores, seed=args.seed)
+    sampler.initialize_sampler(ftr.lnposterior, ndim)
+    # The number is the number of points in the chain
+    with ftr.model.kepler_warm_start():
+        sampler.run_mcmc(pos, nsteps)
+    # The walkers may have been evaluated in other processes
+    lnpost, theta = sampler.get_max_posterior()
+    if lnpost > ftr.maxpost:
+        ftr.maxpost = lnpost
+        ftr.maxpost_fitvals = theta
 
     def plot_chains(chain_dict, file=False):
         npts = len(chain_dict)
@@ -770,11 +802,11 @@ def main(argv=None):
             plt.show()
             plt.close()
 
-    chains = chains_to_dict(ftr.fitkeys, sampler)
+    chains = sampler.chains_to_dict(ftr.fitkeys)
     plot_chains(chains, file=ftr.model.PSR.value + "_chains.png")
 
     # Make the triangle plot.
-    samples = sampler.chain[:, burnin:, :].reshape((-1, ndim))
+    samples = sampler.get_chain()[:, burnin:, :].reshape((-1, ndim))
     try:
         import corner
 
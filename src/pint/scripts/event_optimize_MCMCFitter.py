@@ -23,11 +23,6 @@ __all__ = ["main"]
 # log.setLevel('DEBUG')
 # np.seterr(all='raise')
 
-# initialization values
-# Should probably figure a way to make these not global variables
-maxpost = -9e99
-numcalls = 0
-
 
 def main(argv=None):
 
@@ -107,6 +102,18 @@ def main(argv=None):
         type=float,
         default=10.0,
     )
+    parser.add_argument(
+        "--ncores",
+        help="Number of processes to evaluate the walkers in (def 1)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--seed",
+        help="Seed for the random numbers, to make the results reproducible",
+        type=int,
+        default=None,
+    )
     parser.add_argument(
         "--usepickle",
         help="Read events from pickle file, if available?",
@@ -114,8 +121,6 @@ def main(argv=None):
         action="store_true",
     )
 
-    global nwalkers, nsteps, ftr
-
     args = parser.parse_args(argv)
 
     eventfile = args.eventfile
@@ -237,7 +242,7 @@ def main(argv=None):
     # more general priors on parameters that need certain bounds
     phs = 0.0 if args.phs is None else args.phs
 
-    sampler = EmceeSampler(nwalkers)
+    sampler = EmceeSampler(nwalkers, ncores=args.ncores, seed=args.seed)
     ftr = MCMCFitterBinnedTemplate(
         ts,
         modelin,
@@ -309,8 +314,9 @@ def main(argv=None):
     if like_start > like_optmin:
         pos = None
     else:
+        rng = np.random if sampler.random_state is None else sampler.random_state
         pos = [
-            newfitvals + ftr.fiterrs * args.initerrfact * np.random.randn(ndim)
+            newfitvals + ftr.fiterrs * args.initerrfact * rng.randn(ndim)
             for i in range(nwalkers)
         ]
         pos[0] = ftr.fitvals
@@ -23,11 +23,6 @@ __all__ = ["main"]
 # log.setLevel("INFO")
 # np.seterr(all='raise')
 
-# initialization values
-# Should probably figure a way to make these not global variables
-maxpost = -9e99
-numcalls = 0
-
 
 def get_toas(evtfile, flags, tcoords=None, minweight=0, minMJD=0, maxMJD=100000):
     if evtfile[:-3] == "tim":
@@ -216,14 +211,24 @@ def main(argv=None):
         type=float,
         default=10.0,
     )
+    parser.add_argument(
+        "--ncores",
+        help="Number of processes to evaluate the walkers in (def 1)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--seed",
+        help="Seed for the random numbers, to make the results reproducible",
+        type=int,
+        default=None,
+    )
     parser.add_argument(
         "--samples",
         help="Pickle file containing samples from a previous run",
         default=None,
     )
 
-    global nwalkers, nsteps, ftr
-
     args = parser.parse_args(argv)
 
     parfile = args.parfile
@@ -357,7 +362,7 @@ def main(argv=None):
     # more general priors on parameters that need certain bounds
     phs = 0.0 if args.phs is None else args.phs
 
-    sampler = EmceeSampler(nwalkers)
+    sampler = EmceeSampler(nwalkers, ncores=args.ncores, seed=args.seed)
     ftr = CompositeMCMCFitter(
         eventinfo["toas"],
         modelin,
@@ -0,0 +1,137 @@
+#!/usr/bin/env python -W ignore::FutureWarning -W ignore::UserWarning -W ignore::DeprecationWarning
+"""Keep polyco files up to date for online folding."""
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import os
+import tempfile
+import time
+
+from astropy import log
+
+import pint.models
+from pint.polycos import RollingPolycos, SimulatedClock
+
+__all__ = ["main"]
+
+
+def write_polycos(polycos, filename, format="tempo"):
+    """Write polycos to filename, replacing any existing file at once.
+
+    The file is written under a temporary name and then moved over the
+    old one with os.replace, which is atomic on all platforms, so a folding
+    program never reads a partly written file.
+    """
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmpname = tempfile.mkstemp(prefix=".tmp", dir=dirname)
+    os.close(fd)
+    try:
+        polycos.write_polyco_file(format, tmpname)
+        # mkstemp makes the file readable only by us; give it the mode of a
+        # normally created file so that other accounts can read it
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmpname, 0o666 & ~umask)
+        os.replace(tmpname, filename)
+    except Exception:
+        os.remove(tmpname)
+        raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="""Generate polycos continuously for online folding.
+
+        Polycos covering from BEHIND minutes before the current time to AHEAD
+        minutes after it are kept for each observatory and frequency. Every
+        INTERVAL seconds, new segments are generated as they are needed and
+        the polyco files are rewritten.""",
+    )
+    parser.add_argument("parfile", help="par file to read model from")
+    parser.add_argument(
+        "--obs",
+        action="append",
+        help="Observatory code (can be given more than once; default gbt)",
+    )
+    parser.add_argument(
+        "--freq",
+        action="append",
+        type=float,
+        help="Observing frequency in MHz (can be given more than once; default 1400)",
+    )
+    parser.add_argument(
+        "--segLength", type=float, default=60.0, help="Segment length in minutes"
+    )
+    parser.add_argument(
+        "--ncoeff", type=int, default=12, help="Number of polyco coefficients"
+    )
+    parser.add_argument(
+        "--ahead",
+        type=float,
+        default=120.0,
+        help="Minutes after the current time to cover",
+    )
+    parser.add_argument(
+        "--behind",
+        type=float,
+        default=60.0,
+        help="Minutes before the current time to cover",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=60.0,
+        help="Seconds between updates of the polyco files",
+    )
+    parser.add_argument(
+        "--outfile",
+        default="polyco_{obs}_{freq:g}.dat",
+        help="Polyco file name, formatted with the observatory and frequency",
+    )
+    parser.add_argument(
+        "--simulate",
+        type=float,
+        default=None,
+        help="Start a simulated clock at this MJD (UTC); "
+        "it moves on by INTERVAL at each update, without waiting",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=0,
+        help="Stop after this many updates (default: run until interrupted)",
+    )
+
+    args = parser.parse_args(argv)
+
+    obss = args.obs if args.obs else ["gbt"]
+    freqs = args.freq if args.freq else [1400.0]
+
+    model = pint.models.get_model(args.parfile)
+    clock = None if args.simulate is None else SimulatedClock(args.simulate)
+    roller = RollingPolycos(
+        model,
+        segLength=args.segLength,
+        ncoeff=args.ncoeff,
+        ahead=args.ahead,
+        behind=args.behind,
+        clock=clock,
+    )
+    for obs in obss:
+        for freq in freqs:
+            roller.add(obs, freq)
+
+    iteration = 0
+    while True:
+        roller.update()
+        for (obs, freq), polycos in roller.polycos.items():
+            filename = args.outfile.format(obs=obs, freq=freq)
+            write_polycos(polycos, filename)
+            log.info("Wrote {} polycos to {}".format(len(polycos.polycoTable), filename))
+        iteration += 1
+        if args.iterations and iteration >= args.iterations:
+            break
+        if clock is None:
+            time.sleep(args.interval)
+        else:
+            clock.advance(args.interval / 60.0)
@@ -122,10 +122,11 @@ def main(argv=None):
         log.info("Reading initial TOAs from {0}".format(args.inputtim))
         ts = toa.TOAs(toafile=args.inputtim)
         ts.table["error"][:] = error
+        ts.version += 1
 
     # WARNING! I'm not sure how clock corrections should be handled here!
     # Do we apply them, or not?
-    if not any(["clkcorr" in f for f in ts.table["flags"]]):
+    if "clkcorr" not in ts.table.colnames:
         log.info("Applying clock corrections.")
         ts.apply_clock_corrections()
     if "tdb" not in ts.table.colnames:
@@ -11,7 +11,6 @@ import copy
 import gzip
 import os
 import re
-from collections import OrderedDict
 
 import astropy.table as table
 import astropy.time as time
@@ -23,6 +22,7 @@ from astropy.coordinates import ICRS, CartesianDifferential, CartesianRepresenta
 from six.moves import cPickle as pickle
 
 import pint
+from pint import toa_cache
 from pint.observatory import Observatory, get_observatory, bipm_default
 from pint.observatory.special_locations import SpacecraftObs
 from pint.observatory.topo_obs import TopoObs
@@ -34,6 +34,7 @@ from pint.pulsar_ecliptic import PulsarEcliptic
 __all__ = [
     "get_TOAs",
     "get_TOAs_list",
+    "get_TOAs_array",
     "format_toa_line",
     "make_fake_toas",
     "TOA",
@@ -83,6 +84,8 @@ def get_TOAs(
     planets=False,
     usepickle=False,
     tdb_method="default",
+    usecache=False,
+    cachedir=None,
 ):
     """Load and prepare TOAs for PINT use.
 
@@ -103,10 +106,15 @@ def get_TOAs(
 
     Note also that if usepickle is set, the pickled file will have clock
     corrections and other values set from when it was loaded and these may not
-    correspond to the values you set here.
+    correspond to the values you set here. The cache enabled by ``usecache``
+    does not have this problem: its entries are keyed on the contents of the
+    ``.tim`` file (and any INCLUDEd files) and on all the options given here,
+    and are only used if the clock files are unchanged (see
+    :mod:`pint.toa_cache`). TOAs read from a pickle are not written to the
+    cache.
 
     See :func:`pint.toa.TOAs.apply_clock_corrections` for further information on the meaning of
-    the clock correction flags.
+    the ``clkcorr`` column.
 
     If commands like ``TIME`` or ``EQUAD`` are present in the ``.tim`` file,
     they are applied to the TOAs upon reading and retained in the ``.commands``
@@ -133,6 +141,12 @@ def get_TOAs(
         Whether to try to use pickle-based caching of loaded clock-corrected TOAs objects.
     tdb_method : string
         Which method to use for the clock correction to TDB.
+    usecache : bool
+        Whether to load the TOAs from, and store them in, the on-disk TOA
+        cache. Only used if ``timfile`` is a filename.
+    cachedir : str, optional
+        Directory holding the TOA cache; defaults to a directory in the
+        astropy cache directory.
 
     Returns
     -------
@@ -140,16 +154,36 @@ def get_TOAs(
         Completed TOAs object representing the data.
 
     """
+    cachefile = None
+    if usecache and isinstance(timfile, str) and not callable(tdb_method):
+        key = toa_cache.cache_key(
+            timfile,
+            ephem=ephem,
+            include_bipm=include_bipm,
+            bipm_version=bipm_version,
+            include_gps=include_gps,
+            planets=planets,
+            tdb_method=tdb_method,
+        )
+        cachefile = toa_cache.entry_path(key, cachedir)
+        if toa_cache.check_entry(cachefile, key):
+            log.info("Reading TOAs from cache entry {}".format(cachefile))
+            t = TOAs(cachefile)
+            t.filename = timfile
+            return t
     updatepickle = False
     if usepickle:
         picklefile = _check_pickle(timfile)
         if picklefile:
             timfile = picklefile
+            # The pickle may have been made with other settings, so it must
+            # not go into the cache under these ones
+            cachefile = None
         else:
             # Pickle either did not exist or is out of date
             updatepickle = True
     t = TOAs(timfile)
-    if not any(["clkcorr" in f for f in t.table["flags"]]):
+    if "clkcorr" not in t.table.colnames:
         t.apply_clock_corrections(
             include_gps=include_gps,
             include_bipm=include_bipm,
@@ -163,6 +197,12 @@ def get_TOAs(
     if usepickle and updatepickle:
         log.info("Pickling TOAs.")
         t.pickle()
+    if cachefile is not None:
+        log.info("Writing TOAs to cache entry {}".format(cachefile))
+        try:
+            toa_cache.write_entry(t, cachefile, key)
+        except (OSError, TypeError, ValueError) as e:
+            log.warning("Could not write TOA cache entry: {}".format(e))
     return t
 
 
@@ -214,7 +254,7 @@ def get_TOAs_list(
     See :func:`pint.toa.get_TOAs` for details of what this function does.
     """
     t = TOAs(toalist=toa_list)
-    if not any(["clkcorr" in f for f in t.table["flags"]]):
+    if "clkcorr" not in t.table.colnames:
         t.apply_clock_corrections(
             include_gps=include_gps,
             include_bipm=include_bipm,
@@ -227,6 +267,135 @@ def get_TOAs_list(
     return t
 
 
+def get_TOAs_array(
+    times,
+    obs,
+    errors=0.0,
+    freqs=float("inf"),
+    flags=None,
+    ephem=None,
+    include_bipm=True,
+    bipm_version=bipm_default,
+    include_gps=True,
+    planets=False,
+    tdb_method="default",
+):
+    """Load TOAs at one observatory from arrays of times.
+
+    The result is the same as calling :func:`pint.toa.get_TOAs_list` on a
+    list of ``TOA(t, obs=obs, ...)``, but no :class:`pint.toa.TOA` objects
+    are made, so this is much faster for many TOAs.
+
+    Parameters
+    ----------
+    times : float, array or tuple of two arrays
+        The MJDs of the TOAs in the timescale of the observatory, either as
+        one (possibly long double) array or as a tuple (or two-row array) of
+        two arrays whose sum is the MJD, as for the TOA constructor.
+    obs : str
+        The observatory code.
+    errors : float or array
+        The TOA uncertainties in microseconds.
+    freqs : float or array
+        The observing frequencies in MHz.
+    flags : list of dict, optional
+        The flags of each TOA.
+
+    See :func:`pint.toa.get_TOAs` for the other arguments.
+    """
+    if isinstance(times, tuple) or (np.ndim(times) == 2 and len(times) == 2):
+        mjd_int, mjd_frac = times
+    else:
+        mjd_int = np.asarray(times)
+        mjd_frac = np.zeros_like(mjd_int)
+    mjd_int, mjd_frac = np.broadcast_arrays(
+        np.atleast_1d(mjd_int), np.atleast_1d(mjd_frac)
+    )
+    ntoas = len(mjd_int)
+    obs = get_observatory(obs).name
+    t = TOAs.__new__(TOAs)
+    t._toa_columns = {
+        "mjd_int": mjd_int,
+        "mjd_frac": mjd_frac,
+        "error": np.broadcast_to(errors, (ntoas,)),
+        "freq": np.broadcast_to(freqs, (ntoas,)),
+        "obs": [obs] * ntoas,
+        "flags": [{} for i in range(ntoas)] if flags is None else flags,
+    }
+    t.__init__()
+    t.apply_clock_corrections(
+        include_gps=include_gps, include_bipm=include_bipm, bipm_version=bipm_version
+    )
+    t.compute_TDBs(method=tdb_method, ephem=ephem)
+    t.compute_posvels(ephem, planets)
+    return t
+
+
+def _group_mjds(mjds, gap_limit):
+    """Assign group numbers to MJDs separated by less than gap_limit days.
+
+    Groups are numbered in time order; a new group starts whenever the
+    gap to the previous (sorted) MJD is at least gap_limit.
+    """
+    mjds = np.asarray(mjds, dtype=float)
+    groups = np.zeros(len(mjds), dtype=int)
+    if len(mjds) == 0:
+        return groups
+    order = np.argsort(mjds, kind="mergesort")
+    new_group = np.diff(mjds[order]) >= gap_limit
+    groups[order] = np.concatenate(([0], np.cumsum(new_group)))
+    return groups
+
+
+def _merge_group_times(ntoas, group_times):
+    """Combine per-observatory vector Times into a single Time for the table.
+
+    ``group_times`` is a list of ``(indices, Time)`` pairs, one per
+    observatory, covering all ``ntoas`` rows.  The result is in the timescale
+    the groups share, or TT if they use different timescales, and carries
+    one location per TOA (the geocenter where the group has no location,
+    which gives the same TDB conversion as no location at all).
+
+    Returns the combined Time and the floating-point MJDs of each TOA in its
+    own group's timescale.
+    """
+    scales = set(t.scale for ii, t in group_times)
+    if not scales:
+        scale = "utc"
+    elif len(scales) == 1:
+        scale = scales.pop()
+    else:
+        scale = "tt"
+    jd1 = np.zeros(ntoas)
+    jd2 = np.zeros(ntoas)
+    xyz = np.zeros((ntoas, 3))
+    mjd_float = np.zeros(ntoas)
+    for ii, t in group_times:
+        mjd_float[ii] = t.mjd
+        if t.location is not None:
+            loc = t.location
+            xyz[ii] = np.stack(
+                [loc.x.to_value(u.m), loc.y.to_value(u.m), loc.z.to_value(u.m)],
+                axis=-1,
+            )
+        t = getattr(t, scale)
+        jd1[ii] = t.jd1
+        jd2[ii] = t.jd2
+    mjds = time.Time(
+        jd1,
+        jd2,
+        format="jd",
+        scale=scale,
+        location=EarthLocation.from_geocentric(
+            xyz[:, 0], xyz[:, 1], xyz[:, 2], unit=u.m
+        ),
+        precision=9,
+    )
+    # Note that when scale is UTC, must use pulsar_mjd format!
+    mjds.format = "pulsar_mjd" if scale == "utc" else "mjd"
+    return mjds, mjd_float
+
+
 def _toa_format(line, fmt="Unknown"):
     """Determine the type of a TOA line.
 
@@ -761,7 +930,8 @@ class TOAs(object):
        * - ``index``
          - location of the TOA in the original input
        * - ``mjd``
-         - the exact time of arrival (an :class:`astropy.time.Time` object)
+         - the exact time of arrival (an :class:`astropy.time.Time` column, whose
+           ``location`` holds the ITRF position of the observatory for each TOA)
        * - ``mjd_float``
          - the time of arrival in floating-point (may be microseconds off)
        * - ``error``
@@ -775,10 +945,13 @@ class TOAs(object):
        * - ``flags``
          - free-form flags associated with the TOA (a dictionary mapping flag
            to value)
+       * - ``clkcorr``
+         - the clock correction (including any ``TIME`` statements) that has been
+           added to ``mjd``; computed by :func:`pint.toa.TOAs.apply_clock_corrections`
        * - ``tdb``
          - the pulse arrival time converted to TDB (but not barycentered, that is,
-           not corrected for light travel time; an :class:`astropy.time.Time` object);
-           computed by :func:`pint.toa.TOAs.compute_TDBs`
+           not corrected for light travel time; an :class:`astropy.time.Time`
+           column); computed by :func:`pint.toa.TOAs.compute_TDBs`
        * - ``tdbld``
          - a ``longdouble`` version of ``tdb`` for computational convenience
        * - ``ssb_obs_pos``, ``ssb_obs_vel``
@@ -830,6 +1003,11 @@ class TOAs(object):
         The Solar System ephemeris in use.
     clock_corr_info : dict
         Information about the clock correction chains in use.
+    version : int
+        A counter that is incremented whenever the TOAs are modified through
+        their methods (:func:`pint.toa.TOAs.select`,
+        :func:`pint.toa.TOAs.adjust_TOAs`, ...); values cached for these TOAs
+        are discarded when it changes.
     """
 
     def __init__(self, toafile=None, toalist=None):
@@ -841,6 +1019,10 @@ class TOAs(object):
         self.ephem = None
         self.clock_corr_info = {}
         self.obliquity = None
+        self.version = 0
+        self._selection_cache = {}
+        self._selection_cache_state = None
+        self.clear_flag_cache()
 
         if (toalist is not None) and (toafile is not None):
             raise ValueError("Cannot initialize TOAs from both file and list.")
@@ -851,6 +1033,8 @@ class TOAs(object):
             if toafile.endswith(".pickle") or toafile.endswith("pickle.gz"):
                 log.info("Reading TOAs from pickle file")
                 self.read_pickle_file(toafile)
+            elif toafile.endswith(toa_cache.ENTRY_SUFFIX):
+                self.read_cache_entry(toafile)
             else:
                 self.read_toa_file(toafile)
                 self.filename = toafile
@@ -864,33 +1048,13 @@ class TOAs(object):
             self.toas = toalist
 
         if not hasattr(self, "table"):
-            mjds = self.get_mjds(high_precision=True)
-            # The table is grouped by observatory
-            self.table = table.Table(
-                [
-                    np.arange(len(mjds)),
-                    table.Column(mjds),
-                    self.get_mjds(),
-                    self.get_errors(),
-                    self.get_freqs(),
-                    self.get_obss(),
-                    self.get_flags(),
-                    np.zeros(len(mjds)),
-                    self.get_groups(),
-                ],
-                names=(
-                    "index",
-                    "mjd",
-                    "mjd_float",
-                    "error",
-                    "freq",
-                    "obs",
-                    "flags",
-                    "delta_pulse_number",
-                    "groups",
-                ),
-                meta={"filename": self.filename},
-            ).group_by("obs")
+            if hasattr(self, "_toa_columns"):
+                # TOAs read from a file (or made by get_TOAs_array) are kept
+                # as plain columns until now
+                self.table = self._table_from_columns().group_by("obs")
+                del self._toa_columns
+            else:
+                self.table = self._table_from_toas().group_by("obs")
             # Add pulse number column (if needed) or make PHASE adjustments
             try:
                 self.phase_columns_from_flags()
@@ -942,7 +1106,7 @@ class TOAs(object):
         """Array of MJDs in the TOAs object
 
         With high_precision is True
-        Return an array of the astropy.times (UTC) of the TOAs
+        Return the astropy Time (one vector for all TOAs, normally UTC) of the TOAs
 
         With high_precision is False
         Return an array of toas in mjd as double precision floats
@@ -950,13 +1114,14 @@ class TOAs(object):
         WARNING: Depending on the situation, you may get MJDs in a
         different scales (e.g. UTC, TT, or TDB) or even a mixture
         of scales if some TOAs are barycentred and some are not (a
-        perfectly valid situation when fitting both Fermi and radio TOAs)
+        perfectly valid situation when fitting both Fermi and radio TOAs);
+        in the latter case the high precision times are all returned in TT.
         """
         if high_precision:
             if hasattr(self, "toas"):
                 return np.array([t.mjd for t in self.toas])
             else:
-                return np.array([t for t in self.table["mjd"]])
+                return self.table["mjd"]
         else:
             if hasattr(self, "toas"):
                 return np.array([t.mjd.mjd for t in self.toas]) * u.day
@@ -1007,6 +1172,85 @@ class TOAs(object):
         else:
             return self.table["flags"]
 
+    def get_flag_column(self, flag):
+        """Get the values of a TOA flag in interned form.
+
+        The column is built from the ``flags`` dictionaries the first time a
+        flag is requested and kept until the table or its ``flags`` column is
+        replaced (for example by :func:`pint.toa.TOAs.select`); if the
+        dictionaries are changed in place, call
+        :func:`pint.toa.TOAs.clear_flag_cache`.
+
+        Parameters
+        ----------
+        flag : str
+            The flag name.
+
+        Returns
+        -------
+        values : numpy.ndarray
+            The distinct values of the flag (an object array).
+        codes : numpy.ndarray
+            For each TOA, the index into ``values`` of its flag value, or -1
+            if the TOA does not have the flag.
+        """
+        flags = self.table["flags"]
+        if self._flag_cache_column is not flags:
+            self._flag_cache = {}
+            self._flag_cache_column = flags
+        if flag not in self._flag_cache:
+            codes = np.empty(len(flags), dtype=int)
+            # Values of different types (1 and 1.0, say) are kept apart
+            index = {}
+            for ii, flag_dict in enumerate(flags):
+                try:
+                    val = flag_dict[flag]
+                except KeyError:
+                    codes[ii] = -1
+                    continue
+                codes[ii] = index.setdefault((type(val), val), len(index))
+            values = np.empty(len(index), dtype=object)
+            for (t, val), code in index.items():
+                values[code] = val
+            self._flag_cache[flag] = values, codes
+        return self._flag_cache[flag]
+
+    def clear_flag_cache(self):
+        """Discard the flag columns built by get_flag_column.
+
+        This must be called after the ``flags`` dictionaries have been
+        modified in place.
+        """
+        self._flag_cache = {}
+        self._flag_cache_column = None
+        self.version += 1
+
+    @property
+    def selection_cache(self):
+        """A dictionary for caching TOA selections, such as the TOAs a mask
+        parameter applies to, and other quantities derived from the table,
+        such as the zenith directions used by the troposphere model.
+
+        It is emptied when ``version`` changes or when the table or its
+        ``flags``, ``error``, ``mjd`` or ``tdbld`` columns are replaced.
+        Code that modifies the table contents in place should increment
+        ``version``.
+        """
+        cols = self.table.columns
+        state = (
+            self.version,
+            self.table,
+            cols["flags"],
+            cols["error"],
+            cols["mjd"],
+            cols.get("tdbld"),
+        )
+        old = self._selection_cache_state
+        if old is None or any(a is not b for a, b in zip(old, state)):
+            self._selection_cache = {}
+            self._selection_cache_state = state
+        return self._selection_cache
+
     def get_flag_value(self, flag, fill_value=None):
         """Get the request TOA flag values.
 
@@ -1020,17 +1264,14 @@ class TOAs(object):
         values : list
             A list of flag values from each TOA. If the TOA does not have
             the flag, it will fill up with the fill_value.
+        valid_index : list
+            The indices of the TOAs that have the flag.
         """
-        result = []
-        valid_index = []
-        for ii, flags in enumerate(self.table["flags"]):
-            try:
-                val = flags[flag]
-                valid_index.append(ii)
-            except KeyError:
-                val = fill_value
-            result.append(val)
-        return result, valid_index
+        values, codes = self.get_flag_column(flag)
+        lookup = np.empty(len(values) + 1, dtype=object)
+        lookup[:-1] = values
+        lookup[-1] = fill_value
+        return lookup[codes].tolist(), np.flatnonzero(codes >= 0).tolist()
 
     def get_dm_errors(self):
         """Get the Wideband DM data error"""
@@ -1048,34 +1289,7 @@ class TOAs(object):
         if gap_limit is None:
             gap_limit = 0.0833
         if hasattr(self, "toas") or gap_limit != 0.0833:
-            gap_limit *= u.d
-            mjd_dict = OrderedDict()
-            mjd_values = self.get_mjds().value
-            for i in np.arange(len(mjd_values)):
-                mjd_dict[i] = mjd_values[i]
-            sorted_mjd_list = sorted(mjd_dict.items(), key=lambda kv: (kv[1], kv[0]))
-            indexes = [a[0] for a in sorted_mjd_list]
-            mjds = [a[1] for a in sorted_mjd_list]
-            gaps = np.diff(mjds)
-            lengths = []
-            count = 0
-            for i in range(len(gaps)):
-                if gaps[i] * u.d < gap_limit:
-                    count += 1
-                else:
-                    lengths += [count + 1]
-                    count = 0
-            lengths += [count + 1]
-            sorted_groups = []
-            groupnum = 0
-            for length in lengths:
-                sorted_groups += [groupnum] * length
-                groupnum += 1
-            group_dict = OrderedDict()
-            for i in np.arange(len(indexes)):
-                group_dict[indexes[i]] = sorted_groups[i]
-            groups = [group_dict[key] for key in sorted(group_dict)]
-            return groups
+            return _group_mjds(self.get_mjds().value, gap_limit)
         else:
             return self.table["groups"]
 
@@ -1107,6 +1321,7 @@ class TOAs(object):
             self.table_selects.append(copy.deepcopy(self.table))
             # Our TOA table must be grouped by observatory for phase calcs
             self.table = self.table[selectarray].group_by("obs")
+            self.version += 1
         else:
             raise ValueError("TOA selection not implemented for TOA lists.")
 
@@ -1114,6 +1329,7 @@ class TOAs(object):
         """Return to previous selected version of the TOA table (stored in stack)."""
         try:
             self.table = self.table_selects.pop()
+            self.version += 1
         except (AttributeError, IndexError) as e:
             log.error("No previous TOA table found.  No changes made.")
 
@@ -1216,15 +1432,19 @@ class TOAs(object):
             raise ValueError("Type of argument must be TimeDelta")
         if delta.shape != col.shape:
             raise ValueError("Shape of mjd column and delta must be compatible")
-        for ii in range(len(col)):
-            col[ii] = col[ii] + delta[ii]
+        col[:] = col + delta
+        self.version += 1
 
         # This adjustment invalidates the derived columns in the table, so delete
         # and recompute them
-        # Changed high_precision from False to True to avoid self referential get_mjds()
-        self.table["mjd_float"] = [
-            t.mjd for t in self.get_mjds(high_precision=True)
-        ] * u.day
+        mjd_float = np.zeros(self.ntoas)
+        for ii, key in enumerate(self.table.groups.keys):
+            loind, hiind = self.table.groups.indices[ii : ii + 2]
+            site = get_observatory(key["obs"])
+            mjd_float[loind:hiind] = self._get_group_mjds(
+                self.table.groups[ii], site
+            ).mjd
+        self.table["mjd_float"] = mjd_float * u.day
         self.compute_TDBs()
         self.compute_posvels(self.ephem, self.planets)
 
@@ -1264,8 +1484,12 @@ class TOAs(object):
             for i in range(len(self.table["flags"])):
                 self.table["flags"][i]["pn"] = self.table["pulse_number"][i]
 
-        for (toatime, toaerr, freq, obs, flags) in zip(
-            self.table["mjd"],
+        # Remove the clock corrections so the file holds the original times
+        toatimes = self.table["mjd"]
+        if "clkcorr" in self.table.colnames:
+            toatimes = toatimes - time.TimeDelta(self.table["clkcorr"].quantity)
+        for (toatime_out, toaerr, freq, obs, flags) in zip(
+            toatimes,
             self.table["error"].quantity,
             self.table["freq"].quantity,
             self.table["obs"],
@@ -1273,10 +1497,6 @@ class TOAs(object):
         ):
             obs_obj = Observatory.get(obs)
 
-            if "clkcorr" in flags.keys():
-                toatime_out = toatime - time.TimeDelta(flags["clkcorr"])
-            else:
-                toatime_out = toatime
             out_str = format_toa_line(
                 toatime_out,
                 toaerr,
@@ -1296,6 +1516,13 @@ class TOAs(object):
         if not handle:
             outf.close()
 
+    def _get_group_mjds(self, grp, site):
+        """Return the times of one observatory group in the site's timescale."""
+        mjds = grp["mjd"]
+        if mjds.scale != site.timescale:
+            mjds = getattr(mjds, site.timescale)
+        return mjds
+
     def apply_clock_corrections(
         self, include_bipm=True, bipm_version=bipm_default, include_gps=True
     ):
@@ -1303,7 +1530,7 @@ class TOAs(object):
 
         Apply clock corrections to all the TOAs where corrections are
         available.  This routine actually changes the value of the TOA,
-        although the correction is also listed as a new flag for the TOA
+        although the correction is also stored in a new table column
         called 'clkcorr' so that it can be reversed if necessary.  This
         routine also applies all 'TIME' commands and treats them exactly
         as if they were a part of the observatory clock corrections.
@@ -1315,22 +1542,21 @@ class TOAs(object):
         https://github.com/nanograv/PINT/wiki/Clock-Corrections-and-Timescales-in-PINT
         """
         # First make sure that we haven't already applied clock corrections
-        flags = self.table["flags"]
-        if any(["clkcorr" in f for f in flags]):
-            if all(["clkcorr" in f for f in flags]):
-                log.warning("Clock corrections already applied. Not re-applying.")
-                return
-            else:
-                # FIXME: could apply clock corrections to just the ones that don't have any
-                raise ValueError("Some TOAs have 'clkcorr' flag and some do not!")
+        if "clkcorr" in self.table.colnames:
+            log.warning("Clock corrections already applied. Not re-applying.")
+            return
         # An array of all the time corrections, one for each TOA
         log.info(
             "Applying clock corrections (include_GPS = {0}, include_BIPM = {1})".format(
                 include_gps, include_bipm
             )
         )
-        corr = np.zeros(self.ntoas) * u.s
-        times = self.table["mjd"]
+        # TIME commands are in sec
+        # SUGGESTION(@paulray): These time correction units should
+        # be applied in the parser, not here. In the table the time
+        # correction should have units.
+        corr = np.array([f.get("to", 0.0) for f in self.table["flags"]]) * u.s
+        col = self.table["mjd"]
         for ii, key in enumerate(self.table.groups.keys):
             grp = self.table.groups[ii]
             obs = self.table.groups.keys[ii]["obs"]
@@ -1341,24 +1567,17 @@ class TOAs(object):
                 bipm_version=bipm_version,
             )
             loind, hiind = self.table.groups.indices[ii : ii + 2]
-            # First apply any TIME statements
-            for jj in range(loind, hiind):
-                if "to" in flags[jj]:
-                    # TIME commands are in sec
-                    # SUGGESTION(@paulray): These time correction units should
-                    # be applied in the parser, not here. In the table the time
-                    # correction should have units.
-                    corr[jj] = flags[jj]["to"] * u.s
-                    times[jj] += time.TimeDelta(corr[jj])
-
-            gcorr = site.clock_corrections(time.Time(grp["mjd"]))
-            for jj, cc in enumerate(gcorr):
-                grp["mjd"][jj] += time.TimeDelta(cc)
+            # First apply any TIME statements, then the observatory clock
+            # corrections evaluated at the shifted times
+            grpmjds = self._get_group_mjds(grp, site)
+            grpmjds = grpmjds + time.TimeDelta(corr[loind:hiind])
+            gcorr = site.clock_corrections(grpmjds)
+            grpmjds = grpmjds + time.TimeDelta(gcorr)
             corr[loind:hiind] += gcorr
-            # Now update the flags with the clock correction used
-            for jj in range(loind, hiind):
-                if corr[jj] != 0:
-                    flags[jj]["clkcorr"] = corr[jj]
+            col[loind:hiind] = grpmjds
+        # Keep the correction used so that it can be reversed if necessary
+        self.table["clkcorr"] = corr
+        self.version += 1
         # Update clock correction info
         self.clock_corr_info.update(
             {
@@ -1402,45 +1621,38 @@ class TOAs(object):
         self.ephem = ephem
 
         # Compute in observatory groups
-        tdbs = np.zeros_like(self.table["mjd"])
+        tdb_jd1 = np.zeros(self.ntoas)
+        tdb_jd2 = np.zeros(self.ntoas)
+        tdbld = np.zeros(self.ntoas, dtype=np.longdouble)
         for ii, key in enumerate(self.table.groups.keys):
             grp = self.table.groups[ii]
             obs = self.table.groups.keys[ii]["obs"]
             loind, hiind = self.table.groups.indices[ii : ii + 2]
             site = get_observatory(obs)
-            if isinstance(site, TopoObs):
-                # For TopoObs, it is safe to assume that all TOAs have same location
-                # I think we should report to astropy that initializing
-                # a Time from a list (or Column) of Times throws away the location information
-                grpmjds = time.Time(grp["mjd"], location=grp["mjd"][0].location)
-            else:
-                # Grab locations for each TOA
-                # It is crazy that I have to deconstruct the locations like
-                # this to build a single EarthLocation object with an array
-                # of locations contained in it.
-                # Is there a more efficient way to convert a list of EarthLocations
-                # into a single EarthLocation object with an array of values internally?
-                loclist = [t.location for t in grp["mjd"]]
-                if loclist[0] is None:
-                    grpmjds = time.Time(grp["mjd"], location=None)
-                else:
-                    locs = EarthLocation(
-                        np.array([l.x.value for l in loclist]) * u.m,
-                        np.array([l.y.value for l in loclist]) * u.m,
-                        np.array([l.z.value for l in loclist]) * u.m,
-                    )
-                    grpmjds = time.Time(grp["mjd"], location=locs)
+            grpmjds = self._get_group_mjds(grp, site)
 
             if isinstance(site, SpacecraftObs):
                 grptdbs = site.get_TDBs(grpmjds, method=method, ephem=ephem, grp=grp)
             else:
                 grptdbs = site.get_TDBs(grpmjds, method=method, ephem=ephem)
-            tdbs[loind:hiind] = np.asarray([t for t in grptdbs])
+            grptdbs = grptdbs.tdb
+            tdb_jd1[loind:hiind] = grptdbs.jd1
+            tdb_jd2[loind:hiind] = grptdbs.jd2
+            tdbld[loind:hiind] = grptdbs.mjd_long
 
         # Now add the new columns to the table
-        col_tdb = table.Column(name="tdb", data=tdbs)
-        col_tdbld = table.Column(name="tdbld", data=[t.tdb.mjd_long for t in tdbs])
-        self.table.add_columns([col_tdb, col_tdbld])
+        tdbs = time.Time(
+            tdb_jd1,
+            tdb_jd2,
+            format="jd",
+            scale="tdb",
+            location=self.table["mjd"].location,
+            precision=9,
+        )
+        tdbs.format = "mjd"
+        self.table["tdb"] = tdbs
+        self.table["tdbld"] = tdbld
+        self.version += 1
 
     def compute_posvels(self, ephem=None, planets=False):
         """Compute positions and velocities of the observatories and Earth.
@@ -1531,7 +1743,7 @@ class TOAs(object):
             obs = self.table.groups.keys[ii]["obs"]
             loind, hiind = self.table.groups.indices[ii : ii + 2]
             site = get_observatory(obs)
-            tdb = time.Time(grp["tdb"], precision=9)
+            tdb = grp["tdb"]
 
             if isinstance(site, SpacecraftObs):
                 ssb_obs = site.posvel(tdb, ephem, grp)
@@ -1554,6 +1766,7 @@ class TOAs(object):
             cols_to_add += plan_poss.values()
         log.debug("Adding columns " + " ".join([cc.name for cc in cols_to_add]))
         self.table.add_columns(cols_to_add)
+        self.version += 1
 
     def add_vel_ecl(self, obliquity):
         """Compute and add a column to self.table with velocities in ecliptic coordinates.
@@ -1584,7 +1797,7 @@ class TOAs(object):
             obs = self.table.groups.keys[ii]["obs"]
             loind, hiind = self.table.groups.indices[ii : ii + 2]
             site = get_observatory(obs)
-            tdb = time.Time(grp["tdb"], precision=9)
+            tdb = grp["tdb"]
 
             if isinstance(site, SpacecraftObs):
                 ssb_obs = site.posvel(tdb, ephem, grp)
@@ -1609,6 +1822,99 @@ class TOAs(object):
         log.debug("Adding columns " + " ".join(col.name))
         self.table.add_column(col)
 
+    def _table_from_columns(self):
+        """Build the TOA table from the columns collected by read_toa_file.
+
+        Times are constructed as one vector :class:`astropy.time.Time` per
+        observatory (with that observatory's timescale and location) rather
+        than one object per TOA.
+        """
+        cols = self._toa_columns
+        obss = np.array(cols["obs"], dtype=str)
+        # Long double MJDs (from get_TOAs_array) are passed on as they are
+        mjd_int = np.asarray(cols["mjd_int"])
+        mjd_frac = np.asarray(cols["mjd_frac"])
+        if mjd_int.dtype != np.longdouble:
+            mjd_int = mjd_int.astype(np.float64)
+        if mjd_frac.dtype != np.longdouble:
+            mjd_frac = mjd_frac.astype(np.float64)
+        group_times = []
+        for obs in np.unique(obss):
+            ii = np.nonzero(obss == obs)[0]
+            site = get_observatory(obs)
+            # Note that when scale is UTC, must use pulsar_mjd format!
+            if site.timescale.lower() == "utc":
+                fmt = "pulsar_mjd"
+            else:
+                fmt = "mjd"
+            t = time.Time(
+                mjd_int[ii],
+                mjd_frac[ii],
+                scale=site.timescale,
+                format=fmt,
+                precision=9,
+            )
+            loc = site.earth_location_itrf(time=t)
+            group_times.append((ii, time.Time(t, location=loc, precision=9)))
+        return self._build_table(
+            group_times,
+            np.array(cols["error"], dtype=np.float64) * u.us,
+            np.array(cols["freq"], dtype=np.float64) * u.MHz,
+            obss,
+            cols["flags"],
+        )
+
+    def _table_from_toas(self):
+        """Build the TOA table from the list of TOA objects in ``self.toas``.
+
+        The times of each observatory are combined into one vector
+        :class:`astropy.time.Time`, with the location recomputed for the
+        whole group as the TOA constructor does for each TOA.
+        """
+        obss = self.get_obss()
+        group_times = []
+        for obs in np.unique(obss):
+            ii = np.nonzero(obss == obs)[0]
+            site = get_observatory(obs)
+            t = time.Time([self.toas[i].mjd for i in ii], precision=9)
+            loc = site.earth_location_itrf(time=t)
+            group_times.append((ii, time.Time(t, location=loc, precision=9)))
+        return self._build_table(
+            group_times, self.get_errors(), self.get_freqs(), obss, self.get_flags()
+        )
+
+    def _build_table(self, group_times, errors, freqs, obss, flags):
+        """Assemble the (ungrouped) TOA table from per-observatory times."""
+        ntoas = len(obss)
+        mjds, mjd_float = _merge_group_times(ntoas, group_times)
+        flagcol = np.empty(ntoas, dtype=object)
+        flagcol[:] = list(flags)
+        return table.Table(
+            [
+                np.arange(ntoas),
+                mjds,
+                mjd_float * u.day,
+                errors,
+                freqs,
+                np.asarray(obss, dtype=str),
+                flagcol,
+                np.zeros(ntoas),
+                _group_mjds(mjd_float, 0.0833),
+            ],
+            names=(
+                "index",
+                "mjd",
+                "mjd_float",
+                "error",
+                "freq",
+                "obs",
+                "flags",
+                "delta_pulse_number",
+                "groups",
+            ),
+            meta={"filename": self.filename},
+        )
+
     def read_pickle_file(self, filename):
         """Read the TOAs from the pickle file specified in filename.
 
@@ -1635,11 +1941,47 @@ class TOAs(object):
             self.toas = tmp.toas
         if hasattr(tmp, "table"):
             self.table = tmp.table.group_by("obs")
+            if not isinstance(self.table["mjd"], time.Time):
+                # Written by older versions of PINT, one Time object per row
+                group_times = []
+                for ii, key in enumerate(self.table.groups.keys):
+                    loind, hiind = self.table.groups.indices[ii : ii + 2]
+                    site = get_observatory(key["obs"])
+                    t = time.Time(list(self.table["mjd"][loind:hiind]), precision=9)
+                    loc = site.earth_location_itrf(time=t)
+                    group_times.append(
+                        (
+                            np.arange(loind, hiind),
+                            time.Time(t, location=loc, precision=9),
+                        )
+                    )
+                self.table["mjd"] = _merge_group_times(self.ntoas, group_times)[0]
+            if "clkcorr" not in self.table.colnames and any(
+                "clkcorr" in f for f in self.table["flags"]
+            ):
+                # Older versions of PINT recorded clock corrections as a flag
+                self.table["clkcorr"] = [
+                    f.pop("clkcorr", 0 * u.s).to_value(u.s) for f in self.table["flags"]
+                ] * u.s
         self.commands = tmp.commands
         self.clock_corr_info = tmp.clock_corr_info
         self.ephem = tmp.ephem
         self.planets = tmp.planets
 
+    def read_cache_entry(self, path):
+        """Read the TOAs from a TOA cache entry.
+
+        See :mod:`pint.toa_cache`; normally cache entries are used through
+        :func:`pint.toa.get_TOAs`.
+        """
+        log.info("Reading cached TOAs from '%s'..." % path)
+        self.table, header = toa_cache.read_entry(path)
+        self.filename = header["filename"]
+        self.commands = [(c, n) for c, n in header["commands"]]
+        self.clock_corr_info = header["clock_corr_info"]
+        self.ephem = header["ephem"]
+        self.planets = header["planets"]
+
     def read_toa_file(self, filename, process_includes=True, top=True):
         """Read TOAs from the given filename.
 
@@ -1668,8 +2010,15 @@ class TOAs(object):
 
         ntoas = 0
         if top:
-            self.toas = []
             self.commands = []
+            self._toa_columns = {
+                "mjd_int": [],
+                "mjd_frac": [],
+                "error": [],
+                "freq": [],
+                "obs": [],
+                "flags": [],
+            }
             self.cdict = {
                 "EFAC": 1.0,
                 "EQUAD": 0.0 * u.us,
@@ -1745,24 +2094,36 @@ class TOAs(object):
                 if top:
                     break
             else:
-                newtoa = TOA(MJD, **d)
+                # Collect the TOA into plain columns; the Time objects are
+                # built for all TOAs at once when the table is assembled
+                error = d.pop("error")
+                freq = d.pop("freq")
+                if freq == 0.0:
+                    freq = np.inf
+                obs = d.pop("obs")
                 if (
-                    (self.cdict["EMIN"] > newtoa.error)
-                    or (self.cdict["EMAX"] < newtoa.error)
-                    or (self.cdict["FMIN"] > newtoa.freq)
-                    or (self.cdict["FMAX"] < newtoa.freq)
+                    (self.cdict["EMIN"].to_value(u.us) > error)
+                    or (self.cdict["EMAX"].to_value(u.us) < error)
+                    or (self.cdict["FMIN"].to_value(u.MHz) > freq)
+                    or (self.cdict["FMAX"].to_value(u.MHz) < freq)
                 ):
                     continue
                 else:
-                    newtoa.error *= self.cdict["EFAC"]
-                    newtoa.error = np.hypot(newtoa.error, self.cdict["EQUAD"])
+                    error *= self.cdict["EFAC"]
+                    error = np.hypot(error, self.cdict["EQUAD"].to_value(u.us))
                     if self.cdict["INFO"]:
-                        newtoa.flags["info"] = self.cdict["INFO"]
+                        d["info"] = self.cdict["INFO"]
                     if self.cdict["JUMP"][0]:
-                        newtoa.flags["jump"] = self.cdict["JUMP"][1]
+                        d["jump"] = self.cdict["JUMP"][1]
                     if self.cdict["PHASE"] != 0:
-                        newtoa.flags["phase"] = self.cdict["PHASE"]
+                        d["phase"] = self.cdict["PHASE"]
                     if self.cdict["TIME"] != 0.0:
-                        newtoa.flags["to"] = self.cdict["TIME"]
-                    self.toas.append(newtoa)
+                        d["to"] = self.cdict["TIME"]
+                    columns = self._toa_columns
+                    columns["mjd_int"].append(MJD[0])
+                    columns["mjd_frac"].append(MJD[1])
+                    columns["error"].append(error)
+                    columns["freq"].append(freq)
+                    columns["obs"].append(obs)
+                    columns["flags"].append(d)
                     ntoas += 1
@@ -0,0 +1,328 @@
+"""On-disk cache of loaded and processed TOAs.
+
+Loading a ``.tim`` file with :func:`pint.toa.get_TOAs` means parsing it,
+applying clock corrections, computing TDBs and computing observatory
+positions, which can take minutes for large data sets. This module stores the
+result so that later loads take seconds.
+
+Each cache entry is a directory holding one ``.npy`` file per array and a
+JSON header. Times are stored as their two-part Julian dates and
+observatory positions, and these and the other numeric columns are
+memory-mapped when the entry is read, so only the parts of the table that
+are used are read from disk. ``longdouble`` columns cannot be mapped
+portably; they are stored as two ``float64`` arrays whose sum is exactly the
+original value and rebuilt in memory. A cached ``TOAs`` is bit-for-bit
+identical to a freshly computed one.
+
+An entry is keyed on the contents of the ``.tim`` file and of any files it
+INCLUDEs, on the options passed to :func:`pint.toa.get_TOAs` and on the PINT
+version; before an entry is used, the clock files it was computed with are
+checked against the files the observatories would read now. Earth
+orientation (IERS) tables and the contents of ephemeris files are not
+checked.
+"""
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import astropy.table as table
+import astropy.units as u
+import numpy as np
+from astropy import log
+from astropy.config.paths import get_cache_dir
+from astropy.coordinates import EarthLocation
+from astropy.table.groups import TableGroups
+
+import pint
+from pint.observatory import get_observatory
+from pint.pulsar_mjd import Time
+
+__all__ = ["cache_key", "entry_path", "check_entry", "write_entry", "read_entry"]
+
+# Increase this whenever the layout of an entry changes
+CACHE_FORMAT = 2
+ENTRY_SUFFIX = ".toacache"
+HEADER_NAME = "header.json"
+# How the geocentric positions of a Time's location are laid out in memory
+_XYZ_DTYPE = np.dtype([("x", np.float64), ("y", np.float64), ("z", np.float64)])
+
+
+def _file_digest(filename):
+    """Return the SHA-256 hex digest of the contents of filename."""
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _tim_files(timfile, seen=None):
+    """List timfile and, recursively, all the files it INCLUDEs.
+
+    Included file names are interpreted as in
+    :func:`pint.toa.TOAs.read_toa_file`, that is, relative to the current
+    directory.
+    """
+    if seen is None:
+        seen = set()
+    if timfile in seen:
+        return []
+    seen.add(timfile)
+    files = [timfile]
+    with open(timfile, "r") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) > 1 and fields[0].upper() == "INCLUDE":
+                files.extend(_tim_files(fields[1], seen))
+    return files
+
+
+def _clock_file_digests(obss, clock_corr_info):
+    """Map each clock file the observatories obss use to its digest.
+
+    Files that cannot be found map to None.
+    """
+    digests = {}
+    for obs in obss:
+        site = get_observatory(obs, **clock_corr_info)
+        for f in site.clock_files():
+            if f not in digests:
+                digests[f] = _file_digest(f) if os.path.isfile(f) else None
+    return digests
+
+
+def cache_key(timfile, **options):
+    """Compute the cache key for loading timfile with the given options.
+
+    Parameters
+    ----------
+    timfile : str
+        Name of the ``.tim`` file.
+    options
+        The processing options (ephemeris, clock correction settings, ...)
+        that were passed to :func:`pint.toa.get_TOAs`. Their values must
+        have a faithful ``repr``.
+
+    Returns
+    -------
+    str
+        A hexadecimal string that changes whenever the contents of timfile,
+        of any file it INCLUDEs, or any of the options change.
+    """
+    h = hashlib.sha256()
+    h.update(("PINT {} format {}\n".format(pint.__version__, CACHE_FORMAT)).encode())
+    for name in sorted(options):
+        h.update(("{}={!r}\n".format(name, options[name])).encode())
+    for f in _tim_files(timfile):
+        h.update((_file_digest(f) + "\n").encode())
+    return h.hexdigest()
+
+
+def entry_path(key, cachedir=None):
+    """Return the name of the cache entry for key.
+
+    If cachedir is None, entries are kept in a ``pint_toas`` directory in
+    the astropy cache directory.
+    """
+    if cachedir is None:
+        cachedir = os.path.join(get_cache_dir(), "pint_toas")
+    return os.path.join(cachedir, key + ENTRY_SUFFIX)
+
+
+def _read_header(path):
+    with open(os.path.join(path, HEADER_NAME), "r") as f:
+        return json.load(f)
+
+
+def check_entry(path, key):
+    """Check whether the cache entry at path is usable for key.
+
+    The entry must exist, have been written for key by a compatible
+    version of this module, and the clock files it was computed with must
+    be unchanged.
+    """
+    try:
+        header = _read_header(path)
+    except (OSError, ValueError):
+        return False
+    if header.get("format") != CACHE_FORMAT or header.get("key") != key:
+        return False
+    digests = _clock_file_digests(header["observatories"], header["clock_corr_info"])
+    if digests != header["clock_files"]:
+        log.info("Clock files changed since TOA cache entry {} was written".format(path))
+        return False
+    return True
+
+
+def write_entry(toas, path, key):
+    """Store a processed TOAs object as the cache entry at path.
+
+    The entry is written to a temporary directory and then renamed into
+    place, so readers never see a partially written entry.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    tab = toas.table
+    header = {
+        "format": CACHE_FORMAT,
+        "key": key,
+        "pint_version": pint.__version__,
+        "filename": toas.filename,
+        "commands": toas.commands,
+        "ephem": toas.ephem,
+        "planets": toas.planets,
+        "clock_corr_info": toas.clock_corr_info,
+        "observatories": sorted(toas.observatories),
+        "clock_files": _clock_file_digests(
+            sorted(toas.observatories), toas.clock_corr_info
+        ),
+        "meta": dict(tab.meta),
+        "ntoas": len(tab),
+        # The table is kept in observatory order, so the groups can be
+        # restored without sorting it again
+        "groups": {
+            "keys": [str(k) for k in tab.groups.keys["obs"]],
+            "indices": [int(i) for i in tab.groups.indices],
+        },
+        "columns": [],
+    }
+    tmpdir = tempfile.mkdtemp(prefix=".tmp", dir=parent)
+    try:
+
+        def save(name, array):
+            fname = "{}.npy".format(name)
+            np.save(os.path.join(tmpdir, fname), np.ascontiguousarray(array))
+            return fname
+
+        for name in tab.colnames:
+            col = tab[name]
+            desc = {"name": name}
+            if isinstance(col, Time):
+                desc.update(
+                    kind="time",
+                    scale=col.scale,
+                    format=col.format,
+                    precision=col.precision,
+                    jd1=save(name + ".jd1", col.jd1),
+                    jd2=save(name + ".jd2", col.jd2),
+                )
+                if col.location is not None:
+                    xyz = np.stack(
+                        [
+                            col.location.x.to_value(u.m),
+                            col.location.y.to_value(u.m),
+                            col.location.z.to_value(u.m),
+                        ],
+                        axis=-1,
+                    )
+                    desc["location"] = save(name + ".location", xyz)
+            elif col.dtype == object:
+                # Only dictionaries of plain values, such as the flags
+                desc.update(kind="json", data=name + ".json")
+                with open(os.path.join(tmpdir, desc["data"]), "w") as f:
+                    json.dump(list(col), f)
+            elif col.dtype.kind == "f" and col.dtype.itemsize > 8:
+                hi = col.data.astype(np.float64)
+                lo = (col.data - hi).astype(np.float64)
+                desc.update(
+                    kind="longdouble",
+                    dtype=col.dtype.str,
+                    hi=save(name + ".hi", hi),
+                    lo=save(name + ".lo", lo),
+                )
+            else:
+                desc.update(kind="column", data=save(name, col.data))
+            if desc["kind"] != "time":
+                desc.update(
+                    unit=None if col.unit is None else col.unit.to_string(),
+                    meta=dict(col.meta),
+                )
+            header["columns"].append(desc)
+        with open(os.path.join(tmpdir, HEADER_NAME), "w") as f:
+            json.dump(header, f)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(tmpdir, path)
+    except Exception:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise
+
+
+def read_entry(path):
+    """Read the cache entry at path.
+
+    Times, observatory positions and numeric columns are memory-mapped
+    copy-on-write, so they are only read from disk as they are used and
+    modifying the returned table does not alter the entry. ``longdouble``
+    and object columns are rebuilt in memory.
+
+    Returns
+    -------
+    tab : astropy.table.Table
+        The TOA table, grouped by observatory.
+    header : dict
+        The remaining contents of the entry, including ``filename``,
+        ``commands``, ``ephem``, ``planets`` and ``clock_corr_info``.
+    """
+    header = _read_header(path)
+
+    def load(fname):
+        return np.load(os.path.join(path, fname), mmap_mode="c")
+
+    columns = []
+    for desc in header["columns"]:
+        kind = desc["kind"]
+        if kind == "time":
+            location = None
+            if "location" in desc:
+                xyz = load(desc["location"])
+                location = u.Quantity(
+                    xyz.view(_XYZ_DTYPE)[:, 0], u.m, copy=False
+                ).view(EarthLocation)
+            jd1, jd2 = load(desc["jd1"]), load(desc["jd2"])
+            col = Time(
+                jd1,
+                jd2,
+                format="jd",
+                scale=desc["scale"],
+                location=location,
+                precision=desc["precision"],
+            )
+            # Time normalizes its input into new arrays; the stored values
+            # already are normalized, so use the mapped ones instead
+            col._time.jd1, col._time.jd2 = jd1, jd2
+            col.format = desc["format"]
+        else:
+            if kind == "json":
+                with open(os.path.join(path, desc["data"]), "r") as f:
+                    data = np.empty(header["ntoas"], dtype=object)
+                    data[:] = json.load(f)
+            elif kind == "longdouble":
+                data = load(desc["hi"]).astype(desc["dtype"])
+                data += load(desc["lo"])
+            else:
+                data = load(desc["data"])
+            col = table.Column(
+                data,
+                name=desc["name"],
+                unit=desc["unit"],
+                meta=desc["meta"],
+                copy=False,
+            )
+        columns.append(col)
+    tab = table.Table(
+        columns, names=[desc["name"] for desc in header["columns"]], copy=False
+    )
+    tab.meta.update(header["meta"])
+    groups = header["groups"]
+    tab._groups = TableGroups(
+        tab,
+        indices=np.array(groups["indices"]),
+        keys=table.Table([groups["keys"]], names=["obs"]),
+    )
+    return tab, header
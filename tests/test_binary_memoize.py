@@ -0,0 +1,105 @@
+import os
+
+import astropy.units as u
+import numpy as np
+import pytest
+
+from pint.models import get_model
+from pint.models.stand_alone_psr_binaries.DD_model import DDmodel
+from pint.toa import make_fake_toas
+from pinttestdata import datadir
+
+
+@pytest.fixture
+def dd():
+    m = DDmodel()
+    t = np.linspace(54200.0, 55000.0, 100) * u.day
+    m.update_input(barycentric_toa=t, PB=5.0, ECC=0.1, A1=10.0)
+    return m
+
+
+def test_memoized_values_reused(dd):
+    E = dd.E()
+    d = dd.prtl_der("E", "PB")
+    assert dd.E() is E
+    assert dd.prtl_der("E", "PB") is d
+    # Equal inputs keep the cached values
+    dd.update_input(barycentric_toa=dd.t.copy(), PB=5.0, ECC=0.1)
+    assert dd.E() is E
+    assert dd.prtl_der("E", "PB") is d
+
+
+@pytest.mark.parametrize(
+    "updates",
+    [{"ECC": 0.2}, {"T0": np.longdouble(54001.0) * u.day}, {"barycentric_toa": None}],
+)
+def test_changed_inputs_invalidate(dd, updates):
+    updates = dict(updates)
+    if "barycentric_toa" in updates:
+        updates["barycentric_toa"] = dd.t + 1 * u.day
+    delay = dd.DDdelay()
+    d = dd.d_DDdelay_d_par("PB")
+    dd.update_input(**updates)
+
+    fresh = DDmodel()
+    fresh.update_input(barycentric_toa=dd.t, PB=5.0, ECC=0.1, A1=10.0)
+    fresh.update_input(**updates)
+    assert np.all(dd.DDdelay() == fresh.DDdelay())
+    assert np.all(dd.d_DDdelay_d_par("PB") == fresh.d_DDdelay_d_par("PB"))
+    assert not np.all(dd.DDdelay() == delay)
+    assert not np.all(dd.d_DDdelay_d_par("PB") == d)
+
+
+@pytest.mark.parametrize(
+    "parfile",
+    ["B1855+09_NANOGrav_9yv1.gls.par", "J1713+0747_NANOGrav_11yv0.gls.par"],
+)
+def test_designmatrix_after_parameter_change(parfile):
+    m = get_model(os.path.join(datadir, parfile))
+    t = make_fake_toas(54000, 56000, 50, m, freq=1400 * u.MHz, obs="AO")
+    m.designmatrix(t)
+    m.PB.value += 1e-6
+    m.OM.value += 1e-3
+    M = m.designmatrix(t)[0]
+
+    m2 = get_model(os.path.join(datadir, parfile))
+    m2.PB.value = m.PB.value
+    m2.OM.value = m.OM.value
+    assert np.all(M == m2.designmatrix(t)[0])
+    assert np.all(m.delay(t) == m2.delay(t))
+
+
+def test_kepler_warm_start(dd):
+    dd.kepler_warm_start = True
+    dd.E()
+    dd.update_input(PB=5.000001)
+    fresh = DDmodel()
+    fresh.update_input(barycentric_toa=dd.t, PB=5.000001, ECC=0.1, A1=10.0)
+    assert np.allclose(dd.E(), fresh.E(), atol=1e-14 * u.rad, rtol=0)
+
+
+def test_clear_cache_drops_warm_start(dd):
+    dd.kepler_warm_start = True
+    dd.E()
+    dd.update_input(PB=5.000001)
+    dd.clear_cache()
+    fresh = DDmodel()
+    fresh.update_input(barycentric_toa=dd.t, PB=5.000001, ECC=0.1, A1=10.0)
+    assert np.all(dd.E() == fresh.E())
+
+
+def test_kepler_warm_start_block():
+    m = get_model(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.gls.par"))
+    assert not m.binary_instance.kepler_warm_start
+    t = make_fake_toas(54000, 56000, 50, m, freq=1400 * u.MHz, obs="AO")
+    delay = m.delay(t)
+    with m.kepler_warm_start():
+        assert m.binary_instance.kepler_warm_start
+        pb = m.PB.value
+        m.PB.value += 1e-6
+        m.delay(t)
+        m.PB.value = pb
+        m.delay(t)
+    assert not m.binary_instance.kepler_warm_start
+    # Nothing from inside the block is reused
+    assert np.all(m.delay(t) == delay)
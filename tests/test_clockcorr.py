@@ -6,8 +6,9 @@ import astropy.units as u
 import numpy
 from pinttestdata import datadir
 from os import path
-from astropy.time import Time
+from astropy.time import Time, TimeDelta
 
+from pint import toa
 from pint.observatory import Observatory
 from pint.observatory.clock_file import ClockFile
 
@@ -39,3 +40,26 @@ class TestClockcorrection(unittest.TestCase):
         t = Time(57109.5, scale="utc", format="mjd")
         e = cf.evaluate(t)
         assert numpy.isclose(e.to(u.us).value, 7.907)
+
+    def test_clkcorr_column_includes_time_commands(self):
+        raw = toa.TOAs(path.join(datadir, "test2.tim"))
+        t = toa.TOAs(path.join(datadir, "test2.tim"))
+        t.apply_clock_corrections()
+        # The first TOA follows a "TIME 1.0" command, the others are cancelled
+        to = numpy.array([f.get("to", 0.0) for f in raw.table["flags"]]) * u.s
+        assert to[0] == 1.0 * u.s
+        assert numpy.all(to[1:] == 0.0 * u.s)
+
+        site = Observatory.get("arecibo")
+        shifted = raw.table["mjd"] + TimeDelta(to)
+        gcorr = site.clock_corrections(shifted)
+        assert numpy.all(t.table["clkcorr"].quantity == to + gcorr)
+        assert numpy.all(
+            numpy.abs((t.table["mjd"] - (shifted + TimeDelta(gcorr))).sec) < 1e-12
+        )
+        assert all("clkcorr" not in f for f in t.table["flags"])
+
+        # Applying them again must not change anything
+        mjds = t.table["mjd"].copy()
+        t.apply_clock_corrections()
+        assert numpy.all(t.table["mjd"] == mjds)
@@ -6,16 +6,20 @@ import numpy as np
 from pint.models import get_model
 from pint.toa import get_TOAs
 from pint.pint_matrix import (
+    DesignMatrix,
     DesignMatrixMaker,
     combine_design_matrices_by_quantity,
     combine_design_matrices_by_param,
+    SparseColumnBuilder,
+    sparse_normal_matrix,
 )
 import astropy.units as u
+import scipy.sparse
 from pinttestdata import datadir
 
 
 class TestDesignMatrix:
-    def setup(self):
+    def setup_method(self):
         os.chdir(datadir)
         self.par_file = "J1614-2230_NANOGrav_12yv3.wb.gls.par"
         self.tim_file = "J1614-2230_NANOGrav_12yv3.wb.tim"
@@ -111,3 +115,144 @@ class TestDesignMatrix:
             ]
             == 0.0
         )
+
+    def test_sparse_designmatrix(self):
+        toas = get_TOAs("B1855+09_NANOGrav_12yv3.wb.tim")
+        model = get_model("B1855+09_NANOGrav_12yv3.wb.gls.par")
+        matrices = []
+        for sparse in [False, True]:
+            toa_designmatrix = self.toa_designmatrix_maker(
+                toas, model, self.test_param_lite, sparse=sparse
+            )
+            dm_designmatrix = self.dm_designmatrix_maker(
+                toas,
+                model,
+                self.test_param_lite,
+                offset=True,
+                offset_padding=0.0,
+                sparse=sparse,
+            )
+            noise_designmatrix = self.noise_designmatrix_maker(
+                toas, model, sparse=sparse
+            )
+            combined = combine_design_matrices_by_param(
+                combine_design_matrices_by_quantity(
+                    [toa_designmatrix, dm_designmatrix]
+                ),
+                noise_designmatrix,
+            )
+            assert combined.sparse == sparse
+            matrices.append(combined)
+        dense, sparse = matrices
+        assert scipy.sparse.isspmatrix_csc(sparse.matrix)
+        assert sparse.labels == dense.labels
+        assert np.all(sparse.matrix.toarray() == dense.matrix)
+
+
+def test_sparse_column_builder():
+    dense = np.array([[1.0, 0.0, 2.0], [0.0, 0.0, 2.0], [3.0, 0.0, 2.0]])
+    builder = SparseColumnBuilder(3)
+    builder.append(dense[:, 0])
+    builder.append(dense[:, 1])
+    builder.append(2.0)
+    matrix = builder.tocsc()
+    assert matrix.nnz == 5
+    assert np.all(matrix.toarray() == dense)
+
+
+def test_sparse_normal_matrix():
+    np.random.seed(0)
+    dense = np.random.randn(100, 20)
+    dense[:, 5:] *= np.random.rand(100, 15) < 0.05
+    weights = np.random.rand(100)
+    expected = np.dot(dense.T, weights[:, None] * dense)
+    result = sparse_normal_matrix(scipy.sparse.csc_matrix(dense), weights)
+    assert np.allclose(result, expected, rtol=1e-14, atol=1e-14)
+    assert np.allclose(
+        sparse_normal_matrix(scipy.sparse.csc_matrix(dense)), np.dot(dense.T, dense)
+    )
+
+
+def test_sparse_designmatrix_dmx(monkeypatch):
+    model = get_model(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.gls.par"))
+    toas = get_TOAs(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.tim"))
+    dmx = model.components["DispersionDMX"]
+    dmx_params = [p for p in model.free_params if p.startswith("DMX_")]
+    assert len(dmx_params) > 10
+    dense, params, units, scale_by_F0 = model.designmatrix(toas)
+    calls = []
+    block = dmx.d_delay_d_DMX_matrix
+    monkeypatch.setattr(
+        dmx, "d_delay_d_DMX_matrix", lambda toas: calls.append(1) or block(toas)
+    )
+    # The DMX columns do not go through the dense derivatives
+    dense_params = []
+    d_delay_d_params = model.d_delay_d_params
+    monkeypatch.setattr(
+        model,
+        "d_delay_d_params",
+        lambda toas, params, acc_delay=None: dense_params.extend(params)
+        or d_delay_d_params(toas, params, acc_delay),
+    )
+    sparse, sparse_params, sparse_units, _ = model.designmatrix(toas, sparse=True)
+    assert calls == [1]
+    assert dense_params and not set(dense_params) & set(dmx_params)
+    assert sparse_params == params and sparse_units == units
+    assert scipy.sparse.isspmatrix_csc(sparse)
+    columns = [params.index(p) for p in dmx_params]
+    assert np.all(sparse[:, columns].toarray() == dense[:, columns])
+    assert np.all(sparse.toarray() == dense)
+
+
+def test_combine_sparse_by_param():
+    m1 = np.arange(12.0).reshape(6, 2) + 1
+    m2 = np.arange(15.0).reshape(5, 3) + 1
+    labels1 = [
+        {"toa": (0, 3, u.s), "dm": (3, 6, u.pc)},
+        {"a": (0, 1, u.s), "b": (1, 2, u.s)},
+    ]
+    labels2 = [
+        {"toa": (0, 3, u.s), "x": (3, 5, u.m)},
+        {"c": (0, 1, u.s), "d": (1, 2, u.s), "e": (2, 3, u.s)},
+    ]
+    dense = combine_design_matrices_by_param(
+        DesignMatrix(m1, labels1), DesignMatrix(m2, labels2)
+    )
+    sparse_m1 = DesignMatrix(scipy.sparse.csc_matrix(m1), labels1)
+    sparse = combine_design_matrices_by_param(sparse_m1, DesignMatrix(m2, labels2))
+    assert scipy.sparse.isspmatrix_csc(sparse.matrix)
+    assert sparse.matrix.nnz == m1.size + m2.size
+    assert sparse.labels == dense.labels
+    assert np.all(sparse.matrix.toarray() == dense.matrix)
+    with pytest.raises(ValueError):
+        combine_design_matrices_by_param(
+            sparse_m1, DesignMatrix(m2, labels2), padding=1.0
+        )
+
+
+def test_sparse_designmatrix_jump(monkeypatch):
+    model = get_model(os.path.join(datadir, "J1614-2230_NANOGrav_12yv3.wb.gls.par"))
+    toas = get_TOAs(os.path.join(datadir, "J1614-2230_NANOGrav_12yv3.wb.tim"))
+    jumps = [p for p in model.free_params if p.startswith("JUMP")]
+    assert len(jumps) > 0
+    dense, params, units, scale_by_F0 = model.designmatrix(toas)
+    # The JUMP columns are made from the TOAs each JUMP selects
+    dense_params = []
+    d_phase_d_params = model.d_phase_d_params
+    monkeypatch.setattr(
+        model,
+        "d_phase_d_params",
+        lambda toas, delay, params, **kwargs: dense_params.extend(params)
+        or d_phase_d_params(toas, delay, params, **kwargs),
+    )
+    sparse, sparse_params, sparse_units, _ = model.designmatrix(toas, sparse=True)
+    assert dense_params and not set(dense_params) & set(jumps)
+    assert sparse_params == params and sparse_units == units
+    for p in jumps:
+        column = sparse[:, params.index(p)]
+        assert column.nnz == len(getattr(model, p).select_toa_mask(toas))
+    assert np.all(sparse.toarray() == dense)
+
+    maker = DesignMatrixMaker("phase", u.Unit(""))
+    matrices = [maker(toas, model, jumps + ["F0"], sparse=s) for s in [False, True]]
+    assert np.all(matrices[1].matrix.toarray() == matrices[0].matrix)
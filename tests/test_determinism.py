@@ -1,3 +1,4 @@
+import os
 import random
 from os.path import join
 
@@ -10,7 +11,7 @@ import pint.fermi_toas as fermi
 import pint.models
 import pint.toa as toa
 from pint.mcmc_fitter import MCMCFitter, MCMCFitterBinnedTemplate
-from pint.sampler import EmceeSampler
+from pint.sampler import EmceeSampler, PosteriorPool
 from pint.scripts.event_optimize import marginalize_over_phase, read_gaussfitfile
 from pinttestdata import datadir, testdir
 
@@ -110,3 +111,37 @@ def test_raw_emcee():
         samples = sampler.chain.reshape((-1, ndim))
         r.append(samples[0, 0])
     assert r[0] == r[1]
+
+
+def test_sampler_seed_ncores():
+    # A local function cannot be pickled, so this also checks that the
+    # workers use their inherited copy
+    def lnpost(theta):
+        return -0.5 * np.sum(theta ** 2)
+
+    r = []
+    for ncores in [1, 2]:
+        sampler = EmceeSampler(8, ncores=ncores, seed=42)
+        pos = sampler.get_initial_pos(["A", "B"], np.zeros(2), np.ones(2), 1.0)
+        sampler.initialize_sampler(lnpost, 2)
+        sampler.run_mcmc(pos, 20)
+        r.append(sampler.get_chain())
+        lnprob, theta = sampler.get_max_posterior()
+        assert lnprob == np.max(sampler.sampler.get_log_prob())
+        assert lnprob == lnpost(theta)
+    assert_array_equal(r[0], r[1])
+
+
+def test_posterior_pool():
+    calls = []
+
+    def lnpost(theta):
+        calls.append(theta)
+        return os.getpid()
+
+    with PosteriorPool(lnpost, 2) as pool:
+        pids = pool.map(pool.lnpostfn, range(10))
+    assert len(pids) == 10
+    assert os.getpid() not in pids
+    assert not calls
+    assert pool.lnpostfn(0) == os.getpid()
@@ -0,0 +1,122 @@
+import os
+
+import astropy.units as u
+import numpy as np
+import pytest
+import scipy.linalg as sl
+
+import pint.models as models
+import pint.toa as toa
+from pint.gls_likelihood import GLSLikelihood
+from pint.models.noise_model import (
+    create_quantization_epochs,
+    create_quantization_matrix,
+)
+from pint.residuals import Residuals
+from pinttestdata import datadir
+
+
+def quantization_epochs_loop(t, dt=1, nmin=2):
+    """Straightforward version: go through the TOAs in time order."""
+    isort = np.argsort(t)
+    buckets = [[isort[0]]]
+    ref = t[isort[0]]
+    for i in isort[1:]:
+        if t[i] - ref < dt:
+            buckets[-1].append(i)
+        else:
+            ref = t[i]
+            buckets.append([i])
+    labels = np.full(len(t), -1)
+    for n, b in enumerate([b for b in buckets if len(b) >= nmin]):
+        labels[b] = n
+    return labels
+
+
+@pytest.mark.parametrize("scale", [0.1, 0.5, 2])
+def test_quantization_epochs(scale):
+    rs = np.random.RandomState(42)
+    t = 4e9 + np.cumsum(rs.exponential(scale, size=500))
+    rs.shuffle(t)
+    labels = create_quantization_epochs(t)
+    assert np.all(labels == quantization_epochs_loop(t))
+    U = create_quantization_matrix(t)
+    assert U.shape == (len(t), labels.max() + 1)
+    assert np.all(U.sum(axis=1) == (labels >= 0))
+    assert np.all(U[labels >= 0, labels[labels >= 0]] == 1)
+
+
+def test_ecorr_blocks():
+    m = models.get_model(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.gls.par"))
+    t = toa.get_TOAs(
+        os.path.join(datadir, "B1855+09_NANOGrav_9yv1.tim"), ephem="DE436"
+    )
+    ecorr = m.get_components_by_category()["ecorr_noise"][0]
+    index, weight = ecorr.ecorr_epoch_weight_pair(t)
+    U, weight_U = ecorr.ecorr_basis_weight_pair(t)
+    assert np.all(weight == weight_U)
+    assert U.shape == (t.ntoas, len(weight))
+    assert np.all(U.sum(axis=0) >= 2)
+    assert np.allclose(ecorr.ecorr_cov_matrix(t), np.dot(U * weight, U.T), rtol=0)
+    assert ecorr.ecorr_epoch_index(t)[0] is index
+
+
+def test_scale_toa_sigma():
+    m = models.get_model(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.gls.par"))
+    t = toa.get_TOAs(
+        os.path.join(datadir, "B1855+09_NANOGrav_9yv1.tim"), ephem="DE436"
+    )
+    scale = m.components["ScaleToaError"]
+    m.EFAC2.value = 2.0
+    sigma = t.table["error"].quantity
+    expected = np.zeros_like(sigma)
+    for efac, equad in scale.pair_EFAC_EQUAD():
+        mask = efac.select_toa_mask(t)
+        expected[mask] = efac.quantity * np.sqrt(
+            sigma[mask] ** 2 + equad.quantity ** 2
+        )
+    assert np.all(expected > 0)
+    assert np.allclose(scale.scale_toa_sigma(t), expected, rtol=1e-14, atol=0)
+    index = scale.efac_equad_index(t)
+    assert scale.efac_equad_index(t) is index
+    # Only the values changed
+    m.EQUAD1.value = 3 * m.EQUAD1.value
+    assert scale.efac_equad_index(t) is index
+    sigma1 = scale.scale_toa_sigma(t)
+    assert np.all((sigma1 > expected) == (index == 0))
+    t.select(index == 1)
+    assert np.allclose(scale.scale_toa_sigma(t), expected[index == 1], rtol=1e-14)
+
+
+def test_ecorr_overlap(tmp_path):
+    parfile = tmp_path / "overlap.par"
+    with open(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.gls.par")) as f:
+        parfile.write_text(f.read() + "ECORR mjd 53000 54000 0.2\n")
+    m = models.get_model(str(parfile))
+    t = toa.get_TOAs(
+        os.path.join(datadir, "B1855+09_NANOGrav_9yv1.tim"), ephem="DE436"
+    )
+    ecorr = m.get_components_by_category()["ecorr_noise"][0]
+    assert ecorr.ecorr_epochs_overlap(t)
+    with pytest.raises(ValueError):
+        ecorr.ecorr_epoch_index(t)
+    # The blocks of overlapping ECORRs add up
+    tdb = (t.table["tdbld"].quantity * u.day).to_value(u.s)
+    cov = np.zeros((t.ntoas, t.ntoas))
+    for ec in ecorr.get_ecorrs():
+        mask = ec.select_toa_mask(t)
+        U = create_quantization_matrix(tdb[mask])
+        cov[np.ix_(mask, mask)] += ec.quantity.to_value(u.s) ** 2 * np.dot(U, U.T)
+    assert np.allclose(ecorr.ecorr_cov_matrix(t), cov, rtol=1e-12, atol=0)
+    U, weight = ecorr.ecorr_basis_weight_pair(t)
+    assert np.all(U.sum(axis=1) <= 2) and np.any(U.sum(axis=1) == 2)
+
+    gls = GLSLikelihood(m, t)
+    r = np.random.RandomState(3).normal(size=t.ntoas) * 1e-6
+    cf = sl.cho_factor(m.toa_covariance_matrix(t))
+    assert np.isclose(gls.chi2(r), np.dot(r, sl.cho_solve(cf, r)), rtol=1e-9)
+    assert np.isclose(gls.logdet(), 2 * np.sum(np.log(np.diag(cf[0]))))
+
+    avg = Residuals(t, m).ecorr_average()
+    assert len(avg["indices"]) == len(weight)
+    assert [list(np.flatnonzero(c)) for c in U.T] == avg["indices"]
@@ -37,6 +37,20 @@ def test_fitter_basic():
     assert abs(f_2.model.F0 - m.F0) < dF0
 
 
+def test_wls_sparse():
+    m = tm.get_model(os.path.join(datadir, "NGC6440E.par"))
+    t = toa.get_TOAs(os.path.join(datadir, "NGC6440E.tim"), ephem="DE421")
+    f_dense = fitter.WLSFitter(toas=t, model=m)
+    chi2_dense = f_dense.fit_toas()
+    f_sparse = fitter.WLSFitter(toas=t, model=m)
+    chi2_sparse = f_sparse.fit_toas(sparse=True)
+    assert abs(chi2_sparse - chi2_dense) < 1e-8 * chi2_dense
+    for p in m.free_params:
+        dense, sparse = getattr(f_dense.model, p), getattr(f_sparse.model, p)
+        assert abs(sparse.quantity - dense.quantity) < 1e-6 * dense.uncertainty
+        assert abs(sparse.uncertainty - dense.uncertainty) < 1e-6 * dense.uncertainty
+
+
 @pytest.mark.skipif(
     "DISPLAY" not in os.environ, reason="Needs an X server, xvfb counts"
 )
@@ -70,6 +70,32 @@ class TestGlitch(unittest.TestCase):
                 errormsg += " %lf" % np.nanmax(np.abs(r_diff.value))
                 assert np.nanmax(np.abs(r_diff.value)) < 1e-3, errormsg
 
+    @pytest.mark.skipif(
+        "TEMPO2" not in os.environ,
+        reason="Needs TEMPO2 clock files, but TEMPO2 envariable not set",
+    )
+    def test_glitch_sparse_der(self):
+        delay = self.m.delay(self.t)
+        params = [
+            pf + str(idx)
+            for pf in self.m.glitch_prop
+            for idx in set(self.m.glitch_indices)
+        ]
+        for idx in set(self.m.glitch_indices):
+            getattr(self.m, "GLF0D_%d" % idx).value = 1.0
+            getattr(self.m, "GLTD_%d" % idx).value = 100
+        sparse = self.m.d_phase_d_params_sparse(self.t, delay, params)
+        assert set(sparse) == set(params)
+        for param in params:
+            rows, deriv = sparse[param]
+            dense = self.m.d_phase_d_param(self.t, delay, param)
+            assert deriv.unit == dense.unit
+            assert np.allclose(deriv.value, dense.value[rows], rtol=1e-14, atol=0)
+            assert np.all(np.delete(dense.value, rows) == 0)
+        M, names, units, _ = self.m.designmatrix(self.t)
+        S, _, _, _ = self.m.designmatrix(self.t, sparse=True)
+        assert np.allclose(S.toarray(), M, rtol=1e-14, atol=0)
+
 
 if __name__ == "__main__":
     pass
@@ -75,5 +75,19 @@ class TestGLS(unittest.TestCase):
         chi22 = self.f.resids.chi2
         assert np.allclose(chi21, chi22)
 
+    def test_gls_sparse(self):
+        self.fit(full_cov=False)
+        chi2_dense = self.f.resids.chi2
+        dense = {p: getattr(self.f.model, p).quantity for p in self.f.model.free_params}
+        errs = {p: getattr(self.f.model, p).uncertainty for p in dense}
+        self.f.reset_model()
+        self.f.update_resids()
+        self.f.fit_toas(sparse=True)
+        assert np.allclose(self.f.resids.chi2, chi2_dense)
+        for p, v in dense.items():
+            par = getattr(self.f.model, p)
+            assert np.abs(par.quantity - v) < 1e-3 * errs[p], p
+            assert np.abs(par.uncertainty - errs[p]) < 1e-3 * errs[p], p
+
     def test_has_correlated_errors(self):
         assert self.f.resids.model.has_correlated_errors
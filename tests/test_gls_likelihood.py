@@ -0,0 +1,209 @@
+import copy
+import os
+
+import astropy.units as u
+import numpy as np
+import pytest
+import scipy.linalg as sl
+
+import pint.models as models
+import pint.toa as toa
+from pint.fitter import GLSFitter
+from pint.gls_likelihood import GLSLikelihood
+from pint.residuals import Residuals
+from pinttestdata import datadir
+
+
+@pytest.fixture(scope="module")
+def model_toas():
+    m = models.get_model(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.gls.par"))
+    t = toa.get_TOAs(
+        os.path.join(datadir, "B1855+09_NANOGrav_9yv1.tim"), ephem="DE436"
+    )
+    return m, t
+
+
+def test_chi2_logdet_match_dense(model_toas):
+    m, t = model_toas
+    gls = GLSLikelihood(m, t)
+    r = np.random.RandomState(0).normal(size=t.ntoas) * 1e-6
+    cf = sl.cho_factor(m.toa_covariance_matrix(t))
+    assert np.isclose(gls.chi2(r), np.dot(r, sl.cho_solve(cf, r)), rtol=1e-9)
+    assert np.isclose(gls.logdet(), 2 * np.sum(np.log(np.diag(cf[0]))), rtol=1e-12)
+    assert np.isclose(
+        gls.loglikelihood(r * u.s),
+        -0.5 * (gls.chi2(r) + gls.logdet() + t.ntoas * np.log(2 * np.pi)),
+    )
+
+
+def test_noise_state_cached(model_toas):
+    m, t = model_toas
+    noise = GLSLikelihood(m, t).noise
+    # A timing parameter change keeps the noise terms
+    f0 = m.F0.value
+    m.F0.value += 1e-10
+    try:
+        assert GLSLikelihood(m, t).noise is noise
+    finally:
+        m.F0.value = f0
+    efac = m.EFAC1.value
+    m.EFAC1.value *= 1.1
+    try:
+        assert GLSLikelihood(m, t).noise is not noise
+    finally:
+        m.EFAC1.value = efac
+    assert GLSLikelihood(m, t).noise is not noise
+
+
+def test_noise_state_error_edit(model_toas):
+    m, t = model_toas
+    t = copy.deepcopy(t)
+    noise = GLSLikelihood(m, t).noise
+    # Uncertainties changed in place are seen without bumping the version
+    t.table["error"][:] *= 2
+    new_noise = GLSLikelihood(m, t).noise
+    assert new_noise is not noise
+    assert np.allclose(new_noise.Nvec, m.scaled_toa_uncertainty(t).to_value(u.s) ** 2)
+
+
+def test_gradient(model_toas):
+    m, t = model_toas
+    m = models.get_model(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.gls.par"))
+    m.free_params = ["F0", "F1"]
+    gls = GLSLikelihood(m, t)
+    grad, params = gls.gradient()
+    assert params == ["F0", "F1"]
+    for p, g in zip(params, grad):
+        par = getattr(m, p)
+        v = par.value
+        h = 1e-3 * par.uncertainty_value
+        lnl = []
+        for s in [1, -1]:
+            par.value = v + s * h
+            lnl.append(gls.loglikelihood())
+        par.value = v
+        assert np.isclose((lnl[0] - lnl[1]) / (2 * h), g, rtol=1e-3)
+
+
+def test_fitter_matches_full_cov(model_toas):
+    m, t = model_toas
+    f = GLSFitter(t, m)
+    chi2 = f.fit_toas()
+    f_full = GLSFitter(t, m)
+    chi2_full = f_full.fit_toas(full_cov=True)
+    assert np.isclose(chi2, chi2_full, rtol=1e-9)
+    for p in f.model.free_params:
+        par, par_full = getattr(f.model, p), getattr(f_full.model, p)
+        assert np.abs(par.value - par_full.value) < 1e-2 * par_full.uncertainty_value
+        assert np.isclose(par.uncertainty_value, par_full.uncertainty_value, rtol=1e-2)
+    assert np.isclose(
+        f.resids.calc_chi2(full_cov=True),
+        f.gls_likelihood().chi2(f.resids.time_resids),
+    )
+
+
+def test_fitter_maxiter_zero(model_toas):
+    m, t = model_toas
+    m = copy.deepcopy(m)
+    f = GLSFitter(t, m)
+    f.fit_toas(maxiter=0)
+    # The residuals are recomputed for the changed model, and nothing is fit
+    f.model.F0.value += 1e-9
+    f0 = f.model.F0.value
+    chi2 = f.fit_toas(maxiter=0)
+    assert f.model.F0.value == f0
+    r = Residuals(t, f.model).time_resids
+    assert np.all(f.resids.time_resids == r)
+    assert np.isclose(chi2, GLSLikelihood(f.model, t).white_chi2(r), rtol=1e-12)
+    assert np.isclose(
+        f.fit_toas(maxiter=0, full_cov=True),
+        GLSLikelihood(f.model, t).chi2(r),
+        rtol=1e-12,
+    )
+
+def test_weights_only_change(model_toas):
+    m, t = model_toas
+    noise = GLSLikelihood(m, t).noise
+    amp = m.TNRedAmp.value
+    m.TNRedAmp.value += 0.5
+    try:
+        new = GLSLikelihood(m, t).noise
+        # The Fourier basis and its products are reused
+        assert new is not noise
+        assert new.WT is noise.WT
+        assert new.TNT is noise.TNT
+        r = np.random.RandomState(1).normal(size=t.ntoas) * 1e-6
+        cf = sl.cho_factor(m.toa_covariance_matrix(t))
+        assert np.isclose(new.logdet, 2 * np.sum(np.log(np.diag(cf[0]))))
+        assert np.isclose(
+            GLSLikelihood(m, t).chi2(r), np.dot(r, sl.cho_solve(cf, r)), rtol=1e-9
+        )
+    finally:
+        m.TNRedAmp.value = amp
+
+
+def test_pl_dm_noise(model_toas, tmp_path):
+    m, t = model_toas
+    parfile = tmp_path / "dmnoise.par"
+    with open(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.gls.par")) as f:
+        parfile.write_text(f.read() + "TNDMAmp -13.5\nTNDMGam 3.0\nTNDMC 20\n")
+    m = models.get_model(str(parfile))
+    dm_noise = m.components["PLDMNoise"]
+    F, phi = dm_noise.pl_dm_basis_weight_pair(t)
+    F_red, phi_red = m.components["PLRedNoise"].pl_rn_basis_weight_pair(t)
+    assert F.shape == (t.ntoas, 40)
+    scale = (1400 / t.get_freqs().to_value(u.MHz)) ** 2
+    assert np.allclose(F, F_red[:, :40] * scale[:, None])
+    assert dm_noise.pl_dm_basis_weight_pair(t)[0] is F
+
+    gls = GLSLikelihood(m, t)
+    assert gls.noise.nbasis == 90 + 40
+    r = np.random.RandomState(2).normal(size=t.ntoas) * 1e-6
+    cf = sl.cho_factor(m.toa_covariance_matrix(t))
+    assert np.isclose(gls.chi2(r), np.dot(r, sl.cho_solve(cf, r)), rtol=1e-9)
+
+
+def test_noise_likelihood(model_toas):
+    m, t = model_toas
+    params = ["EFAC1", "ECORR1", "TNRedAmp", "TNRedGam"]
+    f = GLSFitter(t, m)
+    nl = f.noise_likelihood(params)
+    assert np.all(nl.values == [getattr(m, p).value for p in params])
+
+    # The design matrix as it is, without the normalization
+    M = m.designmatrix(t, incfrozen=False, incoffset=True)[0]
+
+    def dense_loglikelihood():
+        cf = sl.cho_factor(nl.model.toa_covariance_matrix(t))
+        CiM = sl.cho_solve(cf, M)
+        cf_A = sl.cho_factor(np.dot(M.T, CiM))
+        b = np.dot(CiM.T, nl.resids)
+        n, k = M.shape
+        return -0.5 * (
+            np.dot(nl.resids, sl.cho_solve(cf, nl.resids))
+            - np.dot(b, sl.cho_solve(cf_A, b))
+            + 2 * np.sum(np.log(np.diag(cf[0])))
+            + 2 * np.sum(np.log(np.diag(cf_A[0])))
+            + (n - k) * np.log(2 * np.pi)
+        )
+
+    assert np.isclose(nl.loglikelihood(), dense_loglikelihood(), rtol=1e-9)
+    values = nl.values
+    values[2] += 0.3
+    products = nl.white_products(nl.gls.noise)
+    lnl = nl.loglikelihood(values)
+    # Only the red-noise weights changed
+    assert nl.white_products(nl.gls.noise) is products
+    assert np.isclose(lnl, dense_loglikelihood(), rtol=1e-9)
+    values[0] *= 1.1
+    values[1] *= 0.9
+    assert np.isclose(nl.loglikelihood(values), dense_loglikelihood(), rtol=1e-9)
+    assert nl.white_products(nl.gls.noise) is not products
+    values[3] = np.nan
+    assert nl.loglikelihood(values) == -np.inf
+    # The fitter's model is not changed
+    assert [getattr(f.model, p).value for p in params] == [
+        getattr(m, p).value for p in params
+    ]
+    with pytest.raises(ValueError):
+        m.noise_likelihood(t, ["F0"])
@@ -0,0 +1,83 @@
+import copy
+import os
+
+import astropy.units as u
+import numpy as np
+import pytest
+
+import pint.fitter
+import pint.models
+import pint.toa
+from pint.gridutils import grid_chisq, grid_chisq_linear, grid_chisq_mp, grid_chisq_nd
+from pinttestdata import datadir
+
+
+@pytest.fixture(scope="module")
+def fitter():
+    model = pint.models.get_model(os.path.join(datadir, "NGC6440E.par"))
+    toas = pint.toa.get_TOAs(os.path.join(datadir, "NGC6440E.tim"), ephem="DE421")
+    ftr = pint.fitter.WLSFitter(toas, model)
+    ftr.fit_toas(maxiter=2)
+    return ftr
+
+
+def grid_around(ftr, name, n):
+    par = getattr(ftr.model, name)
+    return par.quantity + np.linspace(-2, 2, n) * par.uncertainty
+
+
+def test_grid_chisq_2d(fitter):
+    F0 = grid_around(fitter, "F0", 3)
+    F1 = grid_around(fitter, "F1", 4)
+    values = fitter.model.get_params_dict("all", "num")
+    chi2 = grid_chisq(fitter, "F0", F0, "F1", F1)
+    assert chi2.shape == (4, 3)
+    assert fitter.model.get_params_dict("all", "num") == values
+    assert not fitter.model.F0.frozen
+
+    ftr = copy.deepcopy(fitter)
+    ftr.model.F0.quantity = F0[2]
+    ftr.model.F0.frozen = True
+    ftr.model.F1.quantity = F1[1]
+    ftr.model.F1.frozen = True
+    assert np.isclose(chi2[1, 2], ftr.fit_toas())
+    # The best fit is in the middle
+    assert chi2.min() >= fitter.resids.chi2 - 1e-6
+
+
+def test_grid_chisq_mp_matches(fitter):
+    F0 = grid_around(fitter, "F0", 3)
+    F1 = grid_around(fitter, "F1", 3)
+    chi2 = grid_chisq(fitter, "F0", F0, "F1", F1)
+    chi2_mp = grid_chisq_mp(fitter, "F0", F0, "F1", F1, ncpu=2)
+    assert np.all(chi2 == chi2_mp)
+
+
+@pytest.mark.parametrize("warmstart", [False, True])
+def test_grid_chisq_nd(fitter, warmstart):
+    values = [grid_around(fitter, name, n) for name, n in [("F0", 2), ("F1", 3)]]
+    values.append(grid_around(fitter, "DM", 4))
+    chi2 = grid_chisq_nd(
+        fitter, ["F0", "F1", "DM"], values, ncpu=2, warmstart=warmstart, maxiter=2
+    )
+    assert chi2.shape == (2, 3, 4)
+    # One plane of the grid on its own
+    plane = grid_chisq_nd(
+        fitter, ["F0", "F1", "DM"], values[:2] + [values[2][1:2]], maxiter=2
+    )
+    assert np.allclose(chi2[:, :, 1], plane[:, :, 0], rtol=1e-6)
+
+
+def test_grid_chisq_linear(fitter):
+    names = ["F0", "DECJ"]
+    values = [grid_around(fitter, name, n) for name, n in zip(names, [5, 4])]
+    exact = grid_chisq_nd(fitter, names, values, maxiter=2)
+    chi2 = grid_chisq_linear(fitter, names, values)
+    assert chi2.shape == (5, 4)
+    assert np.allclose(chi2, exact, atol=0.01)
+
+    refitted = grid_chisq_linear(fitter, names, values, refit=5, ncpu=2, maxiter=2)
+    near = chi2 <= chi2.min() + 5
+    assert 0 < near.sum() < near.size
+    assert np.all(refitted[near] == exact[near])
+    assert np.all(refitted[~near] == chi2[~near])
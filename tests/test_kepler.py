@@ -1,5 +1,6 @@
 import astropy.units as u
 import numpy as np
+import pytest
 from numpy.testing import assert_allclose
 
 import pint.orbital.kepler as kepler
@@ -20,6 +21,27 @@ def test_mass_derivs():
     check_all_partials(kepler.mass_partials, [a, pb])
 
 
+@pytest.mark.parametrize("e", [0, 0.01, 0.5, 0.9, 0.999, 0.999999])
+def test_solve_kepler(e):
+    ma = np.linspace(0, 2 * np.pi, 10001, dtype=np.longdouble)
+    E = kepler.solve_kepler(np.longdouble(e), ma)
+    assert E.dtype == np.longdouble
+    assert np.all(np.abs(E - e * np.sin(E) - ma) <= 5e-15)
+    E_warm = kepler.solve_kepler(e, ma + 1e-7, guess=E + 1e-7)
+    assert np.all(np.abs(E_warm - e * np.sin(E_warm) - ma - 1e-7) <= 5e-15)
+    # A guess that is far off anywhere is not used there
+    E_bad = kepler.solve_kepler(e, ma, guess=E + 1)
+    assert np.all(np.abs(E_bad - e * np.sin(E_bad) - ma) <= 5e-15)
+
+
+def test_solve_kepler_broadcast():
+    E = kepler.solve_kepler([0.1, 0.2], [[1.0], [2.0]])
+    assert E.shape == (2, 2)
+    assert np.isscalar(kepler.solve_kepler(0.5, 1.0))
+    with pytest.raises(ValueError):
+        kepler.solve_kepler([0.5, 1], 1.0)
+
+
 def test_kepler_2d_t0():
     p = kepler.Kepler2DParameters(a=2, pb=3, eps1=0.2, eps2=0.1, t0=1)
     xyv, _ = kepler.kepler_2d(p, p.t0)
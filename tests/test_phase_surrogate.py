@@ -0,0 +1,77 @@
+from os.path import join
+
+import numpy as np
+import pytest
+
+import pint.fermi_toas as fermi
+import pint.models
+import pint.toa as toa
+from pint.mcmc_fitter import MCMCFitterBinnedTemplate, PhaseSurrogate
+from pint.sampler import EmceeSampler
+from pint.scripts.event_optimize import read_gaussfitfile
+from pinttestdata import datadir
+
+parfile = join(datadir, "PSRJ0030+0451_psrcat.par")
+eventfile = join(
+    datadir, "J0030+0451_P8_15.0deg_239557517_458611204_ft1weights_GEO_wt.gt.0.4.fits"
+)
+gaussianfile = join(datadir, "templateJ0030.3gauss")
+
+
+@pytest.fixture(scope="module")
+def photons():
+    tl = fermi.load_Fermi_TOAs(eventfile, weightcolumn="PSRJ0030+0451", minweight=0.9)
+    ts = toa.TOAs(toalist=tl)
+    ts.compute_TDBs()
+    ts.compute_posvels(ephem="DE421", planets=False)
+    return ts
+
+
+@pytest.fixture
+def model():
+    m = pint.models.get_model(parfile)
+    m.RAJ.frozen = False
+    m.RAJ.uncertainty_value = 1e-5
+    m.DECJ.frozen = False
+    m.DECJ.uncertainty_value = 1e-4
+    return m
+
+
+@pytest.mark.parametrize("order, tol", [(1, 1e-5), (2, 1e-6)])
+def test_surrogate_accuracy(photons, model, order, tol):
+    s = PhaseSurrogate(model, photons, model.free_params, order=order)
+    values = s.values0.astype(float) + 3 * s.steps
+    approx = s.phases(values)
+    model.set_param_values(dict(zip(s.params, values)))
+    exact = model.phase(photons).frac.value
+    diff = (approx - exact) % 1
+    assert np.all(np.minimum(diff, 1 - diff) < tol)
+    assert s.max_error(values) < tol
+
+
+def test_surrogate_relinearizes(photons, model):
+    s = PhaseSurrogate(model, photons, model.free_params, check_interval=2)
+    far = s.values0.astype(float) + 100 * s.steps
+    assert s.max_error(far) > 1e-3
+    s.phases(far, best=far)
+    assert s.nlinearize == 1
+    s.phases(far, best=far)
+    assert s.nlinearize == 2
+    assert s.last_error < 1e-6
+    assert np.all(s.values0 == far)
+
+
+def test_mcmc_fitter_surrogate(photons, model):
+    weights = np.asarray([x["weight"] for x in photons.table["flags"]])
+    template = read_gaussfitfile(gaussianfile, 256)
+    template /= template.mean()
+    fitter = MCMCFitterBinnedTemplate(
+        photons, model, EmceeSampler(4), template=template, weights=weights
+    )
+    fitter.set_priors(fitter, 10)
+    theta = fitter.fitvals + 2 * fitter.fiterrs
+    exact = fitter.lnposterior(theta)
+    fitter.use_surrogate(order=1)
+    assert np.isclose(fitter.lnposterior(theta), exact, rtol=0, atol=1e-3)
+    fitter.use_surrogate(order=0)
+    assert fitter.surrogate is None
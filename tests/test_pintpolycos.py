@@ -0,0 +1,29 @@
+import os
+
+import numpy as np
+
+import pint.scripts.pintpolycos as pintpolycos
+from pint.polycos import Polycos
+from pinttestdata import datadir
+
+parfile = os.path.join(datadir, "B1855+09_polycos.par")
+
+
+def test_pintpolycos_simulated(tmpdir):
+    outfile = str(tmpdir.join("polyco_{obs}_{freq:g}.dat"))
+    cmd = (
+        "{} --obs ao --freq 1400 --freq 430 --segLength 30 --ahead 30 --behind 0 "
+        "--interval 1800 --simulate 55000.3 --iterations 2 --outfile {}"
+    ).format(parfile, outfile)
+    pintpolycos.main(cmd.split())
+    for freq in [1400, 430]:
+        p = Polycos()
+        p.read_polyco_file(outfile.format(obs="ao", freq=freq), "tempo")
+        # The clock has moved on by 30 minutes after the first update
+        t = 55000.3 + 30 / 1440.0
+        assert p.polycoTable["t_start"][0] <= t < p.polycoTable["t_stop"][-1]
+        assert np.all(p.polycoTable["obsfreq"] == freq)
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = os.stat(outfile.format(obs="ao", freq=freq)).st_mode & 0o777
+        assert mode == 0o666 & ~umask
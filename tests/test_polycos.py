@@ -0,0 +1,176 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from astropy import table
+
+import pint.models
+from pint.polycos import Polycos, RollingPolycos, SimulatedClock
+from pinttestdata import datadir
+
+
+@pytest.fixture(scope="module")
+def model():
+    return pint.models.get_model(os.path.join(datadir, "B1855+09_polycos.par"))
+
+
+def test_generate_polycos_batch(model):
+    tables = []
+    for batch in [False, True]:
+        p = Polycos()
+        # 30 minutes in 10 minute segments, with a short one at the end
+        p.generate_polycos(model, 55000, 55000.025, "ao", 10, 12, 1400.0, batch=batch)
+        tables.append(p.polycoTable)
+    single, batched = tables
+    assert len(batched) == 4
+    assert batched.colnames == single.colnames
+    for name in single.colnames:
+        if name != "entry":
+            assert np.all(single[name] == batched[name])
+    for a, b in zip(single["entry"], batched["entry"]):
+        assert a.tmid == b.tmid
+        assert a.mjdspan == b.mjdspan
+        assert a.f0 == b.f0
+        assert a.ncoeff == b.ncoeff
+        assert np.all(a.rphase.int == b.rphase.int)
+        assert np.all(a.rphase.frac == b.rphase.frac)
+        t = np.linspace(a.tstart, a.tstop, 20)
+        dphase = a.evalabsphase(t) - b.evalabsphase(t)
+        assert np.all(np.abs(dphase.int + dphase.frac) < 1e-11)
+
+
+@pytest.fixture
+def polycos():
+    p = Polycos()
+    p.read_polyco_file(os.path.join(datadir, "B1855_polyco.dat"), "tempo")
+    return p
+
+
+def test_eval_matches_entries(polycos):
+    rs = np.random.RandomState(0)
+    entries = polycos.polycoTable["entry"]
+    times = [
+        rs.uniform(float(e.tstart), float(e.tstop), 10).astype(np.longdouble)
+        for e in entries
+    ]
+    t = np.concatenate(times)
+    # Evaluation does not depend on the order of the times
+    order = rs.permutation(len(t))
+    phase = polycos.eval_abs_phase(t[order])
+    freq = polycos.eval_spin_freq(t[order])
+    expected_index = np.repeat(np.arange(len(entries)), 10)
+    assert np.all(polycos.find_entry(t[order]) == expected_index[order])
+    for i, (e, te) in enumerate(zip(entries, times)):
+        sel = np.argsort(order)[10 * i : 10 * (i + 1)]
+        expected = e.evalabsphase(te)
+        assert np.all(phase.int[sel] == expected.int)
+        assert np.all(phase.frac[sel] == expected.frac)
+        expected_freq = [e.evalfreq(tt) for tt in te]
+        assert np.allclose(freq[sel], expected_freq, rtol=1e-15, atol=0)
+
+
+def test_eval_outside_entries(polycos):
+    t_start = polycos.polycoTable["t_start"][0]
+    with pytest.raises(ValueError):
+        polycos.eval_abs_phase(np.array([t_start - 1.0]))
+    with pytest.raises(ValueError):
+        polycos.eval_spin_freq(np.array([polycos.polycoTable["t_stop"][-1] + 1.0]))
+
+
+def test_find_entry_boundaries(polycos):
+    t_start = np.array(polycos.polycoTable["t_start"])
+    t_stop = np.array(polycos.polycoTable["t_stop"])
+    # A time at the end of one entry and the start of the next belongs to
+    # the earlier one
+    shared = np.flatnonzero(t_start[1:] <= t_stop[:-1]) + 1
+    assert len(shared) > 0
+    assert np.all(polycos.find_entry(t_start[shared]) == shared - 1)
+    assert polycos.find_entry(t_start[0])[0] == 0
+    assert polycos.find_entry(t_stop[-1])[0] == len(t_stop) - 1
+
+
+def test_eval_arrays_reused(polycos, monkeypatch):
+    # More entries than Python keeps as shared small integers
+    polycos.polycoTable = table.vstack([polycos.polycoTable] * 80)
+    assert len(polycos.polycoTable) > 256
+    builds = []
+    make = polycos._make_eval_arrays
+    monkeypatch.setattr(
+        polycos, "_make_eval_arrays", lambda: builds.append(1) or make()
+    )
+    e = polycos.polycoTable["entry"][0]
+    t = np.linspace(float(e.tstart), float(e.tstop), 5)
+    polycos.eval_abs_phase(t)
+    arrays = polycos._eval_arrays
+    polycos.eval_spin_freq(t)
+    polycos.eval_phase(t)
+    polycos.find_entry(t)
+    assert builds == [1]
+    assert polycos._eval_arrays is arrays
+
+
+def test_rolling_polycos(model):
+    clock = SimulatedClock(55000.3)
+    roller = RollingPolycos(
+        model, segLength=30, ncoeff=12, ahead=30, behind=30, clock=clock
+    )
+    roller.add("ao", 1400)
+    roller.update()
+    p = roller.polycos["ao", 1400.0]
+    assert p.polycoTable["t_start"][0] <= clock() - 30 / 1440.0
+    assert p.polycoTable["t_stop"][-1] > clock() + 30 / 1440.0
+    assert len(p.polycoTable) == 3
+
+    clock.advance(30)
+    roller.update()
+    q = roller.polycos["ao", 1400.0]
+    # One segment dropped, one added and the others kept
+    assert len(q.polycoTable) == 3
+    assert q.polycoTable["entry"][0] is p.polycoTable["entry"][1]
+    assert q.polycoTable["entry"][1] is p.polycoTable["entry"][2]
+    assert q.polycoTable["t_start"][2] == p.polycoTable["t_stop"][2]
+
+    t = clock() + np.array([-20.0, 0.0, 20.0]) / 1440.0
+    assert np.all(roller.eval_phase(t, "ao", 1400) == q.eval_phase(t))
+    assert np.all(roller.eval_spin_freq(t, "ao", 1400) == q.eval_spin_freq(t))
+    assert roller.polycos["ao", 1400.0] is q
+
+    # Times outside the window are covered on demand
+    t = np.array([clock() + 100 / 1440.0])
+    assert np.isfinite(roller.eval_spin_freq(t, "ao", 1400)[0])
+    # Beyond a gap, without losing the window
+    assert roller.polycos["ao", 1400.0] is q
+    apart = roller.get_polycos("ao", 1400, t)
+    assert apart is not q
+    assert roller.get_polycos("ao", 1400, t + 1 / 1440.0) is apart
+    roller.update()
+    assert roller.polycos["ao", 1400.0] is q
+    # Next to the window, the window grows
+    t = np.array([q.polycoTable["t_stop"][-1] + 1 / 1440.0])
+    r = roller.get_polycos("ao", 1400, t)
+    assert r is roller.polycos["ao", 1400.0]
+    assert len(r.polycoTable) == 4
+    assert r.polycoTable["entry"][0] is q.polycoTable["entry"][0]
+    # and is trimmed back to the window on the next update
+    roller.update()
+    u = roller.polycos["ao", 1400.0]
+    assert len(u.polycoTable) == 3
+    assert list(u.polycoTable["entry"]) == list(q.polycoTable["entry"])
+
+
+def test_rolling_polycos_background(model):
+    clock = SimulatedClock(55000.3)
+    roller = RollingPolycos(model, segLength=30, ahead=10, behind=0, clock=clock)
+    roller.add("ao", 1400)
+    roller.start(interval=0.01)
+    try:
+        for i in range(1000):
+            if roller.polycos["ao", 1400.0] is not None:
+                break
+            time.sleep(0.01)
+    finally:
+        roller.stop()
+    p = roller.polycos["ao", 1400.0]
+    assert p is not None
+    assert p.polycoTable["t_start"][0] <= clock() < p.polycoTable["t_stop"][-1]
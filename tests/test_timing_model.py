@@ -17,6 +17,7 @@ from pint.models import (
     Wave,
 )
 from pint.models import parameter as p
+from pint.toa import make_fake_toas
 from pinttestdata import datadir
 
 
@@ -190,3 +191,38 @@ class TestModelBuilding:
         tfp = {"F0", "T0", "RAJ"}
         tm.free_params = tfp
         tm.set_param_uncertainties(tm.get_params_dict("free", "uncertainty"))
+
+
+def test_designmatrix_shared_delays():
+    m = get_model(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.gls.par"))
+    t = make_fake_toas(53400, 56000, 100, m, freq=1400 * u.MHz, obs="AO")
+
+    delay, acc_delays = m.component_delays(t)
+    assert np.all(delay == m.delay(t))
+    for name, acc_delay in acc_delays.items():
+        assert np.all(acc_delay == m.delay(t, name, include_last=False))
+
+    M, params, units, scale_by_F0 = m.designmatrix(t)
+    for ii, param in enumerate(params):
+        if param == "Offset":
+            continue
+        column = np.asarray(-m.d_phase_d_param(t, delay, param).value, dtype=float)
+        assert np.all(M[:, ii] == (column / m.F0.value).astype(float)), param
+
+
+def test_d_delay_d_params_batched():
+    m = get_model(os.path.join(datadir, "B1855+09_NANOGrav_9yv1.gls.par"))
+    t = make_fake_toas(53400, 56000, 100, m, freq=1400 * u.MHz, obs="AO")
+    delay, acc_delays = m.component_delays(t)
+    params = [p for p in m.free_params if p in m.delay_deriv_funcs]
+    derivs = m.d_delay_d_params(t, params, acc_delays)
+    assert set(derivs.keys()) == set(params)
+    for param in params:
+        d = m.d_delay_d_param(t, param, acc_delays)
+        assert derivs[param].unit == d.unit
+        assert np.all(derivs[param] == d), param
+    # Nothing shared is left behind
+    assert m.components["AstrometryEcliptic"]._d_delay_quantities is None
+    assert not m.components["BinaryDD"]._binary_object_updated
+    with pytest.raises(AttributeError):
+        m.d_delay_d_params(t, ["F0"])
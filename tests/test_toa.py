@@ -1,7 +1,11 @@
 import unittest
+
 import astropy.units as u
+import numpy as np
+import pytest
+from astropy.coordinates import EarthLocation
 from astropy.time import Time
-from pint.toa import TOA, TOAs
+from pint.toa import TOA, TOAs, get_TOAs_array, get_TOAs_list
 from pint.observatory import get_observatory
 
 
@@ -92,5 +96,64 @@ class TestTOAs(unittest.TestCase):
 
         # obs in time object
         assert toas.table["mjd"][0].location == site2.earth_location_itrf()
-        assert toas.table["mjd"][1].location == site3.earth_location_itrf()
+        # Sites without a location are placed at the geocenter
+        assert site3.earth_location_itrf() is None
+        assert toas.table["mjd"][1].location == EarthLocation.from_geocentric(
+            0, 0, 0, unit=u.m
+        )
         assert toas.table["mjd"][2].location == site1.earth_location_itrf()
+
+    def test_compute_TDBs_matches_per_toa(self):
+        obss = ["gbt", "ao", "barycenter", "geocenter"]
+        toalist = [
+            TOA(self.MJD + 0.37 * i, freq=self.freq, obs=obs, error=self.error)
+            for i, obs in enumerate(obss)
+        ]
+        toas = TOAs(toalist=toalist)
+        toas.compute_TDBs(ephem="DE421")
+
+        assert isinstance(toas.table["tdb"], Time)
+        assert toas.table["tdb"].scale == "tdb"
+        for row in toas.table:
+            site = get_observatory(row["obs"])
+            t = toalist[row["index"]].mjd
+            loc = site.earth_location_itrf()
+            if loc is None:
+                loc = EarthLocation.from_geocentric(0, 0, 0, unit=u.m)
+            assert row["mjd"].location == loc
+            assert row["tdb"].location == loc
+            # Compare against converting each TOA on its own
+            t = Time(t, location=loc, scale=site.timescale, precision=9)
+            tdb = site.get_TDBs(t, ephem="DE421")[0].tdb
+            assert abs(row["tdb"] - tdb).to_value(u.ns) < 1e-2
+            assert abs(row["tdbld"] - tdb.mjd_long) * 86400 < 1e-9
+
+
+@pytest.mark.parametrize("obs", ["gbt", "@"])
+def test_get_TOAs_array(obs):
+    mjds = np.linspace(np.longdouble(57000), np.longdouble(57000.5), 7)
+    times = np.modf(mjds)[1], np.modf(mjds)[0]
+    t_list = get_TOAs_list(
+        [TOA((i, f), obs=obs, freq=1400.0, error=2.0) for i, f in zip(*times)]
+    )
+    t_array = get_TOAs_array(times, obs, errors=2.0, freqs=1400.0)
+    assert t_array.table.colnames == t_list.table.colnames
+    for name in t_list.table.colnames:
+        a, b = t_list.table[name], t_array.table[name]
+        if isinstance(a, Time):
+            assert a.scale == b.scale
+            assert np.all(a.jd1 == b.jd1)
+            assert np.all(a.jd2 == b.jd2)
+        else:
+            assert a.unit == b.unit
+            assert np.all(a == b)
+
+
+@pytest.mark.parametrize("times", [57000.1, [57000.1], np.array([57000.1, 57000.2])])
+def test_get_TOAs_array_few(times):
+    t = get_TOAs_array(times, "gbt", errors=2.0, freqs=1400.0)
+    mjds = np.atleast_1d(times)
+    assert t.ntoas == len(mjds)
+    assert np.allclose(t.get_mjds().value, mjds, rtol=0, atol=1e-9)
+    t_pair = get_TOAs_array(np.modf(mjds)[::-1], "gbt", errors=2.0, freqs=1400.0)
+    assert np.allclose(t_pair.get_mjds().value, mjds, rtol=0, atol=1e-9)
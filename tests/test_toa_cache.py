@@ -0,0 +1,146 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+from astropy.time import Time
+
+from pint import toa, toa_cache
+from pint.observatory import get_observatory
+from pinttestdata import datadir
+
+
+@pytest.fixture
+def timfile(tmpdir):
+    name = str(tmpdir.join("NGC6440E.tim"))
+    shutil.copy(os.path.join(datadir, "NGC6440E.tim"), name)
+    return name
+
+
+def assert_toas_identical(a, b):
+    assert a.table.colnames == b.table.colnames
+    for name in a.table.colnames:
+        x, y = a.table[name], b.table[name]
+        if isinstance(x, Time):
+            assert x.scale == y.scale
+            assert x.format == y.format
+            assert np.all(x.jd1 == y.jd1)
+            assert np.all(x.jd2 == y.jd2)
+            assert np.all(x.location == y.location)
+        else:
+            assert x.dtype == y.dtype
+            assert x.unit == y.unit
+            assert np.all(x == y)
+    assert np.all(a.table.groups.indices == b.table.groups.indices)
+    assert a.commands == b.commands
+    assert a.clock_corr_info == b.clock_corr_info
+    assert a.ephem == b.ephem
+    assert a.planets == b.planets
+
+
+def test_cache_roundtrip(timfile, tmpdir):
+    cachedir = str(tmpdir.join("cache"))
+    t = toa.get_TOAs(timfile, ephem="DE421", planets=True)
+    t1 = toa.get_TOAs(
+        timfile, ephem="DE421", planets=True, usecache=True, cachedir=cachedir
+    )
+    assert len(os.listdir(cachedir)) == 1
+    t2 = toa.get_TOAs(
+        timfile, ephem="DE421", planets=True, usecache=True, cachedir=cachedir
+    )
+    assert t2.filename == timfile
+    assert t2.table["tdbld"].dtype == np.longdouble
+    assert_toas_identical(t, t1)
+    assert_toas_identical(t, t2)
+
+
+def is_memory_mapped(a):
+    while a is not None:
+        if isinstance(a, np.memmap):
+            return True
+        a = a.base
+    return False
+
+
+def test_cache_columns_memory_mapped(timfile, tmpdir):
+    cachedir = str(tmpdir.join("cache"))
+    t = toa.get_TOAs(timfile, ephem="DE421", usecache=True, cachedir=cachedir)
+    t1 = toa.get_TOAs(timfile, ephem="DE421", usecache=True, cachedir=cachedir)
+    assert is_memory_mapped(t1.table["freq"])
+    assert is_memory_mapped(t1.table["error"])
+    assert is_memory_mapped(t1.table["mjd"].jd1)
+    assert is_memory_mapped(t1.table["mjd"].jd2)
+    assert is_memory_mapped(t1.table["mjd"].location)
+    assert list(t1.table.groups.keys["obs"]) == list(t.table.groups.keys["obs"])
+    assert_toas_identical(t, t1)
+
+
+def test_cache_modifications_not_stored(timfile, tmpdir):
+    cachedir = str(tmpdir.join("cache"))
+    t = toa.get_TOAs(timfile, ephem="DE421", usecache=True, cachedir=cachedir)
+    t1 = toa.get_TOAs(timfile, ephem="DE421", usecache=True, cachedir=cachedir)
+    t1.table["error"][:] = 0
+    t1.table["flags"][0]["f"] = "modified"
+    t2 = toa.get_TOAs(timfile, ephem="DE421", usecache=True, cachedir=cachedir)
+    assert_toas_identical(t, t2)
+    assert t2.table["flags"][0] == t.table["flags"][0]
+
+
+def test_cache_key_options(timfile):
+    key = toa_cache.cache_key(timfile, ephem="DE421", planets=False)
+    assert key == toa_cache.cache_key(timfile, planets=False, ephem="DE421")
+    assert key != toa_cache.cache_key(timfile, ephem="DE436", planets=False)
+    assert key != toa_cache.cache_key(timfile, ephem="DE421", planets=True)
+
+
+def test_cache_key_contents(tmpdir):
+    included = str(tmpdir.join("included.tim"))
+    top = str(tmpdir.join("top.tim"))
+    shutil.copy(os.path.join(datadir, "NGC6440E.tim"), included)
+    with open(top, "w") as f:
+        f.write("FORMAT 1\nINCLUDE {}\n".format(included))
+    key = toa_cache.cache_key(top)
+    # Touching a file does not invalidate the entry
+    os.utime(included, None)
+    assert toa_cache.cache_key(top) == key
+    with open(included, "a") as f:
+        f.write("C a comment\n")
+    assert toa_cache.cache_key(top) != key
+
+
+def test_cache_clock_file_change(timfile, tmpdir, monkeypatch):
+    clockfile = str(tmpdir.join("fake.clk"))
+    with open(clockfile, "w") as f:
+        f.write("# UTC(fake) UTC(GPS)\n")
+    site = get_observatory(toa.get_TOAs(timfile).table["obs"][0])
+    monkeypatch.setattr(site, "clock_files", lambda: [clockfile])
+
+    cachedir = str(tmpdir.join("cache"))
+    toa.get_TOAs(timfile, ephem="DE421", usecache=True, cachedir=cachedir)
+    key = toa_cache.cache_key(
+        timfile,
+        ephem="DE421",
+        include_bipm=True,
+        bipm_version=toa.bipm_default,
+        include_gps=True,
+        planets=False,
+        tdb_method="default",
+    )
+    path = toa_cache.entry_path(key, cachedir)
+    assert toa_cache.check_entry(path, key)
+    with open(clockfile, "a") as f:
+        f.write("50000.0 1.0e-6\n")
+    assert not toa_cache.check_entry(path, key)
+
+
+def test_cache_not_written_from_pickle(timfile, tmpdir):
+    cachedir = str(tmpdir.join("cache"))
+    t = toa.get_TOAs(timfile, ephem="DE421", usepickle=True)
+    t_pickle = toa.get_TOAs(
+        timfile, ephem="DE436", usepickle=True, usecache=True, cachedir=cachedir
+    )
+    # The pickle keeps the ephemeris it was made with
+    assert t_pickle.ephem == "DE421"
+    assert not os.path.exists(cachedir) or not os.listdir(cachedir)
+    t_cache = toa.get_TOAs(timfile, ephem="DE436", usecache=True, cachedir=cachedir)
+    assert t_cache.ephem == "DE436"
@@ -1,10 +1,14 @@
 """Various tests to assess the performance of TOA get_flag_value."""
 
 
+import copy
 import os
 import unittest
 
+import numpy as np
+
 import pint.toa as toa
+from pint.models.parameter import maskParameter
 from pinttestdata import datadir
 
 
@@ -50,3 +54,53 @@ class TestToaFlag(unittest.TestCase):
         assert len(flag_value) == self.toas.ntoas
         for v in set(flag_value):
             assert v in {"ASP", "PUPPI"}
+
+    def copy_toas(self):
+        # Copying a table does not copy the flag dictionaries
+        t = copy.deepcopy(self.toas)
+        flags = np.empty(t.ntoas, dtype=object)
+        flags[:] = [dict(f) for f in t.table["flags"]]
+        t.table["flags"] = flags
+        return t
+
+    def test_flag_column(self):
+        values, codes = self.toas.get_flag_column("be")
+        assert len(values) == len(set(values))
+        for flag_dict, code in zip(self.toas.get_flags(), codes):
+            assert values[code] == flag_dict["be"]
+        values, codes = self.toas.get_flag_column("nonexistent")
+        assert len(values) == 0
+        assert np.all(codes == -1)
+
+    def test_flag_column_types(self):
+        t = self.copy_toas()
+        t.table["flags"][0]["mixed"] = 1
+        t.table["flags"][1]["mixed"] = 1.0
+        t.table["flags"][2]["mixed"] = "1"
+        t.clear_flag_cache()
+        flag_value, valid = t.get_flag_value("mixed")
+        assert valid == [0, 1, 2]
+        assert [type(v) for v in flag_value[:3]] == [int, float, str]
+
+    def test_flag_cache_invalidation(self):
+        t = self.copy_toas()
+        flag_value, valid = t.get_flag_value("be")
+        t.table["flags"][0]["be"] = "GUPPI"
+        # Stale until the cache is cleared
+        assert t.get_flag_value("be")[0][0] == flag_value[0]
+        t.clear_flag_cache()
+        assert t.get_flag_value("be")[0][0] == "GUPPI"
+        t.select(np.arange(t.ntoas) > 0)
+        assert "GUPPI" not in t.get_flag_value("be")[0]
+        t.unselect()
+        assert t.get_flag_value("be")[0][0] == "GUPPI"
+
+    def test_mask_parameter(self):
+        for backend in ("ASP", "PUPPI"):
+            p = maskParameter(name="EFAC", index=1, key="-be", key_value=backend)
+            expected = [
+                ii for ii, f in enumerate(self.toas.get_flags()) if f["be"] == backend
+            ]
+            assert list(p.select_toa_mask(self.toas)) == expected
+        p = maskParameter(name="EFAC", index=1, key="-be", key_value="GUPPI")
+        assert len(p.select_toa_mask(self.toas)) == 0
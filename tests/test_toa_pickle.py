@@ -1,7 +1,13 @@
 #!/usr/bin/env python
+import copy
 import os
+import shutil
 import unittest
 
+import astropy.table as table
+import numpy as np
+from astropy.time import Time
+
 from pint import toa
 from pinttestdata import datadir
 
@@ -26,3 +32,28 @@ class TestTOAReader(unittest.TestCase):
         # Initially this just checks that the same number
         # of TOAs came out of the pickle as went in.
         assert self.t.ntoas == self.numtoas
+
+
+def test_legacy_pickle_clock_corrections(tmpdir):
+    # Older pickles kept the clock corrections as a flag on each TOA and the
+    # times as one Time object per row; they must not be corrected twice
+    timfile = str(tmpdir.join("NGC6440E.tim"))
+    shutil.copy(os.path.join(datadir, "NGC6440E.tim"), timfile)
+    t = toa.get_TOAs(timfile, usepickle=False, ephem="DE421")
+
+    legacy = copy.deepcopy(t)
+    for f, c in zip(legacy.table["flags"], legacy.table["clkcorr"].quantity):
+        if c != 0:
+            f["clkcorr"] = c
+    legacy.table.remove_column("clkcorr")
+    mjds = np.empty(len(legacy.table), dtype=object)
+    for i, m in enumerate(legacy.table["mjd"]):
+        mjds[i] = m
+    legacy.table.replace_column("mjd", table.Column(mjds))
+    legacy.pickle()
+
+    t2 = toa.get_TOAs(timfile, usepickle=True, ephem="DE421")
+    assert isinstance(t2.table["mjd"], Time)
+    assert np.all(t2.table["mjd"] == t.table["mjd"])
+    assert np.all(t2.table["clkcorr"] == t.table["clkcorr"])
+    assert all("clkcorr" not in f for f in t2.table["flags"])
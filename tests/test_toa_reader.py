@@ -1,6 +1,10 @@
 import os
 import unittest
 
+import astropy.units as u
+import numpy as np
+import pytest
+
 from pint import toa
 from pinttestdata import datadir
 
@@ -52,3 +56,172 @@ class TestTOAReader(unittest.TestCase):
 
     def test_obs(self):
         assert self.x.table[1]["obs"] == "gbt"
+
+    def test_columns_match_toa_list(self):
+        # The columnar reader must give the same table as TOA objects would
+        y = toa.TOAs("NGC6440E.tim")
+        y.table.sort("index")
+        with open("NGC6440E.tim") as f:
+            parsed = [toa._parse_TOA_line(l) for l in f.readlines()]
+        toas = [toa.TOA(MJD, **d) for MJD, d in parsed if d["format"] == "Princeton"]
+        z = toa.TOAs(toalist=toas)
+        z.table.sort("index")
+        assert y.ntoas == z.ntoas
+        for c in ["mjd_float", "error", "freq", "obs", "flags", "groups"]:
+            assert all(y.table[c] == z.table[c])
+        for a, b in zip(y.table["mjd"], z.table["mjd"]):
+            assert a == b
+            assert a.scale == b.scale
+            assert a.location == b.location
+
+
+def _read_toa_objects(filename, state=None):
+    """Read a .tim file into TOA objects as the per-line reader used to.
+
+    Returns the TOA objects and the commands; used to check that the
+    columnar reader gives the same TOAs.
+    """
+    if state is None:
+        state = {
+            "toas": [],
+            "commands": [],
+            "EFAC": 1.0,
+            "EQUAD": 0.0 * u.us,
+            "EMIN": 0.0 * u.us,
+            "EMAX": np.inf * u.us,
+            "FMIN": 0.0 * u.MHz,
+            "FMAX": np.inf * u.MHz,
+            "INFO": None,
+            "SKIP": False,
+            "TIME": 0.0,
+            "PHASE": 0,
+            "JUMP": [False, 0],
+            "FORMAT": "Unknown",
+        }
+    with open(filename) as f:
+        lines = f.readlines()
+    ntoas = 0
+    for l in lines:
+        MJD, d = toa._parse_TOA_line(l, fmt=state["FORMAT"])
+        if d["format"] == "Command":
+            cmd = d["Command"][0].upper()
+            state["commands"].append((d["Command"], ntoas))
+            if cmd == "SKIP":
+                state["SKIP"] = True
+            elif cmd == "NOSKIP":
+                state["SKIP"] = False
+            elif cmd == "END":
+                break
+            elif cmd in ("TIME", "PHASE"):
+                state[cmd] += float(d["Command"][1])
+            elif cmd in ("EMIN", "EMAX", "EQUAD"):
+                state[cmd] = float(d["Command"][1]) * u.us
+            elif cmd in ("FMIN", "FMAX"):
+                state[cmd] = float(d["Command"][1]) * u.MHz
+            elif cmd == "EFAC":
+                state[cmd] = float(d["Command"][1])
+            elif cmd == "INFO":
+                state[cmd] = d["Command"][1]
+            elif cmd == "FORMAT":
+                if d["Command"][1] == "1":
+                    state[cmd] = "Tempo2"
+            elif cmd == "JUMP":
+                if state[cmd][0]:
+                    state[cmd] = [False, state[cmd][1] + 1]
+                else:
+                    state[cmd] = [True, state[cmd][1]]
+            elif cmd == "INCLUDE":
+                fmt = state["FORMAT"]
+                state["FORMAT"] = "Unknown"
+                _read_toa_objects(d["Command"][1], state)
+                state["FORMAT"] = fmt
+            continue
+        if state["SKIP"] or d["format"] in ("Blank", "Unknown", "Comment"):
+            continue
+        newtoa = toa.TOA(MJD, **d)
+        if (
+            state["EMIN"] > newtoa.error
+            or state["EMAX"] < newtoa.error
+            or state["FMIN"] > newtoa.freq
+            or state["FMAX"] < newtoa.freq
+        ):
+            continue
+        newtoa.error *= state["EFAC"]
+        newtoa.error = np.hypot(newtoa.error, state["EQUAD"])
+        if state["INFO"]:
+            newtoa.flags["info"] = state["INFO"]
+        if state["JUMP"][0]:
+            newtoa.flags["jump"] = state["JUMP"][1]
+        if state["PHASE"] != 0:
+            newtoa.flags["phase"] = state["PHASE"]
+        if state["TIME"] != 0.0:
+            newtoa.flags["to"] = state["TIME"]
+        state["toas"].append(newtoa)
+        ntoas += 1
+    return state["toas"], state["commands"]
+
+
+@pytest.fixture
+def commands_timfile(tmpdir):
+    included = tmpdir.join("included.tim")
+    included.write(
+        "FORMAT 1\n"
+        "inc1 1440.000 55340.123456789012345   1.500  ao   -fe L-wide\n"
+        "inc2 1440.000 55341.123456789012345   1.500  gbt  -fe Rcvr1_2\n"
+    )
+    main = tmpdir.join("main.tim")
+    main.write(
+        "C Multi-observatory file exercising the .tim commands\n"
+        "1               1949.609 53478.2858714192189    21.71         \n"
+        "FORMAT 1\n"
+        "toa1 1404.000 55336.989701997555466   3.469  gbt  -fe Rcvr1_2 -be GASP\n"
+        "TIME 0.5\n"
+        "toa2 1412.000 55337.989701995786016   3.291  ao   -fe L-wide -be ASP\n"
+        "PHASE 1\n"
+        "JUMP\n"
+        "toa3 1408.000 55338.989701996723497   3.842  1    -fe Rcvr1_2 -be GASP\n"
+        "toa4 1400.000 55339.989701996723497   2.100  @    -fe none\n"
+        "JUMP\n"
+        "EFAC 2.0\n"
+        "toa5 1420.000 55340.989701996723497   1.000  ao   -fe L-wide -be ASP\n"
+        "SKIP\n"
+        "toa6 1420.000 55341.989701996723497   1.000  ao   -fe L-wide -be ASP\n"
+        "NOSKIP\n"
+        "INCLUDE {}\n"
+        "JUMP\n"
+        "toa7 1420.000 55342.989701996723497   1.000  gbt  -fe Rcvr1_2\n"
+        "JUMP\n".format(included)
+    )
+    return str(main)
+
+
+def test_commands_match_toa_objects(commands_timfile):
+    toas, commands = _read_toa_objects(commands_timfile)
+    x = toa.TOAs(commands_timfile)
+    assert x.commands == commands
+    assert x.ntoas == len(toas) == 8
+    assert set(x.observatories) == {"arecibo", "gbt", "barycenter"}
+    y = toa.TOAs(toalist=toas)
+    x.table.sort("index")
+    y.table.sort("index")
+    for c in ["mjd_float", "error", "freq", "obs", "flags", "groups"]:
+        assert all(x.table[c] == y.table[c])
+    for a, b in zip(x.table["mjd"], y.table["mjd"]):
+        assert a == b
+        assert a.scale == b.scale
+
+
+def test_commands_flags(commands_timfile):
+    x = toa.TOAs(commands_timfile)
+    x.table.sort("index")
+    flags = x.table["flags"]
+    names = [f.get("name") for f in flags]
+    assert "toa6" not in names
+    assert "to" not in flags[1]
+    assert flags[names.index("toa2")]["to"] == 0.5
+    assert flags[names.index("toa3")]["jump"] == 0
+    assert flags[names.index("toa3")]["phase"] == 1
+    assert "jump" not in flags[names.index("toa5")]
+    assert flags[names.index("toa7")]["jump"] == 1
+    assert x.table["error"][names.index("toa5")] == 2.0 * u.us
+    assert "inc1" in names and "inc2" in names
@@ -5,6 +5,7 @@ import unittest
 
 import astropy.units as u
 import numpy as np
+from astropy.time import TimeDelta
 
 # import matplotlib
 # matplotlib.use('TKAgg')
@@ -12,6 +13,7 @@ import numpy as np
 
 import pint.models.model_builder as mb
 import pint.toa as toa
+from pint.models.parameter import maskParameter
 from pinttestdata import datadir
 
 
@@ -90,12 +92,10 @@ class TestTOAselection(unittest.TestCase):
         dmx_new = self.model.dmx_dm(self.sort_toas).value
         assert np.allclose(dmx_old, dmx_new)
 
-    def test_hash(self):
-        self.model.dmx_toas_selector.use_hash = True
-        dmx_old = self.get_dmx_old(self.toas).value
-        dmx_new = self.model.dmx_dm(self.toas).value
-        assert np.allclose(dmx_old, dmx_new)
-        assert self.model.dmx_toas_selector.use_hash
+    def test_dmx_index_cache(self):
+        index = self.model.get_dmx_index(self.toas)
+        assert self.model.get_dmx_index(self.toas) is index
+        assert self.model.get_dmx_index(self.sort_toas) is not index
         dmx_old = self.get_dmx_old(self.sort_toas).value
         dmx_new = self.model.dmx_dm(self.sort_toas).value
         assert np.allclose(dmx_old, dmx_new)
@@ -104,8 +104,9 @@ class TestTOAselection(unittest.TestCase):
         log = logging.getLogger("TestTOAselection.test_change_condition")
         dmx_old = self.get_dmx_old(self.toas).value
         dmx_new = self.model.dmx_dm(self.toas).value
-        indx0004 = self.model.dmx_toas_selector.select_result["DMX_0004"]
-        indx0005 = self.model.dmx_toas_selector.select_result["DMX_0005"]
+        index = self.model.get_dmx_index(self.toas)
+        indx0004 = index.bin_toas["DMX_0004"]
+        indx0005 = index.bin_toas["DMX_0005"]
         for l in indx0004:
             log.debug("indx0004= %s", str(l))
         for l in indx0005:
@@ -116,8 +117,9 @@ class TestTOAselection(unittest.TestCase):
         self.model.DMXR1_0005.value = self.model.DMXR2_0005.value
         dmx_old = self.get_dmx_old(self.toas).value
         dmx_new = self.model.dmx_dm(self.toas).value
-        indx0004_2 = self.model.dmx_toas_selector.select_result["DMX_0004"]
-        indx0005_2 = self.model.dmx_toas_selector.select_result["DMX_0005"]
+        index = self.model.get_dmx_index(self.toas)
+        indx0004_2 = index.bin_toas["DMX_0004"]
+        indx0005_2 = index.bin_toas["DMX_0005"]
         for l in indx0004_2:
             log.debug("indx0004_2= %s", str(l))
         for l in indx0005_2:
@@ -132,6 +134,102 @@ class TestTOAselection(unittest.TestCase):
         assert len(run1) == len(run2)
         assert np.allclose(run1, run2)
 
+    def test_dmx_overlap(self):
+        # Overlapping ranges go to the last bin, as with the old selection
+        Temp = self.model.DMXR1_0005.value
+        self.model.DMXR1_0005.value = self.model.DMXR1_0004.value
+        try:
+            index = self.model.get_dmx_index(self.toas)
+            assert len(index.bin_toas["DMX_0004"]) > 0
+            assert np.all(
+                np.in1d(index.bin_toas["DMX_0004"], index.bin_toas["DMX_0005"])
+            )
+            dmx_new = self.model.dmx_dm(self.toas)
+            assert np.all(
+                dmx_new[index.bin_toas["DMX_0004"]] == self.model.DMX_0005.quantity
+            )
+        finally:
+            self.model.DMXR1_0005.value = Temp
+
+    def test_dmx_matrix(self):
+        matrix, names = self.model.d_delay_d_DMX_matrix(self.toas)
+        assert matrix.shape == (self.toas.ntoas, len(names))
+        assert matrix.nnz == np.count_nonzero(
+            self.model.get_dmx_index(self.toas).toa_bin >= 0
+        )
+        for ii, name in enumerate(names):
+            dense = self.model.d_delay_d_param(self.toas, name).to_value(
+                u.s / self.model.DM.units
+            )
+            assert np.allclose(matrix[:, ii].toarray()[:, 0], dense, rtol=1e-14)
+
+    def test_mask_cache(self):
+        toas = copy.deepcopy(self.toas)
+        flags = np.empty(toas.ntoas, dtype=object)
+        flags[:] = [dict(f) for f in toas.table["flags"]]
+        toas.table["flags"] = flags
+        efac = self.model.EFAC1
+        ecorr = self.model.ECORR1
+        mask = efac.select_toa_mask(toas)
+        assert efac.select_toa_mask(toas) is mask
+        assert ecorr.select_toa_mask(toas) is not mask
+        assert not mask.flags.writeable
+
+        # Flag edits are seen once the cache is cleared
+        toas.table["flags"][mask[0]][efac.key.lstrip("-")] = "other"
+        assert efac.select_toa_mask(toas) is mask
+        toas.clear_flag_cache()
+        assert np.all(efac.select_toa_mask(toas) == mask[1:])
+
+        toas.select(np.arange(toas.ntoas) % 2 == 0)
+        selected = efac.select_toa_mask(toas)
+        expected = [
+            ii
+            for ii, f in enumerate(toas.table["flags"])
+            if f.get(efac.key.lstrip("-")) == efac.key_value[0]
+        ]
+        assert list(selected) == expected
+        toas.unselect()
+        assert len(efac.select_toa_mask(toas)) == len(mask) - 1
+
+    def test_mask_cache_adjust(self):
+        toas = copy.deepcopy(self.toas)
+        mjds = toas.table["mjd_float"]
+        start, end = np.median(mjds), np.max(mjds)
+        par = maskParameter(
+            name="JUMP",
+            index=1,
+            key="mjd",
+            key_value=[start, end],
+            value=0.0,
+            units=u.s,
+        )
+        mask = par.select_toa_mask(toas)
+        assert np.all(mask == np.flatnonzero((mjds >= start) & (mjds <= end)))
+        toas.adjust_TOAs(TimeDelta(-np.ones(toas.ntoas) * u.day))
+        mjds = toas.table["mjd_float"]
+        assert np.all(
+            par.select_toa_mask(toas)
+            == np.flatnonzero((mjds >= start) & (mjds <= end))
+        )
+
+    def test_selection_cache_invalidation(self):
+        toas = copy.deepcopy(self.toas)
+        toas.selection_cache["x"] = 1
+        toas.compute_TDBs()
+        assert "x" not in toas.selection_cache
+        toas.selection_cache["x"] = 1
+        toas.compute_posvels(toas.ephem, toas.planets)
+        assert "x" not in toas.selection_cache
+        toas.selection_cache["x"] = 1
+        toas.table["error"] = 2 * toas.table["error"]
+        assert "x" not in toas.selection_cache
+
+        raw = toa.TOAs(self.timf)
+        raw.selection_cache["x"] = 1
+        raw.apply_clock_corrections()
+        assert "x" not in raw.selection_cache
+
 
 if __name__ == "__main__":
     unittest.main()
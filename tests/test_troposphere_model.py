@@ -89,3 +89,32 @@ class TestTroposphereDelay(unittest.TestCase):
         assert self.td.LAT[l2] <= 80 * u.deg <= self.td.LAT[l2 + 1]
         assert self.td.LAT[l3] <= 0 * u.deg <= self.td.LAT[l3 + 1]
         assert self.td.LAT[l4] <= 90 * u.deg <= self.td.LAT[l4 + 1]
+
+    def test_cached_altitude(self):
+        # the cached altitudes agree with the full astropy transformation
+        radec = self.td._get_target_skycoord()
+        tbl = self.toas.table
+        for ii in range(len(tbl.groups)):
+            grp = tbl.groups[ii]
+            loind, hiind = tbl.groups.indices[ii : ii + 2]
+            obs = get_observatory(grp["obs"][0]).earth_location_itrf()
+            alt = self.td._get_cached_altitude(
+                self.toas, obs, grp, loind, hiind, radec
+            )
+            assert np.all(
+                np.abs(alt - self.td._get_target_altitude(obs, grp, radec))
+                < 0.2 * u.arcsec
+            )
+            assert (
+                self.td._get_cached_altitude(self.toas, obs, grp, loind, hiind, radec)
+                is alt
+            )
+
+    def test_cached_altitude_invalidation(self):
+        delay = self.td.troposphere_delay(self.toas)
+        assert np.all(self.td.troposphere_delay(self.toas) == delay)
+        self.modelWithTD.DECJ.value += 1.0 / 60
+        moved = self.td.troposphere_delay(self.toas)
+        assert np.all(moved != delay)
+        self.modelWithTD.DECJ.value -= 1.0 / 60
+        assert np.allclose(self.td.troposphere_delay(self.toas), delay, rtol=1e-12)
@@ -15,7 +15,7 @@ os.chdir(datadir)
 
 
 class TestWidebandTOAFitter:
-    def setup(self):
+    def setup_method(self):
         self.model = get_model("J1614-2230_NANOGrav_12yv3.wb.gls.par")
         self.toas = get_TOAs("J1614-2230_NANOGrav_12yv3.wb.tim", ephem="DE436")
         self.fit_data_name = ["toa", "dm"]
@@ -82,3 +82,22 @@ class TestWidebandTOAFitter:
         diff_postfit = (postfit_pint - postfit_tempo).to(u.ns)
         assert np.abs(diff_postfit - diff_postfit.mean()).max() < 50 * u.ns
         assert np.abs(dm_rms_pre - dm_rms_post) < 3e-8 * dm_rms_pre.unit
+
+
+def test_fitting_red_noise(tmp_path):
+    parfile = tmp_path / "rednoise.par"
+    with open("J1614-2230_NANOGrav_12yv3.wb.gls.par") as f:
+        parfile.write_text(f.read() + "TNRedAmp -13.5\nTNRedGam 3.0\nTNRedC 10\n")
+    model = get_model(str(parfile))
+    toas = get_TOAs("J1614-2230_NANOGrav_12yv3.wb.tim", ephem="DE436")
+    fitter = WidebandTOAFitter([toas], model, additional_args={})
+    chi2 = fitter.fit_toas()
+    noise_resids = fitter.resids.noise_resids["pl_red_noise"]
+    assert noise_resids.shape == (2 * toas.ntoas,)
+    assert np.all(np.isfinite(noise_resids)) and np.any(noise_resids != 0)
+    fitter_full = WidebandTOAFitter([toas], model, additional_args={})
+    assert np.isclose(chi2, fitter_full.fit_toas(full_cov=True), rtol=1e-9)
+    for p in fitter.model.free_params:
+        par, par_full = getattr(fitter.model, p), getattr(fitter_full.model, p)
+        assert np.abs(par.value - par_full.value) < 1e-6 * par_full.uncertainty_value
+        assert np.isclose(par.uncertainty_value, par_full.uncertainty_value)